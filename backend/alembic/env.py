@@ -11,7 +11,7 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from app.config import settings
 from app.database import Base
-from app.models import User, File, Tag
+from app.models import User, File, Tag, TagName, UserTagCount, Blob, OrphanedBlob, Chunk, BlobChunk, UploadSession, UploadPart
 
 config = context.config
 
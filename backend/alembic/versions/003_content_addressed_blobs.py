@@ -0,0 +1,45 @@
+"""Content-addressed blobs shared across files
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('blobs',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+    sa.Column('mime_type', sa.String(length=100), nullable=True),
+    sa.Column('path', sa.String(length=500), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    
+    # Existing files keep their on-disk location; each becomes its own blob
+    op.execute("""
+        INSERT INTO blobs (sha256, size_bytes, mime_type, path, ref_count, created_at)
+        SELECT sha256, size_bytes, mime_type, file_path, 1, created_at FROM files
+    """)
+    
+    op.drop_index('ix_files_sha256', table_name='files')
+    op.create_index(op.f('ix_files_sha256'), 'files', ['sha256'], unique=False)
+    op.create_foreign_key('files_sha256_fkey', 'files', 'blobs', ['sha256'], ['sha256'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('files_sha256_fkey', 'files', type_='foreignkey')
+    op.drop_index('ix_files_sha256', table_name='files')
+    op.create_index(op.f('ix_files_sha256'), 'files', ['sha256'], unique=True)
+    op.drop_table('blobs')
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""Full-text and trigram search indexes
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', regexp_replace(coalesce(title, ''), '[^[:alnum:]]+', ' ', 'g')), 'A') || "
+    "setweight(to_tsvector('simple', regexp_replace(filename, '[^[:alnum:]]+', ' ', 'g')), 'B')"
+)
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    
+    # files.title exists on the model but was missing from 001
+    op.execute("ALTER TABLE files ADD COLUMN IF NOT EXISTS title VARCHAR(255)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_files_title ON files (title)")
+    
+    # A stored generated column is computed for every existing row as part
+    # of the ADD COLUMN, which doubles as the backfill
+    op.add_column('files', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(SEARCH_VECTOR_SQL, persisted=True),
+        nullable=True
+    ))
+    op.create_index('ix_files_search_vector', 'files', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_files_filename_trgm', 'files', ['filename'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'filename': 'gin_trgm_ops'})
+    op.create_index('ix_files_title_trgm', 'files', ['title'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'})
+    op.create_index('ix_tags_tag_trgm', 'tags', ['tag'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'tag': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tags_tag_trgm', table_name='tags')
+    op.drop_index('ix_files_title_trgm', table_name='files')
+    op.drop_index('ix_files_filename_trgm', table_name='files')
+    op.drop_index('ix_files_search_vector', table_name='files')
+    op.drop_column('files', 'search_vector')
+    op.drop_index('ix_files_title', table_name='files')
+    op.drop_column('files', 'title')
+    op.execute("DROP EXTENSION IF EXISTS pg_trgm")
\ No newline at end of file
@@ -0,0 +1,30 @@
+"""Per-user file counter
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('file_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute("""
+        UPDATE users
+        SET file_count = counts.total
+        FROM (SELECT user_id, count(*) AS total FROM files GROUP BY user_id) AS counts
+        WHERE users.id = counts.user_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'file_count')
\ No newline at end of file
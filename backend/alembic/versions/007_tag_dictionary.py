@@ -0,0 +1,84 @@
+"""Normalize tags into a dictionary with per-user counts
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('tag_names',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_index('ix_tag_names_name_trgm', 'tag_names', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.execute("INSERT INTO tag_names (name) SELECT DISTINCT tag FROM tags")
+    
+    op.add_column('tags', sa.Column('tag_id', sa.Integer(), nullable=True))
+    op.add_column('tags', sa.Column('user_id', sa.Integer(), nullable=True))
+    op.execute("""
+        UPDATE tags
+        SET tag_id = tag_names.id, user_id = files.user_id
+        FROM tag_names, files
+        WHERE tag_names.name = tags.tag AND files.id = tags.file_id
+    """)
+    op.alter_column('tags', 'tag_id', nullable=False)
+    op.alter_column('tags', 'user_id', nullable=False)
+    op.create_foreign_key('tags_tag_id_fkey', 'tags', 'tag_names', ['tag_id'], ['id'])
+    op.create_foreign_key('tags_user_id_fkey', 'tags', 'users', ['user_id'], ['id'])
+    
+    op.drop_constraint('unique_file_tag', 'tags', type_='unique')
+    op.drop_index('ix_tags_tag_trgm', table_name='tags')
+    op.drop_index('ix_tags_tag', table_name='tags')
+    op.drop_column('tags', 'tag')
+    op.create_unique_constraint('unique_file_tag', 'tags', ['file_id', 'tag_id'])
+    op.create_index('ix_tags_tag_file', 'tags', ['tag_id', 'file_id'], unique=False)
+    op.create_index('ix_tags_user_tag_file', 'tags', ['user_id', 'tag_id', 'file_id'], unique=False)
+    
+    op.create_table('user_tag_counts',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('tag_id', sa.Integer(), nullable=False),
+    sa.Column('file_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['tag_id'], ['tag_names.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'tag_id')
+    )
+    op.execute("""
+        INSERT INTO user_tag_counts (user_id, tag_id, file_count)
+        SELECT user_id, tag_id, count(*) FROM tags GROUP BY user_id, tag_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('user_tag_counts')
+    
+    op.add_column('tags', sa.Column('tag', sa.String(length=100), nullable=True))
+    op.execute("UPDATE tags SET tag = tag_names.name FROM tag_names WHERE tag_names.id = tags.tag_id")
+    op.alter_column('tags', 'tag', nullable=False)
+    
+    op.drop_index('ix_tags_user_tag_file', table_name='tags')
+    op.drop_index('ix_tags_tag_file', table_name='tags')
+    op.drop_constraint('unique_file_tag', 'tags', type_='unique')
+    op.drop_constraint('tags_user_id_fkey', 'tags', type_='foreignkey')
+    op.drop_constraint('tags_tag_id_fkey', 'tags', type_='foreignkey')
+    op.drop_column('tags', 'user_id')
+    op.drop_column('tags', 'tag_id')
+    op.create_unique_constraint('unique_file_tag', 'tags', ['file_id', 'tag'])
+    op.create_index('ix_tags_tag', 'tags', ['tag'], unique=False)
+    op.create_index('ix_tags_tag_trgm', 'tags', ['tag'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'tag': 'gin_trgm_ops'})
+    
+    op.drop_table('tag_names')
\ No newline at end of file
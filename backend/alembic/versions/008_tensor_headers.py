@@ -0,0 +1,39 @@
+"""Safetensors header summary on blobs
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('blobs', sa.Column('tensor_count', sa.Integer(), nullable=True))
+    op.add_column('blobs', sa.Column('parameter_count', sa.BigInteger(), nullable=True))
+    op.add_column('blobs', sa.Column('tensor_dtypes', postgresql.ARRAY(sa.String(length=16)), nullable=True))
+    op.add_column('blobs', sa.Column('tensor_metadata', postgresql.JSONB(), nullable=True))
+    op.create_index('ix_blobs_tensor_dtypes', 'blobs', ['tensor_dtypes'], unique=False, postgresql_using='gin')
+    op.create_index(
+        'ix_blobs_tensor_metadata', 'blobs', ['tensor_metadata'], unique=False,
+        postgresql_using='gin', postgresql_ops={'tensor_metadata': 'jsonb_path_ops'}
+    )
+    # Existing blobs are indexed by the index_tensor_headers task
+
+
+def downgrade() -> None:
+    op.drop_index('ix_blobs_tensor_metadata', table_name='blobs')
+    op.drop_index('ix_blobs_tensor_dtypes', table_name='blobs')
+    op.drop_column('blobs', 'tensor_metadata')
+    op.drop_column('blobs', 'tensor_dtypes')
+    op.drop_column('blobs', 'parameter_count')
+    op.drop_column('blobs', 'tensor_count')
\ No newline at end of file
@@ -0,0 +1,51 @@
+"""Content-defined chunk store
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('blobs', sa.Column('layout', sa.String(length=10), server_default='plain', nullable=False))
+    op.create_table('chunks',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('size_bytes', sa.Integer(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('touched_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('sha256')
+    )
+    op.create_index(
+        'ix_chunks_unreferenced', 'chunks', ['touched_at'], unique=False,
+        postgresql_where=sa.text('ref_count <= 0')
+    )
+    op.create_table('blob_chunks',
+        sa.Column('blob_sha256', sa.String(length=64), nullable=False),
+        sa.Column('seq', sa.Integer(), nullable=False),
+        sa.Column('chunk_sha256', sa.String(length=64), nullable=False),
+        sa.Column('offset', sa.BigInteger(), nullable=False),
+        sa.Column('size_bytes', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['blob_sha256'], ['blobs.sha256'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['chunk_sha256'], ['chunks.sha256'], ),
+        sa.PrimaryKeyConstraint('blob_sha256', 'seq')
+    )
+    op.create_index(op.f('ix_blob_chunks_chunk_sha256'), 'blob_chunks', ['chunk_sha256'], unique=False)
+
+
+def downgrade() -> None:
+    # Chunked blobs have no plain file, so this is only safe with none left
+    op.drop_index(op.f('ix_blob_chunks_chunk_sha256'), table_name='blob_chunks')
+    op.drop_table('blob_chunks')
+    op.drop_index('ix_chunks_unreferenced', table_name='chunks')
+    op.drop_table('chunks')
+    op.drop_column('blobs', 'layout')
\ No newline at end of file
@@ -0,0 +1,29 @@
+"""Keep plain files of chunked blobs for a grace period
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '011'
+down_revision: Union[str, None] = '010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('blobs', sa.Column('plain_retired_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        'ix_blobs_plain_retired_at', 'blobs', ['plain_retired_at'], unique=False,
+        postgresql_where=sa.text('plain_retired_at IS NOT NULL')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_blobs_plain_retired_at', table_name='blobs')
+    op.drop_column('blobs', 'plain_retired_at')
\ No newline at end of file
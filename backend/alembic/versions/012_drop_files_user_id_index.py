@@ -0,0 +1,27 @@
+"""Drop ix_files_user_id, which ix_files_user_created_id covers
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '012'
+down_revision: Union[str, None] = '011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Generic plans of prepared listing queries picked the user_id index
+    # and sorted every row of the user; without it they walk the
+    # (user_id, created_at, id) index in order and stop at the limit
+    op.drop_index('ix_files_user_id', table_name='files')
+
+
+def downgrade() -> None:
+    op.create_index('ix_files_user_id', 'files', ['user_id'], unique=False)
\ No newline at end of file
@@ -9,10 +9,74 @@ class Settings:
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = config("ACCESS_TOKEN_EXPIRE_MINUTES", default=30, cast=int)
     REFRESH_TOKEN_EXPIRE_DAYS: int = config("REFRESH_TOKEN_EXPIRE_DAYS", default=7, cast=int)
+    BCRYPT_ROUNDS: int = config("BCRYPT_ROUNDS", default=12, cast=int)
+    PASSWORD_HASH_WORKERS: int = config("PASSWORD_HASH_WORKERS", default=2, cast=int)
+    PASSWORD_HASH_MAX_QUEUE: int = config("PASSWORD_HASH_MAX_QUEUE", default=64, cast=int)
     
     UPLOAD_DIR: str = config("UPLOAD_DIR", default="./uploads")
     MAX_FILE_SIZE: int = config("MAX_FILE_SIZE", default=10737418240, cast=int)  # 10GB
-    ALLOWED_EXTENSIONS: list = config("ALLOWED_EXTENSIONS", default=".jpg,.jpeg,.png,.gif,.pdf,.txt,.zip,.tar,.gz,.mp4,.mp3,.doc,.docx").split(",")
+    UPLOAD_CHUNK_SIZE: int = config("UPLOAD_CHUNK_SIZE", default=1048576, cast=int)  # 1MB
+    UPLOAD_PART_SIZE: int = config("UPLOAD_PART_SIZE", default=67108864, cast=int)  # 64MB
+    UPLOAD_MIN_PART_SIZE: int = config("UPLOAD_MIN_PART_SIZE", default=5242880, cast=int)  # 5MB
+    UPLOAD_MAX_PARTS: int = config("UPLOAD_MAX_PARTS", default=10000, cast=int)
+    UPLOAD_SESSION_TTL_HOURS: int = config("UPLOAD_SESSION_TTL_HOURS", default=24, cast=int)
+    PROBE_BATCH_MAX_ITEMS: int = config("PROBE_BATCH_MAX_ITEMS", default=1000, cast=int)
+    # Claiming a blob without uploading it requires hashing random ranges of it
+    CLAIM_PROOF_RANGES: int = config("CLAIM_PROOF_RANGES", default=4, cast=int)
+    CLAIM_PROOF_RANGE_BYTES: int = config("CLAIM_PROOF_RANGE_BYTES", default=65536, cast=int)  # 64KB
+    CLAIM_CHALLENGE_EXPIRE_MINUTES: int = config("CLAIM_CHALLENGE_EXPIRE_MINUTES", default=10, cast=int)
+    FILE_BATCH_MAX_ITEMS: int = config("FILE_BATCH_MAX_ITEMS", default=1000, cast=int)
+    DOWNLOAD_URL_EXPIRE_MINUTES: int = config("DOWNLOAD_URL_EXPIRE_MINUTES", default=60, cast=int)
+    DOWNLOAD_URL_MAX_EXPIRE_MINUTES: int = config("DOWNLOAD_URL_MAX_EXPIRE_MINUTES", default=10080, cast=int)  # 7 days
+    # memory (per process) or redis (shared, survives restarts)
+    DOWNLOAD_COUNT_BACKEND: str = config("DOWNLOAD_COUNT_BACKEND", default="memory")
+    DOWNLOAD_COUNT_FLUSH_SECONDS: float = config("DOWNLOAD_COUNT_FLUSH_SECONDS", default=5.0, cast=float)
+    DOWNLOAD_COUNT_MAX_PENDING: int = config("DOWNLOAD_COUNT_MAX_PENDING", default=1000, cast=int)
+    # none, x-accel-redirect (nginx) or x-sendfile (Apache/lighttpd)
+    DOWNLOAD_OFFLOAD: str = config("DOWNLOAD_OFFLOAD", default="none")
+    DOWNLOAD_OFFLOAD_PREFIX: str = config("DOWNLOAD_OFFLOAD_PREFIX", default="/protected/")
+    THUMBNAIL_BUCKETS: list = [int(size) for size in config("THUMBNAIL_BUCKETS", default="64,128,256,512").split(",")]
+    THUMBNAIL_CACHE_MAX_BYTES: int = config("THUMBNAIL_CACHE_MAX_BYTES", default=1073741824, cast=int)  # 1GB
+    THUMBNAIL_WORKERS: int = config("THUMBNAIL_WORKERS", default=2, cast=int)
+    THUMBNAIL_MAX_PENDING: int = config("THUMBNAIL_MAX_PENDING", default=16, cast=int)
+    SEARCH_COUNT_CACHE_SECONDS: int = config("SEARCH_COUNT_CACHE_SECONDS", default=60, cast=int)
+    SEARCH_COUNT_CACHE_SIZE: int = config("SEARCH_COUNT_CACHE_SIZE", default=10000, cast=int)
+    # memory, or redis to share entries between workers
+    USER_CACHE_BACKEND: str = config("USER_CACHE_BACKEND", default="memory")
+    USER_CACHE_TTL_SECONDS: int = config("USER_CACHE_TTL_SECONDS", default=30, cast=int)
+    USER_CACHE_SIZE: int = config("USER_CACHE_SIZE", default=10000, cast=int)
+    STORAGE_RECONCILE_IDLE_MINUTES: int = config("STORAGE_RECONCILE_IDLE_MINUTES", default=60, cast=int)
+    # local (UPLOAD_DIR) or s3 (any S3-compatible store; needs aioboto3)
+    STORAGE_BACKEND: str = config("STORAGE_BACKEND", default="local")
+    STORAGE_S3_BUCKET: str = config("STORAGE_S3_BUCKET", default="tensorbin")
+    STORAGE_S3_PREFIX: str = config("STORAGE_S3_PREFIX", default="")
+    STORAGE_S3_ENDPOINT_URL: str = config("STORAGE_S3_ENDPOINT_URL", default="")  # e.g. MinIO
+    STORAGE_S3_REGION: str = config("STORAGE_S3_REGION", default="")
+    STORAGE_S3_ACCESS_KEY_ID: str = config("STORAGE_S3_ACCESS_KEY_ID", default="")
+    STORAGE_S3_SECRET_ACCESS_KEY: str = config("STORAGE_S3_SECRET_ACCESS_KEY", default="")
+    STORAGE_S3_PART_SIZE: int = config("STORAGE_S3_PART_SIZE", default=16777216, cast=int)  # 16MB
+    STORAGE_S3_MAX_CONCURRENCY: int = config("STORAGE_S3_MAX_CONCURRENCY", default=4, cast=int)
+    STORAGE_S3_MAX_POOL_CONNECTIONS: int = config("STORAGE_S3_MAX_POOL_CONNECTIONS", default=32, cast=int)
+    # Redirect downloads to a presigned URL instead of proxying the bytes
+    STORAGE_S3_PRESIGN_DOWNLOADS: bool = config("STORAGE_S3_PRESIGN_DOWNLOADS", default=True, cast=bool)
+    # Redirects are followed at once, so their URLs can be short-lived
+    STORAGE_S3_PRESIGN_EXPIRE_SECONDS: int = config("STORAGE_S3_PRESIGN_EXPIRE_SECONDS", default=300, cast=int)
+    # Store blobs as seekable zstd frames when a sample compresses well
+    COMPRESSION_ENABLED: bool = config("COMPRESSION_ENABLED", default=False, cast=bool)
+    COMPRESSION_LEVEL: int = config("COMPRESSION_LEVEL", default=3, cast=int)
+    COMPRESSION_MIN_SIZE: int = config("COMPRESSION_MIN_SIZE", default=65536, cast=int)  # 64KB
+    COMPRESSION_SAMPLE_SIZE: int = config("COMPRESSION_SAMPLE_SIZE", default=1048576, cast=int)  # 1MB
+    COMPRESSION_MIN_RATIO: float = config("COMPRESSION_MIN_RATIO", default=1.2, cast=float)
+    COMPRESSION_FRAME_SIZE: int = config("COMPRESSION_FRAME_SIZE", default=1048576, cast=int)  # 1MB
+    # Split large blobs into content-defined chunks stored once by hash. The
+    # worker reads, hashes and rewrites the whole blob, at about 100MB/s
+    CHUNK_STORE_ENABLED: bool = config("CHUNK_STORE_ENABLED", default=False, cast=bool)
+    CHUNK_AVG_SIZE: int = config("CHUNK_AVG_SIZE", default=1048576, cast=int)  # 1MB
+    CHUNK_MIN_BLOB_SIZE: int = config("CHUNK_MIN_BLOB_SIZE", default=67108864, cast=int)  # 64MB
+    CHUNK_GC_GRACE_MINUTES: int = config("CHUNK_GC_GRACE_MINUTES", default=60, cast=int)
+    # Headers past this size are left unindexed rather than read into memory
+    SAFETENSORS_MAX_HEADER_BYTES: int = config("SAFETENSORS_MAX_HEADER_BYTES", default=104857600, cast=int)  # 100MB
+    ALLOWED_EXTENSIONS: list = config("ALLOWED_EXTENSIONS", default=".jpg,.jpeg,.png,.gif,.pdf,.txt,.zip,.tar,.gz,.mp4,.mp3,.doc,.docx,.safetensors,.ckpt,.pth,.pt,.bin,.json,.jsonl,.csv").split(",")
     
     ENVIRONMENT: str = config("ENVIRONMENT", default="development")
     
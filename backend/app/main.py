@@ -1,11 +1,16 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from contextlib import asynccontextmanager
 import logging
 from app.database import engine
 from app.models import User, File, Tag
-from app.routers import auth, files
+from app.routers import auth, files, uploads
+from app.services.download_counter import download_counter
+from app.services.thumbnail_service import ThumbnailService
+from app.services.user_cache import user_cache
+from app.storage import storage
+from app.utils.auth import password_hash_stats
 from app.config import settings
 
 logging.basicConfig(level=logging.INFO)
@@ -14,13 +19,19 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting up TensorBin API...")
+    await download_counter.start()
+    await user_cache.start()
     yield
     logger.info("Shutting down TensorBin API...")
+    await download_counter.stop()
+    await user_cache.stop()
+    await storage.close()
 
 app = FastAPI(
     title="TensorBin API",
     description="A modern file sharing and storage platform",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -46,10 +57,16 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "environment": settings.ENVIRONMENT}
+    return {
+        "status": "healthy",
+        "environment": settings.ENVIRONMENT,
+        "password_hashing": password_hash_stats(),
+        "thumbnails": ThumbnailService.render_stats()
+    }
 
 app.include_router(auth.router, prefix="/api/v1")
 app.include_router(files.router, prefix="/api/v1")
+app.include_router(uploads.router, prefix="/api/v1")
 
 if __name__ == "__main__":
     import uvicorn
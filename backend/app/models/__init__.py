@@ -1,5 +1,8 @@
 from .user import User
 from .file import File
-from .tag import Tag
+from .tag import Tag, TagName, UserTagCount
+from .blob import Blob, OrphanedBlob
+from .chunk import Chunk, BlobChunk
+from .upload_session import UploadSession, UploadPart
 
-__all__ = ["User", "File", "Tag"]
\ No newline at end of file
+__all__ = ["User", "File", "Tag", "TagName", "UserTagCount", "Blob", "OrphanedBlob", "Chunk", "BlobChunk", "UploadSession", "UploadPart"]
\ No newline at end of file
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String, BigInteger, DateTime, Index, text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.sql import func
+from app.database import Base
+
+class Blob(Base):
+    __tablename__ = "blobs"
+    
+    sha256 = Column(String(64), primary_key=True)
+    size_bytes = Column(BigInteger, nullable=False)
+    mime_type = Column(String(100))
+    path = Column(String(500), nullable=False)
+    ref_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # plain: one object at path; chunked: reassembled from blob_chunks;
+    # zstd: seekable zstd frames at path
+    layout = Column(String(10), default="plain", server_default="plain", nullable=False)
+    # Parsed from the safetensors header at ingest; NULL for anything else
+    tensor_count = Column(Integer)
+    parameter_count = Column(BigInteger)
+    tensor_dtypes = Column(ARRAY(String(16)))
+    tensor_metadata = Column(JSONB)
+    # When a blob moved into the chunk store; its plain file is kept for
+    # readers that already located it until the grace period has passed
+    plain_retired_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        Index("ix_blobs_tensor_dtypes", "tensor_dtypes", postgresql_using="gin"),
+        Index("ix_blobs_tensor_metadata", "tensor_metadata", postgresql_using="gin", postgresql_ops={"tensor_metadata": "jsonb_path_ops"}),
+        Index("ix_blobs_plain_retired_at", "plain_retired_at", postgresql_where=text("plain_retired_at IS NOT NULL")),
+    )
+
+class OrphanedBlob(Base):
+    """A blob whose last reference is gone but whose bytes may still be in
+    storage. Written in the deleting transaction and removed with the
+    bytes, so a removal task that never runs is caught by the sweep."""
+    __tablename__ = "orphaned_blobs"
+    
+    sha256 = Column(String(64), primary_key=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
\ No newline at end of file
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, BigInteger, DateTime, ForeignKey, Index, text
+from sqlalchemy.sql import func
+from app.database import Base
+
+class Chunk(Base):
+    __tablename__ = "chunks"
+    
+    sha256 = Column(String(64), primary_key=True)
+    size_bytes = Column(Integer, nullable=False)
+    ref_count = Column(Integer, default=0, nullable=False)
+    # Unreferenced chunks are only collected once this is older than the
+    # grace period, which covers a chunker between writing and referencing
+    touched_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        Index("ix_chunks_unreferenced", "touched_at", postgresql_where=text("ref_count <= 0")),
+    )
+
+class BlobChunk(Base):
+    __tablename__ = "blob_chunks"
+    
+    blob_sha256 = Column(String(64), ForeignKey("blobs.sha256", ondelete="CASCADE"), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    chunk_sha256 = Column(String(64), ForeignKey("chunks.sha256"), nullable=False, index=True)
+    offset = Column(BigInteger, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
\ No newline at end of file
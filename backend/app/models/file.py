@@ -1,26 +1,44 @@
-from sqlalchemy import Column, Integer, String, BigInteger, DateTime, Boolean, ForeignKey, Text, Float
+from sqlalchemy import Column, Integer, String, BigInteger, DateTime, Boolean, ForeignKey, Text, Float, Computed, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
+# Punctuation is folded to spaces first so "sdxl_lora-v2.safetensors" yields
+# the words sdxl, lora, v2 and safetensors rather than one opaque token.
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', regexp_replace(coalesce(title, ''), '[^[:alnum:]]+', ' ', 'g')), 'A') || "
+    "setweight(to_tsvector('simple', regexp_replace(filename, '[^[:alnum:]]+', ' ', 'g')), 'B')"
+)
+
 class File(Base):
     __tablename__ = "files"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     title = Column(String(255), nullable=True, index=True)
     filename = Column(String(255), nullable=False, index=True)
     original_filename = Column(String(255), nullable=False)
-    file_path = Column(String(500), nullable=False, unique=True)
+    file_path = Column(String(500), nullable=False)
     size_bytes = Column(BigInteger, nullable=False)
     mime_type = Column(String(100))
-    sha256 = Column(String(64), unique=True, nullable=False, index=True)
+    sha256 = Column(String(64), ForeignKey("blobs.sha256"), nullable=False, index=True)
     upload_status = Column(String(20), default="pending", nullable=False, index=True)
     nsfw_score = Column(Float, default=0.0)
     blocked = Column(Boolean, default=False, nullable=False, index=True)
     download_count = Column(Integer, default=0, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    search_vector = Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True))
     
     owner = relationship("User", back_populates="files")
-    tags = relationship("Tag", back_populates="file", cascade="all, delete-orphan")
\ No newline at end of file
+    blob = relationship("Blob")
+    tags = relationship("Tag", back_populates="file", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Also serves plain user_id filters, so user_id has no index of its own
+        Index("ix_files_user_created_id", "user_id", "created_at", "id"),
+        Index("ix_files_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_files_filename_trgm", "filename", postgresql_using="gin", postgresql_ops={"filename": "gin_trgm_ops"}),
+        Index("ix_files_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+    )
\ No newline at end of file
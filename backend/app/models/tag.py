@@ -1,14 +1,44 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
+class TagName(Base):
+    __tablename__ = "tag_names"
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False, unique=True)
+    
+    __table_args__ = (
+        Index("ix_tag_names_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+    )
+
 class Tag(Base):
     __tablename__ = "tags"
     
     id = Column(Integer, primary_key=True, index=True)
     file_id = Column(Integer, ForeignKey("files.id"), nullable=False, index=True)
-    tag = Column(String(100), nullable=False, index=True)
+    tag_id = Column(Integer, ForeignKey("tag_names.id"), nullable=False)
+    # Copied from the file so per-user tag filters never touch files
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     file = relationship("File", back_populates="tags")
+    tag_name = relationship("TagName", lazy="joined")
+    
+    @property
+    def tag(self) -> str:
+        return self.tag_name.name
+    
+    __table_args__ = (
+        UniqueConstraint('file_id', 'tag_id', name='unique_file_tag'),
+        Index("ix_tags_tag_file", "tag_id", "file_id"),
+        Index("ix_tags_user_tag_file", "user_id", "tag_id", "file_id"),
+    )
+
+class UserTagCount(Base):
+    __tablename__ = "user_tag_counts"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    tag_id = Column(Integer, ForeignKey("tag_names.id"), primary_key=True)
+    file_count = Column(Integer, default=0, nullable=False)
     
-    __table_args__ = (UniqueConstraint('file_id', 'tag', name='unique_file_tag'),)
\ No newline at end of file
+    tag_name = relationship("TagName", lazy="joined")
\ No newline at end of file
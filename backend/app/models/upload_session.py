@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, BigInteger, DateTime, ForeignKey, JSON, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+    
+    id = Column(String(36), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    filename = Column(String(255), nullable=False)
+    title = Column(String(255), nullable=True)
+    tags = Column(JSON, nullable=True)
+    size_bytes = Column(BigInteger, nullable=False)
+    part_size = Column(BigInteger, nullable=False)
+    part_count = Column(Integer, nullable=False)
+    status = Column(String(20), default="active", nullable=False, index=True)  # active, completed, aborted, expired
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    
+    parts = relationship("UploadPart", back_populates="session", cascade="all, delete-orphan")
+
+class UploadPart(Base):
+    __tablename__ = "upload_parts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(String(36), ForeignKey("upload_sessions.id", ondelete="CASCADE"), nullable=False, index=True)
+    part_number = Column(Integer, nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    session = relationship("UploadSession", back_populates="parts")
+    
+    __table_args__ = (UniqueConstraint('session_id', 'part_number', name='unique_session_part'),)
\ No newline at end of file
@@ -1,8 +1,15 @@
-from sqlalchemy import Column, Integer, String, BigInteger, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, BigInteger, DateTime, Boolean, case
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
+STORAGE_LIMITS = {
+    0: 1024 * 1024 * 1024,      # 1GB for free
+    1: 10 * 1024 * 1024 * 1024, # 10GB for creator  
+    2: 100 * 1024 * 1024 * 1024 # 100GB for power
+}
+
 class User(Base):
     __tablename__ = "users"
     
@@ -11,6 +18,7 @@ class User(Base):
     password_hash = Column(String(255), nullable=False)
     tier = Column(Integer, default=0, nullable=False)  # 0: free, 1: creator, 2: power
     storage_used = Column(BigInteger, default=0, nullable=False)
+    file_count = Column(Integer, default=0, nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
     is_verified = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -18,11 +26,11 @@ class User(Base):
     
     files = relationship("File", back_populates="owner", cascade="all, delete-orphan")
     
-    @property
+    @hybrid_property
     def storage_limit(self):
-        limits = {
-            0: 1024 * 1024 * 1024,      # 1GB for free
-            1: 10 * 1024 * 1024 * 1024, # 10GB for creator  
-            2: 100 * 1024 * 1024 * 1024 # 100GB for power
-        }
-        return limits.get(self.tier, limits[0])
\ No newline at end of file
+        return STORAGE_LIMITS.get(self.tier, STORAGE_LIMITS[0])
+    
+    @storage_limit.expression
+    def storage_limit(cls):
+        # Same table in SQL, so quota checks can run inside an UPDATE
+        return case(STORAGE_LIMITS, value=cls.tier, else_=STORAGE_LIMITS[0])
\ No newline at end of file
@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_database
 from app.schemas.user import UserCreate, UserLogin, UserResponse, Token, TokenRefresh
 from app.services.auth_service import AuthService
+from app.services.user_cache import user_cache
 from app.utils.auth import create_access_token, create_refresh_token, verify_token
 from app.config import settings
 
@@ -79,7 +80,10 @@ async def get_current_user(
         )
     
     user_id = int(payload.get("sub"))
-    user = await AuthService.get_user_by_id(db, user_id)
+    user = await user_cache.get(user_id)
+    if user is None:
+        user = await AuthService.get_user_by_id(db, user_id)
+        await user_cache.put(user)
     return user
 
 @router.get("/me", response_model=UserResponse)
@@ -1,15 +1,42 @@
+import hashlib
 import os
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status, Query
-from fastapi.responses import FileResponse, StreamingResponse, Response
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status, Query, Request
+from fastapi.responses import FileResponse, ORJSONResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from app.database import get_database
 from app.routers.auth import get_current_user
-from app.schemas.file import FileListResponse, FileResponse as FileResponseSchema, SearchQuery
+from app.schemas.file import (
+    FileListResponse,
+    FileResponse as FileResponseSchema,
+    SearchQuery,
+    BlobProbe,
+    BlobProbeResult,
+    BlobProbeBatch,
+    BlobProbeBatchResponse,
+    FileClaim,
+    SignedUrlResponse,
+    TagSuggestResponse,
+    TensorInfoResponse,
+    TagFacetResponse,
+    FileBatchRequest,
+    FileBatchTagRequest,
+    FileBatchGetResponse,
+    FileBatchResult
+)
 from app.services.file_service import FileService
+from app.services.tag_service import TagService
+from app.services.blob_service import BlobService
+from app.services.download_counter import download_counter
+from app.utils.auth import verify_token
+from app.utils.file_utils import generate_temp_path
+from app.services.thumbnail_service import ThumbnailService, THUMBNAIL_FORMATS
+from app.utils.download_utils import (
+    build_download_response, presigned_redirect, local_copy, is_new_download,
+    etag_matches, content_disposition, iter_segments, segments_length
+)
 from app.models.user import User
-from PIL import Image
-import io
+from app.config import settings
 
 router = APIRouter(prefix="/files", tags=["files"])
 
@@ -21,38 +48,23 @@ async def upload_file(
     db: AsyncSession = Depends(get_database),
     current_user: User = Depends(get_current_user)
 ):
-    tag_list = []
-    if tags:
-        tag_list = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    # Normalized up front, so the response shows the tags as stored
+    tag_list = TagService.normalize(tags.split(",") if tags else [])
     
     uploaded_file = await FileService.upload_file(db, current_user, file, tag_list, title)
     
-    file_response = FileResponseSchema(
-        id=uploaded_file.id,
-        title=uploaded_file.title,
-        filename=uploaded_file.filename,
-        original_filename=uploaded_file.original_filename,
-        size_bytes=uploaded_file.size_bytes,
-        mime_type=uploaded_file.mime_type,
-        sha256=uploaded_file.sha256,
-        upload_status=uploaded_file.upload_status,
-        blocked=uploaded_file.blocked,
-        download_count=uploaded_file.download_count,
-        created_at=uploaded_file.created_at,
-        tags=tag_list,
-        download_url=f"/api/v1/files/{uploaded_file.id}/download"
-    )
-    
-    return file_response
+    return FileService.to_response(uploaded_file, tag_list)
 
 @router.get("/", response_model=FileListResponse)
 async def get_user_files(
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque keyset cursor; pass an empty value to start"),
     db: AsyncSession = Depends(get_database),
     current_user: User = Depends(get_current_user)
 ):
-    return await FileService.get_user_files(db, current_user, page, per_page)
+    file_list = await FileService.get_user_files(db, current_user, page, per_page, cursor)
+    return ORJSONResponse(file_list.model_dump(mode="json"))
 
 @router.get("/search", response_model=FileListResponse)
 async def search_files(
@@ -61,6 +73,13 @@ async def search_files(
     mime_type: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque keyset cursor; pass an empty value to start"),
+    exact: bool = Query(True, description="False allows a cached total up to SEARCH_COUNT_CACHE_SECONDS old"),
+    include_total: bool = Query(True),
+    dtype: Optional[str] = Query(None, description="Comma-separated safetensors dtypes the file must contain, e.g. F16"),
+    min_parameters: Optional[int] = Query(None, ge=0),
+    max_parameters: Optional[int] = Query(None, ge=0),
+    meta: Optional[List[str]] = Query(None, description="key=value pairs the safetensors __metadata__ must contain"),
     db: AsyncSession = Depends(get_database),
     current_user: User = Depends(get_current_user)
 ):
@@ -68,15 +87,167 @@ async def search_files(
     if tags:
         tag_list = [tag.strip() for tag in tags.split(",") if tag.strip()]
     
+    dtype_list = []
+    if dtype:
+        dtype_list = [item.strip() for item in dtype.split(",") if item.strip()]
+    
+    metadata = {}
+    for pair in meta or []:
+        key, sep, value = pair.partition("=")
+        if not sep or not key:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="meta filters must look like key=value"
+            )
+        metadata[key] = value
+    
     search_query = SearchQuery(
         query=query,
         tags=tag_list if tag_list else None,
         mime_type=mime_type,
         page=page,
-        per_page=per_page
+        per_page=per_page,
+        cursor=cursor,
+        exact=exact,
+        include_total=include_total,
+        dtypes=dtype_list if dtype_list else None,
+        min_parameters=min_parameters,
+        max_parameters=max_parameters,
+        metadata=metadata if metadata else None
+    )
+    
+    file_list = await FileService.search_files(db, current_user, search_query)
+    return ORJSONResponse(file_list.model_dump(mode="json"))
+
+@router.get("/tags", response_model=TagFacetResponse)
+async def get_tag_facets(
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_database),
+    current_user: User = Depends(get_current_user)
+):
+    tags = await TagService.facets(db, current_user, limit)
+    return TagFacetResponse(tags=tags)
+
+@router.get("/tags/suggest", response_model=TagSuggestResponse)
+async def suggest_tags(
+    prefix: str = Query(..., min_length=1, max_length=50),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_database),
+    current_user: User = Depends(get_current_user)
+):
+    suggestions = await TagService.suggest(db, current_user, prefix, limit)
+    return TagSuggestResponse(suggestions=suggestions)
+
+@router.post("/probe", response_model=BlobProbeResult)
+async def probe_blob(
+    probe: BlobProbe,
+    db: AsyncSession = Depends(get_database),
+    current_user: User = Depends(get_current_user)
+):
+    results = await FileService.probe_blobs(db, current_user, [probe])
+    return results[0]
+
+@router.post("/probe/batch", response_model=BlobProbeBatchResponse)
+async def probe_blobs(
+    batch: BlobProbeBatch,
+    db: AsyncSession = Depends(get_database),
+    current_user: User = Depends(get_current_user)
+):
+    if len(batch.items) > settings.PROBE_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.PROBE_BATCH_MAX_ITEMS} items per batch"
+        )
+    
+    results = await FileService.probe_blobs(db, current_user, batch.items)
+    return BlobProbeBatchResponse(results=results)
+
+@router.post("/batch/get", response_model=FileBatchGetResponse)
+async def get_files_batch(
+    batch: FileBatchRequest,
+    db: AsyncSession = Depends(get_database),
+    current_user: User = Depends(get_current_user)
+):
+    _check_batch_size(batch)
+    batch_result = await FileService.get_files_batch(db, current_user, batch.ids)
+    return ORJSONResponse(batch_result.model_dump(mode="json"))
+
+@router.post("/batch/tags", response_model=FileBatchResult)
+async def retag_files(
+    batch: FileBatchTagRequest,
+    db: AsyncSession = Depends(get_database),
+    current_user: User = Depends(get_current_user)
+):
+    _check_batch_size(batch)
+    return await FileService.retag_files(db, current_user, batch)
+
+@router.post("/batch/delete", response_model=FileBatchResult)
+async def delete_files(
+    batch: FileBatchRequest,
+    db: AsyncSession = Depends(get_database),
+    current_user: User = Depends(get_current_user)
+):
+    _check_batch_size(batch)
+    return await FileService.delete_files(db, current_user, batch.ids)
+
+def _check_batch_size(batch: FileBatchRequest):
+    if len(batch.ids) > settings.FILE_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.FILE_BATCH_MAX_ITEMS} files per batch"
+        )
+
+@router.post("/claim", response_model=FileResponseSchema)
+async def claim_file(
+    claim: FileClaim,
+    db: AsyncSession = Depends(get_database),
+    current_user: User = Depends(get_current_user)
+):
+    tag_list = TagService.normalize(claim.tags)
+    claim.tags = tag_list
+    
+    claimed_file = await FileService.claim_file(db, current_user, claim)
+    
+    return FileService.to_response(claimed_file, tag_list)
+
+@router.get("/signed/{token}")
+async def download_signed_file(
+    token: str,
+    request: Request,
+    db: AsyncSession = Depends(get_database)
+):
+    # Verified from the token alone: no auth lookup, and no query unless
+    # the blob is not a plain file in storage
+    payload = verify_token(token, "download")
+    if not payload:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid or expired download link"
+        )
+    
+    source = await BlobService.source(db, payload["sha256"])
+    if source is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found on disk"
+        )
+    
+    etag = f'"{payload["sha256"]}"'
+    media_type = payload.get("mime") or 'application/octet-stream'
+    response = await presigned_redirect(
+        request, source, etag, media_type, payload["name"]
+    ) or build_download_response(
+        request,
+        path=source,
+        etag=etag,
+        media_type=media_type,
+        filename=payload["name"]
     )
     
-    return await FileService.search_files(db, current_user, search_query)
+    if is_new_download(request, response):
+        await download_counter.record(int(payload["sub"]))
+    
+    return response
 
 @router.get("/{file_id}", response_model=FileResponseSchema)
 async def get_file(
@@ -86,62 +257,100 @@ async def get_file(
 ):
     file = await FileService.get_file_by_id(db, file_id, current_user)
     
-    file_response = FileResponseSchema(
-        id=file.id,
-        title=file.title,
-        filename=file.filename,
-        original_filename=file.original_filename,
-        size_bytes=file.size_bytes,
-        mime_type=file.mime_type,
-        sha256=file.sha256,
-        upload_status=file.upload_status,
-        blocked=file.blocked,
-        download_count=file.download_count,
-        created_at=file.created_at,
-        tags=[tag.tag for tag in file.tags],
-        download_url=f"/api/v1/files/{file.id}/download"
+    return FileService.to_response(file, file.tags)
+
+@router.get("/{file_id}/tensors", response_model=TensorInfoResponse)
+async def get_file_tensors(
+    file_id: int,
+    include_tensors: bool = Query(False, description="Also list every tensor's name, dtype and shape"),
+    db: AsyncSession = Depends(get_database),
+    current_user: User = Depends(get_current_user)
+):
+    return await FileService.get_tensor_info(db, file_id, current_user, include_tensors)
+
+@router.get("/{file_id}/tensors/download")
+async def download_tensors(
+    file_id: int,
+    request: Request,
+    name: Optional[List[str]] = Query(None, description="Tensor to include; repeat for several"),
+    prefix: Optional[List[str]] = Query(None, description="Include every tensor whose name starts with this"),
+    db: AsyncSession = Depends(get_database),
+    current_user: User = Depends(get_current_user)
+):
+    file, source, head, ranges = await FileService.get_tensor_subset(
+        db, file_id, current_user, name or [], prefix or []
     )
     
-    return file_response
+    # The new header encodes the selection, shapes and offsets, so it
+    # identifies the subset of this blob
+    etag = f'"{file.sha256}-{hashlib.sha256(head).hexdigest()[:16]}"'
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    stem = os.path.splitext(file.original_filename)[0]
+    await download_counter.record(file.id)
+    
+    return StreamingResponse(
+        iter_segments(source, head, ranges),
+        headers={
+            "ETag": etag,
+            "Content-Length": str(segments_length(head, ranges)),
+            "Content-Disposition": content_disposition(f"{stem}.subset.safetensors")
+        },
+        media_type="application/octet-stream"
+    )
 
 @router.get("/{file_id}/download")
 async def download_file(
     file_id: int,
+    request: Request,
     db: AsyncSession = Depends(get_database),
     current_user: User = Depends(get_current_user)
 ):
     file = await FileService.get_file_by_id(db, file_id, current_user)
+    source = await FileService.get_source(db, file)
     
-    if not os.path.exists(file.file_path):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="File not found on disk"
-        )
+    etag = f'"{file.sha256}"'
+    media_type = file.mime_type or 'application/octet-stream'
+    response = await presigned_redirect(
+        request, source, etag, media_type, file.original_filename
+    ) or build_download_response(
+        request,
+        path=source,
+        etag=etag,
+        media_type=media_type,
+        filename=file.original_filename
+    )
     
-    file.download_count += 1
-    await db.commit()
+    # Resumed segments and 304s are not new downloads
+    if is_new_download(request, response):
+        await download_counter.record(file.id)
     
-    return FileResponse(
-        path=file.file_path,
-        filename=file.original_filename,
-        media_type=file.mime_type or 'application/octet-stream'
-    )
+    return response
+
+@router.post("/{file_id}/signed-url", response_model=SignedUrlResponse)
+async def create_signed_url(
+    file_id: int,
+    expires_minutes: Optional[int] = Query(None, ge=1, le=settings.DOWNLOAD_URL_MAX_EXPIRE_MINUTES),
+    db: AsyncSession = Depends(get_database),
+    current_user: User = Depends(get_current_user)
+):
+    file = await FileService.get_file_by_id(db, file_id, current_user)
+    return FileService.create_signed_url(file, expires_minutes)
 
 @router.get("/{file_id}/thumbnail")
 async def get_file_thumbnail(
     file_id: int,
+    request: Request,
     size: int = Query(150, ge=50, le=500),
+    fmt: str = Query("jpeg", alias="format", pattern="^(jpeg|webp)$"),
     db: AsyncSession = Depends(get_database),
     current_user: User = Depends(get_current_user)
 ):
     file = await FileService.get_file_by_id(db, file_id, current_user)
     
-    if not os.path.exists(file.file_path):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="File not found on disk"
-        )
-    
     # Check if it's an image
     if not file.mime_type or not file.mime_type.startswith('image/'):
         raise HTTPException(
@@ -149,38 +358,37 @@ async def get_file_thumbnail(
             detail="File is not an image"
         )
     
-    try:
-        # Open and resize image
-        with Image.open(file.file_path) as img:
-            # Convert to RGB if necessary
-            if img.mode in ('RGBA', 'LA'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = background
-            elif img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # Calculate thumbnail size maintaining aspect ratio
-            img.thumbnail((size, size), Image.Resampling.LANCZOS)
-            
-            # Save to memory
-            img_buffer = io.BytesIO()
-            img.save(img_buffer, format='JPEG', quality=85, optimize=True)
-            img_buffer.seek(0)
-            
-            return Response(
-                content=img_buffer.getvalue(),
-                media_type="image/jpeg",
-                headers={
-                    "Cache-Control": "public, max-age=3600",
-                    "Content-Length": str(len(img_buffer.getvalue()))
-                }
+    bucket = ThumbnailService.snap_size(size)
+    etag = ThumbnailService.etag(file.sha256, bucket, fmt)
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=3600"}
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    
+    thumbnail_path = ThumbnailService.get_cached(file.sha256, bucket, fmt)
+    if not thumbnail_path:
+        source = await FileService.get_source(db, file)
+        
+        try:
+            # Pillow needs a seekable local file
+            async with local_copy(source, generate_temp_path()) as source_path:
+                thumbnail_path, _ = await ThumbnailService.get_or_create_async(
+                    source_path, file.sha256, bucket, fmt
+                )
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to generate thumbnail"
             )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to generate thumbnail"
-        )
+    
+    return FileResponse(
+        path=thumbnail_path,
+        media_type=THUMBNAIL_FORMATS[fmt][2],
+        headers=headers
+    )
 
 @router.delete("/{file_id}")
 async def delete_file(
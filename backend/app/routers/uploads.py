@@ -0,0 +1,68 @@
+from fastapi import APIRouter, Depends, Header, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.database import get_database
+from app.routers.auth import get_current_user
+from app.schemas.file import FileResponse as FileResponseSchema
+from app.services.file_service import FileService
+from app.schemas.upload import UploadInit, UploadComplete, UploadSessionResponse, UploadPartResponse
+from app.services.upload_service import UploadService
+from app.models.user import User
+
+router = APIRouter(prefix="/uploads", tags=["uploads"])
+
+@router.post("/", response_model=UploadSessionResponse)
+async def create_upload_session(
+    upload_data: UploadInit,
+    db: AsyncSession = Depends(get_database),
+    current_user: User = Depends(get_current_user)
+):
+    session = await UploadService.create_session(db, current_user, upload_data)
+    return UploadService.to_response(session)
+
+@router.get("/{upload_id}", response_model=UploadSessionResponse)
+async def get_upload_session(
+    upload_id: str,
+    db: AsyncSession = Depends(get_database),
+    current_user: User = Depends(get_current_user)
+):
+    session = await UploadService.get_session(db, upload_id, current_user)
+    return UploadService.to_response(session)
+
+@router.put("/{upload_id}/parts/{part_number}", response_model=UploadPartResponse)
+async def upload_part(
+    upload_id: str,
+    part_number: int,
+    request: Request,
+    x_part_sha256: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_database),
+    current_user: User = Depends(get_current_user)
+):
+    return await UploadService.upload_part(
+        db, current_user, upload_id, part_number, request.stream(), x_part_sha256
+    )
+
+@router.post("/{upload_id}/complete", response_model=FileResponseSchema)
+async def complete_upload(
+    upload_id: str,
+    complete_data: UploadComplete,
+    db: AsyncSession = Depends(get_database),
+    current_user: User = Depends(get_current_user)
+):
+    session = await UploadService.get_session(db, upload_id, current_user)
+    tag_list = session.tags or []
+    
+    uploaded_file = await UploadService.complete_session(
+        db, current_user, upload_id, complete_data.sha256
+    )
+    
+    return FileService.to_response(uploaded_file, tag_list)
+
+@router.delete("/{upload_id}")
+async def abort_upload(
+    upload_id: str,
+    db: AsyncSession = Depends(get_database),
+    current_user: User = Depends(get_current_user)
+):
+    await UploadService.abort_session(db, upload_id, current_user)
+    return {"message": "Upload aborted"}
\ No newline at end of file
@@ -1,6 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict
+
+# Tags one batch request may add or remove
+MAX_BATCH_TAGS = 100
 
 class FileUpload(BaseModel):
     title: Optional[str] = None
@@ -27,14 +30,95 @@ class FileResponse(BaseModel):
 
 class FileListResponse(BaseModel):
     files: List[FileResponse]
-    total: int
+    total: Optional[int]
     page: int
     per_page: int
-    total_pages: int
+    total_pages: Optional[int]
+    next_cursor: Optional[str] = None
 
 class SearchQuery(BaseModel):
     query: Optional[str] = None
     tags: Optional[List[str]] = None
     mime_type: Optional[str] = None
     page: int = 1
-    per_page: int = 20
\ No newline at end of file
+    per_page: int = 20
+    cursor: Optional[str] = None
+    exact: bool = True
+    include_total: bool = True
+    dtypes: Optional[List[str]] = None
+    min_parameters: Optional[int] = None
+    max_parameters: Optional[int] = None
+    metadata: Optional[Dict[str, str]] = None
+
+class BlobProbe(BaseModel):
+    sha256: str = Field(..., pattern=r"^[0-9a-fA-F]{64}$")
+    size_bytes: int = Field(..., ge=0)
+
+class ClaimChallenge(BaseModel):
+    token: str
+    # Inclusive byte ranges; the proof is the SHA-256 of their bytes, in order
+    ranges: List[List[int]]
+
+class BlobProbeResult(BaseModel):
+    sha256: str
+    size_bytes: int
+    # Only true when the caller already has a file with this content.
+    # Other users' blobs are never revealed; claim them with the challenge.
+    exists: bool
+    challenge: Optional[ClaimChallenge] = None
+
+class BlobProbeBatch(BaseModel):
+    items: List[BlobProbe]
+
+class BlobProbeBatchResponse(BaseModel):
+    results: List[BlobProbeResult]
+
+class FileClaim(BlobProbe):
+    filename: str
+    title: Optional[str] = None
+    tags: Optional[List[str]] = []
+    challenge: Optional[str] = None
+    proof: Optional[str] = Field(None, pattern=r"^[0-9a-fA-F]{64}$")
+
+class SignedUrlResponse(BaseModel):
+    url: str
+    expires_at: datetime
+
+class TagCount(BaseModel):
+    tag: str
+    count: int
+
+class TagSuggestResponse(BaseModel):
+    suggestions: List[TagCount]
+
+class TagFacetResponse(BaseModel):
+    tags: List[TagCount]
+
+class FileBatchRequest(BaseModel):
+    ids: List[int]
+
+class FileBatchTagRequest(FileBatchRequest):
+    add: List[str] = Field([], max_length=MAX_BATCH_TAGS)
+    remove: List[str] = Field([], max_length=MAX_BATCH_TAGS)
+
+class FileBatchGetResponse(BaseModel):
+    files: List[FileResponse]
+    missing: List[int]
+
+class FileBatchResult(BaseModel):
+    ids: List[int]
+    missing: List[int]
+
+class TensorEntry(BaseModel):
+    name: str
+    dtype: str
+    shape: List[int]
+
+class TensorInfoResponse(BaseModel):
+    file_id: int
+    format: str = "safetensors"
+    tensor_count: int
+    parameter_count: int
+    dtypes: List[str]
+    metadata: Optional[Dict[str, str]] = None
+    tensors: Optional[List[TensorEntry]] = None
\ No newline at end of file
@@ -0,0 +1,31 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional, List
+
+class UploadInit(BaseModel):
+    filename: str
+    size_bytes: int = Field(..., ge=1)
+    part_size: Optional[int] = None
+    title: Optional[str] = None
+    tags: Optional[List[str]] = []
+
+class UploadComplete(BaseModel):
+    sha256: Optional[str] = None
+
+class UploadPartResponse(BaseModel):
+    part_number: int
+    size_bytes: int
+    sha256: str
+    
+    class Config:
+        from_attributes = True
+
+class UploadSessionResponse(BaseModel):
+    upload_id: str
+    filename: str
+    size_bytes: int
+    part_size: int
+    part_count: int
+    status: str
+    expires_at: datetime
+    parts: List[UploadPartResponse] = []
\ No newline at end of file
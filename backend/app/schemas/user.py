@@ -16,6 +16,7 @@ class UserResponse(BaseModel):
     tier: int
     storage_used: int
     storage_limit: int
+    file_count: int
     is_active: bool
     is_verified: bool
     created_at: datetime
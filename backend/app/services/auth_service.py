@@ -1,9 +1,9 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from fastapi import HTTPException, status
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin
-from app.utils.auth import verify_password, get_password_hash
+from app.utils.auth import hash_password, verify_and_update_password
 
 class AuthService:
     @staticmethod
@@ -15,7 +15,7 @@ class AuthService:
                 detail="Email already registered"
             )
         
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await hash_password(user_data.password)
         user = User(
             email=user_data.email,
             password_hash=hashed_password,
@@ -32,7 +32,14 @@ class AuthService:
         result = await db.execute(select(User).where(User.email == login_data.email))
         user = result.scalar_one_or_none()
         
-        if not user or not verify_password(login_data.password, user.password_hash):
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Incorrect email or password"
+            )
+        
+        valid, new_hash = await verify_and_update_password(login_data.password, user.password_hash)
+        if not valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password"
@@ -44,6 +51,14 @@ class AuthService:
                 detail="Inactive user"
             )
         
+        if new_hash:
+            # BCRYPT_ROUNDS changed since this hash was made; upgrade it now
+            # while the plaintext is at hand
+            await db.execute(
+                update(User).where(User.id == user.id).values(password_hash=new_hash)
+            )
+            await db.commit()
+        
         return user
     
     @staticmethod
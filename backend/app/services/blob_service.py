@@ -0,0 +1,297 @@
+import asyncio
+import os
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, func, and_, values, column, literal_column, String, Integer
+from sqlalchemy.dialects.postgresql import array, insert
+from typing import Dict, List, Optional
+from app.models.blob import Blob, OrphanedBlob
+from app.models.file import File
+from app.services.chunk_service import ChunkService
+from app.services.thumbnail_service import ThumbnailService
+from app.storage import StoredObject, blob_key, compressed_key, storage
+from app.utils.chunk_utils import BlobSource
+from app.utils.compression_utils import StoredSource, compressible, sample_ratio, compress_file, load_compressed
+from app.utils.file_utils import StreamDigest
+from app.utils.tensor_header import index_tensor_header
+from app.config import settings
+
+HEADER_INDEX_BATCH_SIZE = 500
+ORPHAN_SWEEP_BATCH_SIZE = 500
+
+class BlobService:
+    """Content-addressed storage shared by every File row with the same SHA-256.
+
+    All mutations of a blob happen under a transaction-scoped advisory lock on
+    its hash, so a concurrent upload can never observe a blob that a delete is
+    about to unlink.
+    """
+
+    @staticmethod
+    async def acquire(db: AsyncSession, temp_path: str, digest: StreamDigest) -> Blob:
+        """Take a reference to the blob holding an upload's bytes.
+
+        New content is handed to storage before the hash lock is taken and
+        with no transaction open, so a slow transfer holds neither; only
+        the row work runs under the lock. The caller keeps temp_path.
+        """
+        result = await db.execute(select(Blob.layout).where(Blob.sha256 == digest.sha256))
+        layout = result.scalar_one_or_none()
+        await db.commit()
+
+        stored = None
+        if layout is None or not await BlobService._present(digest.sha256, layout):
+            stored = await BlobService._store(digest, temp_path)
+
+        await BlobService._lock(db, digest.sha256)
+
+        result = await db.execute(select(Blob).where(Blob.sha256 == digest.sha256))
+        blob = result.scalar_one_or_none()
+
+        if blob is None:
+            blob = Blob(
+                sha256=digest.sha256,
+                size_bytes=digest.size,
+                mime_type=digest.mime_type,
+                layout=stored or "plain",
+                ref_count=0
+            )
+            blob.path = storage.locate(BlobService._stored_key(blob.sha256, blob.layout))
+            db.add(blob)
+
+        # Parse the header while the bytes are still a local file
+        if blob.ref_count == 0:
+            await BlobService._index_header(blob, temp_path)
+
+        if stored is not None and stored != blob.layout:
+            # Someone else stored or chunked the same content meanwhile
+            if blob.layout == "chunked" and stored == "plain":
+                blob.plain_retired_at = func.now()
+            else:
+                await storage.delete(BlobService._stored_key(blob.sha256, stored))
+
+        # Removal of an earlier orphan with this hash may have deleted what
+        # was stored before the lock; store again rather than lose it
+        if not await BlobService._present(blob.sha256, blob.layout):
+            blob.layout = await BlobService._store(digest, temp_path)
+            blob.path = storage.locate(BlobService._stored_key(blob.sha256, blob.layout))
+
+        blob.ref_count += 1
+        await db.flush()
+
+        return blob
+
+    @staticmethod
+    async def add_reference(db: AsyncSession, sha256: str, size_bytes: int) -> Optional[Blob]:
+        """Reference an existing blob without uploading it, if it is really there."""
+        await BlobService._lock(db, sha256)
+
+        result = await db.execute(
+            select(Blob).where(and_(Blob.sha256 == sha256, Blob.size_bytes == size_bytes))
+        )
+        blob = result.scalar_one_or_none()
+
+        if blob is None or not await BlobService._present(sha256, blob.layout):
+            return None
+
+        blob.ref_count += 1
+        await db.flush()
+
+        return blob
+
+    @staticmethod
+    async def release_many(db: AsyncSession, counts: Dict[str, int]) -> List[str]:
+        """Drop references to blobs, ``counts`` giving how many per hash.
+        
+        Rows that reach zero are deleted and their hashes returned. Their
+        bytes stay in storage, recorded in orphaned_blobs in the same
+        transaction, until remove_orphans runs after the commit; a rolled
+        back delete never loses data and a lost removal is swept later.
+        """
+        if not counts:
+            return []
+
+        hashes = sorted(counts)
+        # One statement takes every lock, in a stable order
+        await db.execute(
+            select(func.pg_advisory_xact_lock(func.hashtext(literal_column("sha256"))))
+            .select_from(func.unnest(array(hashes)).alias("sha256"))
+            .order_by(literal_column("sha256"))
+        )
+
+        released = values(
+            column("sha256", String), column("references", Integer), name="released"
+        ).data([(sha256, counts[sha256]) for sha256 in hashes])
+        result = await db.execute(
+            update(Blob)
+            .where(Blob.sha256 == released.c.sha256)
+            .values(ref_count=Blob.ref_count - released.c.references)
+            .returning(Blob.sha256, Blob.ref_count, Blob.layout)
+            .execution_options(synchronize_session=False)
+        )
+        rows = [row for row in result if row.ref_count <= 0]
+        orphans = [row.sha256 for row in rows]
+        if not orphans:
+            return []
+
+        chunked = [row.sha256 for row in rows if row.layout == "chunked"]
+        if chunked:
+            await ChunkService.release_blobs(db, chunked)
+
+        await db.execute(
+            delete(Blob)
+            .where(Blob.sha256.in_(orphans))
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(
+            insert(OrphanedBlob)
+            .values([{"sha256": sha256} for sha256 in orphans])
+            .on_conflict_do_nothing(index_elements=["sha256"])
+        )
+
+        return orphans
+
+    @staticmethod
+    async def remove_orphans(db: AsyncSession, hashes: List[str]) -> int:
+        """Delete stored bytes whose blob rows are gone, and their records.
+        
+        Each hash is re-checked under its lock, because an upload of the same
+        content may have re-created the blob and be relying on them.
+        """
+        removed = 0
+        for sha256 in hashes:
+            await BlobService._lock(db, sha256)
+            result = await db.execute(select(Blob.sha256).where(Blob.sha256 == sha256))
+            if result.scalar_one_or_none() is None:
+                # The layout went with the row, so try both
+                for key in (blob_key(sha256), compressed_key(sha256)):
+                    if await storage.exists(key):
+                        await storage.delete(key)
+                        removed += 1
+                ThumbnailService.purge(sha256)
+            await db.execute(delete(OrphanedBlob).where(OrphanedBlob.sha256 == sha256))
+            await db.commit()
+
+        return removed
+
+    @staticmethod
+    async def sweep_orphans(db: AsyncSession) -> int:
+        """Remove every recorded orphan, for deletes whose removal task was
+        lost or failed."""
+        removed = 0
+        after = ""
+        while True:
+            result = await db.execute(
+                select(OrphanedBlob.sha256)
+                .where(OrphanedBlob.sha256 > after)
+                .order_by(OrphanedBlob.sha256)
+                .limit(ORPHAN_SWEEP_BATCH_SIZE)
+            )
+            hashes = result.scalars().all()
+            if not hashes:
+                return removed
+
+            removed += await BlobService.remove_orphans(db, hashes)
+            after = hashes[-1]
+
+    @staticmethod
+    async def index_tensor_headers(db: AsyncSession) -> int:
+        """Backfill header summaries for blobs stored before ingest parsed them.
+        
+        Only blobs some file names as .safetensors are read, since the header
+        cannot be told apart from arbitrary bytes without opening the file.
+        """
+        indexed = 0
+        after = ""
+        while True:
+            result = await db.execute(
+                select(Blob)
+                .where(and_(
+                    Blob.sha256 > after,
+                    Blob.tensor_count.is_(None),
+                    select(File.id)
+                    .where(and_(File.sha256 == Blob.sha256, File.filename.ilike("%.safetensors")))
+                    .exists()
+                ))
+                .order_by(Blob.sha256)
+                .limit(HEADER_INDEX_BATCH_SIZE)
+            )
+            blobs = result.scalars().all()
+            if not blobs:
+                return indexed
+
+            for blob in blobs:
+                source = await BlobService.source(db, blob.sha256)
+                if source is not None and await BlobService._index_header(blob, source):
+                    indexed += 1
+            await db.commit()
+            after = blobs[-1].sha256
+
+    @staticmethod
+    async def source(db: AsyncSession, sha256: str) -> Optional[BlobSource]:
+        """Where to read a blob from, or None if its bytes are gone."""
+        # A plain local file is the cheapest source and needs no query
+        stored = await BlobService._find(blob_key(sha256))
+        if stored is not None:
+            return stored
+
+        stored = await BlobService._find(compressed_key(sha256))
+        if stored is not None:
+            return await load_compressed(stored)
+
+        return await ChunkService.source(db, sha256)
+
+    @staticmethod
+    async def _find(key: str) -> Optional[StoredSource]:
+        path = storage.local_path(key)
+        if path is not None:
+            return path if os.path.exists(path) else None
+
+        size = await storage.size(key)
+        return StoredObject(storage, key, size) if size is not None else None
+
+    @staticmethod
+    def _stored_key(sha256: str, layout: str) -> str:
+        return compressed_key(sha256) if layout == "zstd" else blob_key(sha256)
+
+    @staticmethod
+    async def _present(sha256: str, layout: str) -> bool:
+        return layout == "chunked" or await storage.exists(BlobService._stored_key(sha256, layout))
+
+    @staticmethod
+    async def _store(digest: StreamDigest, temp_path: str) -> str:
+        """Copy an upload to storage, compressed if a sample shows it pays,
+        and return the layout it was stored in.
+        
+        Frames are compressed independently, so Range reads decompress only
+        the frames they touch.
+        """
+        loop = asyncio.get_running_loop()
+        if compressible(digest.size, digest.mime_type):
+            ratio = await loop.run_in_executor(None, sample_ratio, temp_path)
+            if ratio >= settings.COMPRESSION_MIN_RATIO:
+                compressed_path = f"{temp_path}.zst"
+                try:
+                    await loop.run_in_executor(None, compress_file, temp_path, compressed_path)
+                    await storage.put_file(compressed_key(digest.sha256), compressed_path)
+                finally:
+                    if os.path.exists(compressed_path):
+                        os.remove(compressed_path)
+                return "zstd"
+
+        await storage.put_file(blob_key(digest.sha256), temp_path)
+        return "plain"
+
+    @staticmethod
+    async def _index_header(blob: Blob, source: BlobSource) -> bool:
+        loop = asyncio.get_running_loop()
+        summary = await loop.run_in_executor(None, index_tensor_header, source)
+        if summary is None:
+            return False
+
+        for column, value in summary.items():
+            setattr(blob, column, value)
+        return True
+
+    @staticmethod
+    async def _lock(db: AsyncSession, sha256: str):
+        await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(sha256))))
\ No newline at end of file
@@ -0,0 +1,362 @@
+import hashlib
+import logging
+import os
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, insert, func, and_, not_, any_, bindparam, String, Integer
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from app.models.blob import Blob
+from app.models.chunk import Chunk, BlobChunk
+from app.storage import blob_key, storage
+from app.utils.chunk_utils import ChunkedBlob, get_chunk_path, iter_chunks
+from app.utils.file_utils import ensure_directory_exists
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# New chunk data is written and committed in batches of about this size
+CHUNK_WRITE_BATCH_BYTES = 67108864  # 64MB
+CHUNK_GC_BATCH_SIZE = 1000
+CHUNK_BACKFILL_BATCH_SIZE = 100
+
+class ChunkService:
+    """Optional second tier of dedup below whole-blob hashing.
+
+    Large blobs are split with a content-defined chunker and each distinct
+    chunk is stored once under its SHA-256, so a fine-tune shares the bytes
+    it did not change with its base model. Chunk rows carry a reference
+    count. Unreferenced chunks are left for collect_garbage, which waits
+    out a grace period so a chunker still writing a blob cannot lose them.
+    """
+
+    @staticmethod
+    def eligible(size_bytes: int, mime_type: Optional[str]) -> bool:
+        # Images are read by the thumbnailer straight from a plain file.
+        # Chunks live under UPLOAD_DIR, so only local blobs are chunked.
+        return (
+            settings.CHUNK_STORE_ENABLED
+            and settings.STORAGE_BACKEND == "local"
+            and size_bytes >= settings.CHUNK_MIN_BLOB_SIZE
+            and not (mime_type or "").startswith("image/")
+        )
+
+    @staticmethod
+    async def source(db: AsyncSession, sha256: str) -> Optional[ChunkedBlob]:
+        """The chunks of a blob, or None if it has none."""
+        result = await db.execute(
+            select(BlobChunk.offset, BlobChunk.size_bytes, BlobChunk.chunk_sha256)
+            .where(BlobChunk.blob_sha256 == sha256)
+            .order_by(BlobChunk.seq)
+        )
+        chunks = [(row.offset, row.size_bytes, get_chunk_path(row.chunk_sha256)) for row in result]
+        if not chunks:
+            return None
+
+        return ChunkedBlob(chunks)
+
+    @staticmethod
+    async def chunk_blob(db: AsyncSession, sha256: str) -> bool:
+        """Move a plain blob into the chunk store, returning whether it moved."""
+        from app.services.blob_service import BlobService
+
+        result = await db.execute(
+            select(Blob.size_bytes, Blob.mime_type, Blob.layout).where(Blob.sha256 == sha256)
+        )
+        blob = result.one_or_none()
+        await db.commit()
+
+        if blob is None or blob.layout != "plain" or not ChunkService.eligible(blob.size_bytes, blob.mime_type):
+            return False
+
+        path = storage.local_path(blob_key(sha256))
+        pieces: List[Tuple[str, int]] = []
+        pending: Dict[str, bytes] = {}
+        pending_bytes = 0
+        stored = set()
+        # Chunks stay unreferenced until the end, so on a long run the
+        # earlier ones are touched again well inside the grace period
+        refresh_seconds = settings.CHUNK_GC_GRACE_MINUTES * 60 / 4
+        refreshed = time.monotonic()
+        try:
+            with open(path, "rb") as f:
+                for data in iter_chunks(f, settings.CHUNK_AVG_SIZE):
+                    digest = hashlib.sha256(data).hexdigest()
+                    pieces.append((digest, len(data)))
+                    if digest not in pending:
+                        pending[digest] = data
+                        pending_bytes += len(data)
+                    if pending_bytes >= CHUNK_WRITE_BATCH_BYTES:
+                        await ChunkService._store(db, pending)
+                        stored.update(pending)
+                        pending = {}
+                        pending_bytes = 0
+
+                        if time.monotonic() - refreshed >= refresh_seconds:
+                            if not await ChunkService._touch(db, stored):
+                                logger.warning(f"Chunks of blob {sha256} were collected while chunking; will retry later")
+                                return False
+                            refreshed = time.monotonic()
+        except FileNotFoundError:
+            return False
+
+        if pending:
+            await ChunkService._store(db, pending)
+
+        # Switch the layout under the blob's lock, so a concurrent release
+        # either sees the chunk references or the plain file, never neither
+        await BlobService._lock(db, sha256)
+        result = await db.execute(select(Blob.layout).where(Blob.sha256 == sha256))
+        if result.scalar_one_or_none() != "plain":
+            await db.rollback()
+            return False
+
+        counts = Counter(digest for digest, _ in pieces)
+        referenced = await ChunkService._adjust_refs(db, counts)
+        if referenced != len(counts):
+            # Some chunk outlived the grace period mid-run and was collected
+            await db.rollback()
+            logger.warning(f"Chunks of blob {sha256} were collected while chunking; will retry later")
+            return False
+
+        rows = []
+        offset = 0
+        for seq, (digest, size) in enumerate(pieces):
+            rows.append({
+                "blob_sha256": sha256,
+                "seq": seq,
+                "chunk_sha256": digest,
+                "offset": offset,
+                "size_bytes": size
+            })
+            offset += size
+        await db.execute(insert(BlobChunk), rows)
+        # Readers that located the plain file before this commit may still
+        # open it, so collect_garbage removes it after the grace period
+        await db.execute(
+            update(Blob)
+            .where(Blob.sha256 == sha256)
+            .values(layout="chunked", plain_retired_at=func.now())
+        )
+        await db.commit()
+        return True
+
+    @staticmethod
+    async def chunk_blobs(db: AsyncSession) -> int:
+        """Backfill: move every eligible plain blob into the chunk store."""
+        if not settings.CHUNK_STORE_ENABLED or settings.STORAGE_BACKEND != "local":
+            return 0
+
+        moved = 0
+        after = ""
+        while True:
+            result = await db.execute(
+                select(Blob.sha256)
+                .where(and_(
+                    Blob.sha256 > after,
+                    Blob.layout == "plain",
+                    Blob.size_bytes >= settings.CHUNK_MIN_BLOB_SIZE
+                ))
+                .order_by(Blob.sha256)
+                .limit(CHUNK_BACKFILL_BATCH_SIZE)
+            )
+            hashes = result.scalars().all()
+            await db.commit()
+            if not hashes:
+                return moved
+
+            for sha256 in hashes:
+                if await ChunkService.chunk_blob(db, sha256):
+                    moved += 1
+            after = hashes[-1]
+
+    @staticmethod
+    async def release_blobs(db: AsyncSession, hashes: List[str]):
+        """Drop the chunk references of blobs about to be deleted.
+
+        Must run before the blob rows go, since their blob_chunks rows are
+        removed with them.
+        """
+        refs = (
+            select(BlobChunk.chunk_sha256, func.count().label("references"))
+            .where(BlobChunk.blob_sha256 == any_(bindparam("hashes", hashes, type_=ARRAY(String))))
+            .group_by(BlobChunk.chunk_sha256)
+        )
+        result = await db.execute(refs)
+        counts = {row.chunk_sha256: -row.references for row in result}
+        await ChunkService._adjust_refs(db, counts)
+
+    @staticmethod
+    async def collect_garbage(db: AsyncSession) -> int:
+        """Delete chunks unreferenced for longer than CHUNK_GC_GRACE_MINUTES,
+        and plain files of blobs chunked longer ago than that.
+
+        Chunk files are unlinked before the delete commits. A chunker
+        inserting the same chunk meanwhile blocks on the row and, once it
+        proceeds, finds the file missing and writes it again.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(minutes=settings.CHUNK_GC_GRACE_MINUTES)
+        removed = await ChunkService._remove_retired(db, cutoff)
+        while True:
+            candidates = (
+                select(Chunk.sha256)
+                .where(and_(
+                    Chunk.ref_count <= 0,
+                    Chunk.touched_at < cutoff,
+                    not_(select(BlobChunk.seq).where(BlobChunk.chunk_sha256 == Chunk.sha256).exists())
+                ))
+                .limit(CHUNK_GC_BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+            )
+            result = await db.execute(
+                delete(Chunk)
+                .where(Chunk.sha256.in_(candidates.scalar_subquery()))
+                .returning(Chunk.sha256)
+                .execution_options(synchronize_session=False)
+            )
+            hashes = result.scalars().all()
+            for sha256 in hashes:
+                try:
+                    os.remove(get_chunk_path(sha256))
+                except FileNotFoundError:
+                    pass
+            await db.commit()
+
+            removed += len(hashes)
+            if len(hashes) < CHUNK_GC_BATCH_SIZE:
+                return removed
+
+    @staticmethod
+    async def _remove_retired(db: AsyncSession, cutoff: datetime) -> int:
+        from app.services.blob_service import BlobService
+
+        removed = 0
+        while True:
+            result = await db.execute(
+                select(Blob.sha256)
+                .where(Blob.plain_retired_at < cutoff)
+                .order_by(Blob.plain_retired_at)
+                .limit(CHUNK_GC_BATCH_SIZE)
+            )
+            hashes = result.scalars().all()
+            await db.commit()
+
+            for sha256 in hashes:
+                await BlobService._lock(db, sha256)
+                result = await db.execute(
+                    update(Blob)
+                    .where(and_(Blob.sha256 == sha256, Blob.plain_retired_at < cutoff))
+                    .values(plain_retired_at=None)
+                    .returning(Blob.sha256)
+                )
+                if result.scalar_one_or_none() is not None:
+                    await storage.delete(blob_key(sha256))
+                    removed += 1
+                await db.commit()
+
+            if len(hashes) < CHUNK_GC_BATCH_SIZE:
+                return removed
+
+    @staticmethod
+    async def savings_report(db: AsyncSession) -> dict:
+        """Bytes the chunked blobs would take as plain files versus on disk."""
+        result = await db.execute(
+            select(func.count(), func.coalesce(func.sum(Blob.size_bytes), 0))
+            .where(Blob.layout == "chunked")
+        )
+        blob_count, logical_bytes = result.one()
+
+        result = await db.execute(
+            select(func.count(), func.coalesce(func.sum(Chunk.size_bytes), 0))
+            .where(Chunk.ref_count > 0)
+        )
+        chunk_count, stored_bytes = result.one()
+
+        # sum() over bigint comes back as Decimal
+        logical_bytes, stored_bytes = int(logical_bytes), int(stored_bytes)
+        return {
+            "chunked_blobs": blob_count,
+            "chunks": chunk_count,
+            "logical_bytes": logical_bytes,
+            "stored_bytes": stored_bytes,
+            "saved_bytes": logical_bytes - stored_bytes,
+            "dedup_ratio": round(logical_bytes / stored_bytes, 3) if stored_bytes else None
+        }
+
+    @staticmethod
+    async def _store(db: AsyncSession, pending: Dict[str, bytes]):
+        # The row goes in first and is committed, so collect_garbage either
+        # already removed the old file or will see a fresh touched_at
+        statement = pg_insert(Chunk).values([
+            {"sha256": digest, "size_bytes": len(data), "ref_count": 0}
+            for digest, data in sorted(pending.items())
+        ])
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=[Chunk.sha256],
+            set_={"touched_at": func.now()}
+        ))
+        await db.commit()
+
+        for digest, data in pending.items():
+            path = get_chunk_path(digest)
+            if os.path.exists(path):
+                continue
+            await ensure_directory_exists(path)
+            temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+
+    @staticmethod
+    async def _touch(db: AsyncSession, digests: Set[str]) -> bool:
+        """Refresh touched_at on stored chunks, returning False if any of
+        them has already been collected."""
+        hashes = sorted(digests)
+        await db.execute(
+            select(Chunk.sha256)
+            .where(Chunk.sha256 == any_(bindparam("hashes", hashes, type_=ARRAY(String))))
+            .order_by(Chunk.sha256)
+            .with_for_update()
+        )
+        result = await db.execute(
+            update(Chunk)
+            .where(Chunk.sha256 == any_(bindparam("hashes", hashes, type_=ARRAY(String))))
+            .values(touched_at=func.now())
+            .returning(Chunk.sha256)
+            .execution_options(synchronize_session=False)
+        )
+        touched = len(result.all())
+        await db.commit()
+        return touched == len(hashes)
+
+    @staticmethod
+    async def _adjust_refs(db: AsyncSession, counts: Dict[str, int]) -> int:
+        if not counts:
+            return 0
+
+        hashes = sorted(counts)
+        # Lock in a stable order so concurrent adjustments cannot deadlock
+        await db.execute(
+            select(Chunk.sha256)
+            .where(Chunk.sha256 == any_(bindparam("hashes", hashes, type_=ARRAY(String))))
+            .order_by(Chunk.sha256)
+            .with_for_update()
+        )
+
+        # Arrays rather than a VALUES list: a big blob has more chunks than
+        # a statement may have bind parameters
+        deltas = func.unnest(
+            bindparam("delta_hashes", hashes, type_=ARRAY(String)),
+            bindparam("delta_counts", [counts[sha256] for sha256 in hashes], type_=ARRAY(Integer))
+        ).table_valued("sha256", "delta").render_derived(name="deltas")
+        result = await db.execute(
+            update(Chunk)
+            .where(Chunk.sha256 == deltas.c.sha256)
+            .values(ref_count=Chunk.ref_count + deltas.c.delta, touched_at=func.now())
+            .returning(Chunk.sha256)
+            .execution_options(synchronize_session=False)
+        )
+        return len(result.all())
\ No newline at end of file
@@ -0,0 +1,36 @@
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+from app.config import settings
+
+class CountCache:
+    """Per-process LRU of filtered search totals with a short TTL.
+
+    Callers put the owner's file_count in the key, so an upload or delete
+    moves every cached total for that user to a fresh key and the stale
+    entries simply age out.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[Hashable, Tuple[float, int]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[int]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, total = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return total
+
+    def put(self, key: Hashable, total: int):
+        self._entries[key] = (time.monotonic() + settings.SEARCH_COUNT_CACHE_SECONDS, total)
+        self._entries.move_to_end(key)
+        while len(self._entries) > settings.SEARCH_COUNT_CACHE_SIZE:
+            self._entries.popitem(last=False)
+
+count_cache = CountCache()
\ No newline at end of file
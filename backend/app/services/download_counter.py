@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import uuid
+from collections import defaultdict
+from typing import Dict, Optional
+from redis import asyncio as aioredis
+from redis.exceptions import ResponseError
+from sqlalchemy import update, bindparam
+from app.database import AsyncSessionLocal
+from app.models.file import File
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY = "tensorbin:download_counts"
+
+class DownloadCounter:
+    """Aggregates download counts and flushes them to files.download_count in
+    periodic bulk UPDATEs instead of one transaction per download.
+
+    With the in-memory backend a crash loses at most DOWNLOAD_COUNT_MAX_PENDING
+    counts or DOWNLOAD_COUNT_FLUSH_SECONDS worth, whichever comes first. The
+    Redis backend keeps pending counts in a hash so they survive API restarts
+    and are shared by every worker.
+    """
+
+    def __init__(self):
+        self._pending: Dict[int, int] = defaultdict(int)
+        self._pending_total = 0
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._redis = None
+
+    async def start(self):
+        if settings.DOWNLOAD_COUNT_BACKEND == "redis":
+            self._redis = aioredis.from_url(settings.REDIS_URL)
+
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush download counts on shutdown: {e}")
+
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    async def record(self, file_id: int):
+        if self._redis is not None:
+            pending = await self._redis.hincrby(REDIS_KEY, str(file_id), 1)
+        else:
+            self._pending[file_id] += 1
+            self._pending_total += 1
+            pending = self._pending_total
+
+        if pending >= settings.DOWNLOAD_COUNT_MAX_PENDING:
+            self._wake.set()
+
+    async def flush(self) -> int:
+        counts = await self._take_pending()
+        if not counts:
+            return 0
+
+        # Sorted ids keep row lock order stable across concurrent flushers
+        params = [
+            {"file_id": file_id, "increment": counts[file_id]}
+            for file_id in sorted(counts)
+        ]
+        files = File.__table__
+        statement = (
+            update(files)
+            .where(files.c.id == bindparam("file_id"))
+            .values(download_count=files.c.download_count + bindparam("increment"))
+        )
+
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(statement, params)
+                await db.commit()
+        except Exception:
+            await self._restore_pending(counts)
+            raise
+
+        return sum(counts.values())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.DOWNLOAD_COUNT_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush download counts: {e}")
+
+    async def _take_pending(self) -> Dict[int, int]:
+        if self._redis is None:
+            counts = dict(self._pending)
+            self._pending.clear()
+            self._pending_total = 0
+            return counts
+
+        # Rename first so increments arriving mid-flush land in a fresh hash
+        flushing_key = f"{REDIS_KEY}:{uuid.uuid4().hex}"
+        try:
+            await self._redis.rename(REDIS_KEY, flushing_key)
+        except ResponseError:
+            # Nothing recorded since the last flush
+            return {}
+
+        raw = await self._redis.hgetall(flushing_key)
+        await self._redis.delete(flushing_key)
+        return {int(file_id): int(count) for file_id, count in raw.items()}
+
+    async def _restore_pending(self, counts: Dict[int, int]):
+        if self._redis is None:
+            for file_id, count in counts.items():
+                self._pending[file_id] += count
+                self._pending_total += count
+            return
+
+        pipe = self._redis.pipeline()
+        for file_id, count in counts.items():
+            pipe.hincrby(REDIS_KEY, str(file_id), count)
+        await pipe.execute()
+
+download_counter = DownloadCounter()
\ No newline at end of file
@@ -1,23 +1,73 @@
+import asyncio
+import hmac
+import logging
 import os
+import re
 import aiofiles
+from collections import Counter
+from functools import partial
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_
+from sqlalchemy import select, update, delete, func, and_, or_, tuple_, any_, bindparam, literal, Integer, String, Row
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import selectinload
 from fastapi import HTTPException, status, UploadFile
 from typing import List, Optional, Tuple
 from app.models.user import User
 from app.models.file import File
-from app.models.tag import Tag
-from app.schemas.file import FileListResponse, FileResponse, SearchQuery
+from app.models.blob import Blob
+from app.models.tag import Tag, TagName
+from app.schemas.file import (
+    FileListResponse,
+    FileResponse,
+    SearchQuery,
+    BlobProbe,
+    BlobProbeResult,
+    ClaimChallenge,
+    FileClaim,
+    SignedUrlResponse,
+    FileBatchGetResponse,
+    FileBatchTagRequest,
+    FileBatchResult,
+    TensorEntry,
+    TensorInfoResponse
+)
+from app.services.blob_service import BlobService
+from app.services.chunk_service import ChunkService
+from app.services.count_cache import count_cache
+from app.services.tag_service import TagService
+from app.services.quota_service import QuotaService
+from app.services.user_cache import user_cache
 from app.utils.file_utils import (
-    calculate_sha256, 
-    get_mime_type, 
+    StreamDigest,
     is_allowed_file, 
-    generate_file_path, 
+    generate_temp_path, 
     ensure_directory_exists
 )
+from app.utils.auth import create_download_token, create_claim_token, verify_token
+from app.utils.possession import pick_ranges, prove
+from app.utils.chunk_utils import BlobSource
+from app.utils.tensor_header import read_safetensors_header, build_subset, InvalidTensorHeader
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.tasks.file_tasks import remove_orphaned_blobs, chunk_blob
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
+FILE_RESPONSE_COLUMNS = (
+    File.id,
+    File.title,
+    File.filename,
+    File.original_filename,
+    File.size_bytes,
+    File.mime_type,
+    File.sha256,
+    File.upload_status,
+    File.blocked,
+    File.download_count,
+    File.created_at
+)
+
 class FileService:
     @staticmethod
     async def upload_file(
@@ -39,45 +89,200 @@ class FileService:
                 detail="File too large"
             )
         
-        if user.storage_used + (file.size or 0) > user.storage_limit:
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail="Storage quota exceeded"
+        # Reserve the declared size up front and commit, so concurrent uploads
+        # see the charge immediately and no lock is held during the transfer
+        reserved = file.size or 0
+        quota_left = await QuotaService.reserve(db, user, reserved) + reserved
+        await db.commit()
+        
+        try:
+            temp_path = generate_temp_path()
+            await ensure_directory_exists(temp_path)
+
+            digest = await FileService._stream_to_disk(file, temp_path, quota_left)
+
+            # The declared size is only a hint; settle on what actually arrived
+            if digest.size > reserved:
+                await QuotaService.reserve(db, user, digest.size - reserved)
+            else:
+                await QuotaService.release(db, user.id, reserved - digest.size)
+            await db.commit()
+            reserved = digest.size
+
+            return await FileService.register_file(
+                db, user, temp_path, digest, file.filename, tags, title
             )
+        except BaseException:
+            await db.rollback()
+            await QuotaService.release(db, user.id, reserved)
+            await db.commit()
+            raise
+
+    @staticmethod
+    async def register_file(
+        db: AsyncSession,
+        user: User,
+        temp_path: str,
+        digest: StreamDigest,
+        filename: str,
+        tags: List[str] = None,
+        title: Optional[str] = None
+    ) -> File:
+        # Takes ownership of temp_path: its bytes either become a new blob or
+        # are discarded in favour of an identical blob that already exists.
+        # digest.size bytes must already be reserved against the user's quota.
+        try:
+            result = await db.execute(
+                select(File).where(and_(File.sha256 == digest.sha256, File.user_id == user.id))
+            )
+            existing_file = result.scalars().first()
+            
+            if existing_file:
+                # Nothing new is stored, so nothing is charged
+                await QuotaService.release(db, user.id, digest.size)
+                await db.commit()
+                return existing_file
+            
+            blob = await BlobService.acquire(db, temp_path, digest)
+            # Compressed blobs are not chunked
+            chunkable = (
+                blob.ref_count == 1
+                and blob.layout == "plain"
+                and ChunkService.eligible(blob.size_bytes, blob.mime_type)
+            )
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
         
-        file_path = generate_file_path(user.id, file.filename)
-        await ensure_directory_exists(file_path)
+        db_file = await FileService._create_file(db, user, blob, filename, tags, title)
         
-        async with aiofiles.open(file_path, 'wb') as f:
-            content = await file.read()
-            await f.write(content)
+        if chunkable:
+            await FileService._schedule_chunking(db_file.sha256)
         
-        file_size = len(content)
-        sha256 = await calculate_sha256(file_path)
-        mime_type = get_mime_type(file_path)
+        return db_file
+
+    @staticmethod
+    async def probe_blobs(db: AsyncSession, user: User, probes: List[BlobProbe]) -> List[BlobProbeResult]:
+        """Tell the caller which of its hashes it already has.
+        
+        Everything else gets a possession challenge, whether or not another
+        user stored that content, so probing reveals nothing about other
+        users' files.
+        """
+        hashes = {probe.sha256.lower() for probe in probes}
+        result = await db.execute(
+            select(File.sha256, File.size_bytes)
+            .where(and_(File.user_id == user.id, File.sha256.in_(hashes)))
+        )
+        owned = {(row.sha256, row.size_bytes) for row in result}
+        
+        results = []
+        for probe in probes:
+            sha256 = probe.sha256.lower()
+            exists = (sha256, probe.size_bytes) in owned
+            challenge = None
+            if not exists:
+                ranges = pick_ranges(probe.size_bytes)
+                token = create_claim_token({
+                    "sub": str(user.id),
+                    "sha256": sha256,
+                    "size": probe.size_bytes,
+                    "ranges": ranges
+                })
+                challenge = ClaimChallenge(token=token, ranges=[list(r) for r in ranges])
+            results.append(BlobProbeResult(
+                sha256=sha256, size_bytes=probe.size_bytes, exists=exists, challenge=challenge
+            ))
+        
+        return results
+
+    @staticmethod
+    async def claim_file(db: AsyncSession, user: User, claim: FileClaim) -> File:
+        # A hash alone is not proof of possession: it is visible in ETags,
+        # signed links and file listings. Other users' blobs can only be
+        # claimed by hashing the byte ranges of a challenge from probe.
+        if not is_allowed_file(claim.filename):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="File type not allowed"
+            )
         
-        result = await db.execute(select(File).where(File.sha256 == sha256))
-        existing_file = result.scalar_one_or_none()
+        sha256 = claim.sha256.lower()
+        result = await db.execute(
+            select(File).where(and_(File.sha256 == sha256, File.user_id == user.id))
+        )
+        existing_file = result.scalars().first()
         
         if existing_file:
-            os.remove(file_path)
-            if existing_file.user_id == user.id:
-                return existing_file
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail="File already exists"
-                )
+            return existing_file
+        
+        await FileService._verify_possession(db, user, sha256, claim)
+        
+        # Reservation, reference and file row commit or roll back together
+        await QuotaService.reserve(db, user, claim.size_bytes)
+        blob = await BlobService.add_reference(db, sha256, claim.size_bytes)
+        if blob is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Blob not found"
+            )
+        
+        return await FileService._create_file(db, user, blob, claim.filename, claim.tags, claim.title)
+
+    @staticmethod
+    async def _verify_possession(db: AsyncSession, user: User, sha256: str, claim: FileClaim):
+        # A missing blob and a wrong proof answer alike, so a failed claim
+        # does not tell whether anyone stored the content
+        not_verified = HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Blob not found or proof does not match"
+        )
+        
+        payload = verify_token(claim.challenge, "claim") if claim.challenge else None
+        if (
+            not payload
+            or not claim.proof
+            or payload["sub"] != str(user.id)
+            or payload["sha256"] != sha256
+            or payload["size"] != claim.size_bytes
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="A valid challenge and proof from /files/probe are required"
+            )
+        
+        result = await db.execute(
+            select(Blob.size_bytes).where(Blob.sha256 == sha256)
+        )
+        if result.scalar_one_or_none() != claim.size_bytes:
+            raise not_verified
+        
+        source = await BlobService.source(db, sha256)
+        if source is None:
+            raise not_verified
         
+        expected = await prove(source, [tuple(r) for r in payload["ranges"]])
+        if not hmac.compare_digest(expected, claim.proof.lower()):
+            raise not_verified
+    
+    @staticmethod
+    async def _create_file(
+        db: AsyncSession,
+        user: User,
+        blob: Blob,
+        filename: str,
+        tags: List[str] = None,
+        title: Optional[str] = None
+    ) -> File:
         db_file = File(
             user_id=user.id,
             title=title,
-            filename=file.filename,
-            original_filename=file.filename,
-            file_path=file_path,
-            size_bytes=file_size,
-            mime_type=mime_type,
-            sha256=sha256,
+            filename=filename,
+            original_filename=filename,
+            file_path=blob.path,
+            size_bytes=blob.size_bytes,
+            mime_type=blob.mime_type,
+            sha256=blob.sha256,
             upload_status="completed"
         )
         
@@ -85,59 +290,121 @@ class FileService:
         await db.flush()
         
         if tags:
-            for tag in tags:
-                tag_obj = Tag(file_id=db_file.id, tag=tag.strip().lower())
-                db.add(tag_obj)
-        
-        user.storage_used += file_size
+            await TagService.attach(db, db_file, tags)
+        
+        # The bytes were reserved by the caller: every owner is charged for
+        # their logical copy, shared blob or not
+        await db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(file_count=User.file_count + 1)
+        )
         await db.commit()
         await db.refresh(db_file)
+        await user_cache.invalidate(user.id)
         
         return db_file
-    
+
+    @staticmethod
+    async def _stream_to_disk(file: UploadFile, temp_path: str, quota_left: int) -> StreamDigest:
+        # Copy the upload in bounded chunks so memory stays flat regardless of
+        # file size; limits are enforced as bytes arrive, not after the fact.
+        # Size, SHA-256 and MIME sniff bytes are taken on the way through so
+        # the file is never read back from disk.
+        digest = StreamDigest()
+
+        try:
+            async with aiofiles.open(temp_path, 'wb') as f:
+                while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+                    digest.update(chunk)
+
+                    if digest.size > settings.MAX_FILE_SIZE:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail="File too large"
+                        )
+
+                    if digest.size > quota_left:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail="Storage quota exceeded"
+                        )
+
+                    await f.write(chunk)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return digest
+
+    @staticmethod
+    def to_response(file, tags: List) -> FileResponse:
+        """API view of a file, from an ORM File or a FILE_RESPONSE_COLUMNS row.
+        
+        ``tags`` may be Tag rows or plain names. Built through normal
+        validation: pydantic-core validates faster than model_construct
+        assigns fields in Python, see benchmarks/serialization.py.
+        """
+        return FileResponse(
+            id=file.id,
+            title=file.title,
+            filename=file.filename,
+            original_filename=file.original_filename,
+            size_bytes=file.size_bytes,
+            mime_type=file.mime_type,
+            sha256=file.sha256,
+            upload_status=file.upload_status,
+            blocked=file.blocked,
+            download_count=file.download_count,
+            created_at=file.created_at,
+            tags=[tag if isinstance(tag, str) else tag.tag for tag in tags],
+            download_url=f"/api/v1/files/{file.id}/download"
+        )
+
+    @staticmethod
+    def _tag_names():
+        # Correlated array of the file's tag names, so listings come back in
+        # one query without hydrating File or Tag objects
+        return (
+            select(func.coalesce(func.array_agg(TagName.name), literal([], ARRAY(String))))
+            .join(Tag, Tag.tag_id == TagName.id)
+            .where(Tag.file_id == File.id)
+            .scalar_subquery()
+            .label("tags")
+        )
+
     @staticmethod
     async def get_user_files(
         db: AsyncSession, 
         user: User, 
         page: int = 1, 
-        per_page: int = 20
+        per_page: int = 20,
+        cursor: Optional[str] = None
     ) -> FileListResponse:
         offset = (page - 1) * per_page
         
         query = (
-            select(File)
+            select(*FILE_RESPONSE_COLUMNS, FileService._tag_names())
             .where(File.user_id == user.id)
-            .options(selectinload(File.tags))
-            .order_by(File.created_at.desc())
-            .offset(offset)
-            .limit(per_page)
+            .order_by(File.created_at.desc(), File.id.desc())
         )
         
+        if cursor is not None:
+            query = FileService._seek(query, cursor, per_page)
+        else:
+            query = query.offset(offset).limit(per_page)
+        
         result = await db.execute(query)
-        files = result.scalars().all()
-        
-        count_query = select(func.count(File.id)).where(File.user_id == user.id)
-        total_result = await db.execute(count_query)
-        total = total_result.scalar()
-        
-        file_responses = []
-        for file in files:
-            file_response = FileResponse(
-                id=file.id,
-                title=file.title,
-                filename=file.filename,
-                original_filename=file.original_filename,
-                size_bytes=file.size_bytes,
-                mime_type=file.mime_type,
-                sha256=file.sha256,
-                upload_status=file.upload_status,
-                blocked=file.blocked,
-                download_count=file.download_count,
-                created_at=file.created_at,
-                tags=[tag.tag for tag in file.tags],
-                download_url=f"/api/v1/files/{file.id}/download"
-            )
-            file_responses.append(file_response)
+        files = result.all()
+        
+        next_cursor = None
+        if cursor is not None:
+            files, next_cursor = FileService._next_cursor(files, per_page)
+        
+        total = user.file_count
+        
+        file_responses = [FileService.to_response(row, row.tags) for row in files]
         
         total_pages = (total + per_page - 1) // per_page
         
@@ -146,7 +413,8 @@ class FileService:
             total=total,
             page=page,
             per_page=per_page,
-            total_pages=total_pages
+            total_pages=total_pages,
+            next_cursor=next_cursor
         )
     
     @staticmethod
@@ -169,18 +437,267 @@ class FileService:
         return file
     
     @staticmethod
-    async def delete_file(db: AsyncSession, file_id: int, user: User) -> bool:
+    def create_signed_url(file: File, expires_minutes: Optional[int] = None) -> SignedUrlResponse:
+        # Links stay valid until they expire, even if the file is deleted while
+        # its blob is still referenced elsewhere, so keep lifetimes short.
+        expires_delta = timedelta(minutes=expires_minutes or settings.DOWNLOAD_URL_EXPIRE_MINUTES)
+        token = create_download_token(
+            {
+                "sub": str(file.id),
+                "name": file.original_filename,
+                "mime": file.mime_type,
+                "sha256": file.sha256
+            },
+            expires_delta
+        )
+        
+        return SignedUrlResponse(
+            url=f"/api/v1/files/signed/{token}",
+            expires_at=datetime.now(timezone.utc) + expires_delta
+        )
+    
+    @staticmethod
+    async def get_tensor_info(
+        db: AsyncSession,
+        file_id: int,
+        user: User,
+        include_tensors: bool = False
+    ) -> TensorInfoResponse:
+        result = await db.execute(
+            select(File.id, File.sha256, Blob.tensor_count, Blob.parameter_count, Blob.tensor_dtypes, Blob.tensor_metadata)
+            .join(Blob, Blob.sha256 == File.sha256)
+            .where(and_(File.id == file_id, File.user_id == user.id))
+        )
+        row = result.one_or_none()
+        
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="File not found"
+            )
+        
+        if row.tensor_count is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="File has no tensor header"
+            )
+        
+        tensors = None
+        if include_tensors:
+            # Per-tensor detail is not stored; re-read just the header
+            source = await BlobService.source(db, row.sha256)
+            parsed = None
+            if source is not None:
+                loop = asyncio.get_running_loop()
+                try:
+                    parsed = await loop.run_in_executor(None, read_safetensors_header, source)
+                except (OSError, InvalidTensorHeader):
+                    pass
+            
+            if parsed is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="File not found on disk"
+                )
+            
+            tensors = [
+                TensorEntry(name=name, dtype=entry["dtype"], shape=entry["shape"])
+                for name, entry in parsed[0].items()
+                if name != "__metadata__"
+            ]
+        
+        return TensorInfoResponse(
+            file_id=row.id,
+            tensor_count=row.tensor_count,
+            parameter_count=row.parameter_count,
+            dtypes=row.tensor_dtypes,
+            metadata=row.tensor_metadata,
+            tensors=tensors
+        )
+    
+    @staticmethod
+    async def get_tensor_subset(
+        db: AsyncSession,
+        file_id: int,
+        user: User,
+        names: List[str],
+        prefixes: List[str]
+    ) -> Tuple[File, BlobSource, bytes, List[Tuple[int, int]]]:
+        """Header and source byte ranges of a safetensors file cut down to the
+        named tensors plus any whose name starts with one of ``prefixes``."""
         file = await FileService.get_file_by_id(db, file_id, user)
+        source = await FileService.get_source(db, file)
         
-        if os.path.exists(file.file_path):
-            os.remove(file.file_path)
+        loop = asyncio.get_running_loop()
+        try:
+            parsed = await loop.run_in_executor(None, read_safetensors_header, source)
+        except FileNotFoundError:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="File not found on disk"
+            )
+        except InvalidTensorHeader:
+            parsed = None
         
-        user.storage_used -= file.size_bytes
-        await db.delete(file)
-        await db.commit()
+        if parsed is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="File is not a valid safetensors file"
+            )
+        
+        header, data_start = parsed
+        
+        unknown = [name for name in names if name not in header or name == "__metadata__"]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Unknown tensors: {', '.join(unknown[:10])}"
+            )
+        
+        selected = set(names)
+        if prefixes:
+            selected.update(
+                name for name in header
+                if name != "__metadata__" and name.startswith(tuple(prefixes))
+            )
+        
+        if not selected:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No tensors selected"
+            )
         
+        head, ranges = build_subset(header, data_start, list(selected))
+        return file, source, head, ranges
+    
+    @staticmethod
+    async def get_source(db: AsyncSession, file: File) -> BlobSource:
+        source = await BlobService.source(db, file.sha256)
+        if source is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="File not found on disk"
+            )
+        return source
+    
+    @staticmethod
+    async def delete_file(db: AsyncSession, file_id: int, user: User) -> bool:
+        await FileService.get_file_by_id(db, file_id, user)
+        await FileService.delete_files(db, user, [file_id])
         return True
     
+    @staticmethod
+    async def get_files_batch(db: AsyncSession, user: User, file_ids: List[int]) -> FileBatchGetResponse:
+        file_ids = list(dict.fromkeys(file_ids))
+        
+        result = await db.execute(
+            select(*FILE_RESPONSE_COLUMNS, FileService._tag_names())
+            .where(and_(File.user_id == user.id, File.id == any_(FileService._id_array(file_ids))))
+        )
+        files = {row.id: row for row in result}
+        
+        return FileBatchGetResponse(
+            files=[
+                FileService.to_response(files[file_id], files[file_id].tags)
+                for file_id in file_ids if file_id in files
+            ],
+            missing=[file_id for file_id in file_ids if file_id not in files]
+        )
+    
+    @staticmethod
+    async def retag_files(db: AsyncSession, user: User, batch: FileBatchTagRequest) -> FileBatchResult:
+        file_ids = list(dict.fromkeys(batch.ids))
+        
+        result = await db.execute(
+            select(File.id).where(and_(File.user_id == user.id, File.id == any_(FileService._id_array(file_ids))))
+        )
+        owned = set(result.scalars().all())
+        
+        await TagService.retag(db, user, [file_id for file_id in file_ids if file_id in owned], batch.add, batch.remove)
+        await db.commit()
+        
+        return FileBatchResult(
+            ids=[file_id for file_id in file_ids if file_id in owned],
+            missing=[file_id for file_id in file_ids if file_id not in owned]
+        )
+    
+    @staticmethod
+    async def delete_files(db: AsyncSession, user: User, file_ids: List[int]) -> FileBatchResult:
+        """Delete many files in a handful of set-based statements.
+        
+        Rows, tag counts, quota and blob references are settled in one
+        transaction; unlinking blobs that lost their last reference is left
+        to a background task, with the hourly sweep as a backstop.
+        """
+        file_ids = list(dict.fromkeys(file_ids))
+        id_array = FileService._id_array(file_ids)
+        
+        result = await db.execute(
+            delete(Tag)
+            .where(and_(Tag.user_id == user.id, Tag.file_id == any_(id_array)))
+            .returning(Tag.tag_id)
+            .execution_options(synchronize_session=False)
+        )
+        tag_deltas = Counter()
+        tag_deltas.subtract(result.scalars().all())
+        
+        result = await db.execute(
+            delete(File)
+            .where(and_(File.user_id == user.id, File.id == any_(id_array)))
+            .returning(File.id, File.sha256, File.size_bytes)
+            .execution_options(synchronize_session=False)
+        )
+        deleted = result.all()
+        
+        if deleted:
+            await TagService.adjust_counts(db, user.id, tag_deltas)
+            await QuotaService.release(db, user.id, sum(row.size_bytes for row in deleted))
+            await db.execute(
+                update(User)
+                .where(User.id == user.id)
+                .values(file_count=User.file_count - len(deleted))
+            )
+            orphans = await BlobService.release_many(db, Counter(row.sha256 for row in deleted))
+            await db.commit()
+            await user_cache.invalidate(user.id)
+            
+            if orphans:
+                await FileService._schedule_blob_removal(db, orphans)
+        
+        deleted_ids = {row.id for row in deleted}
+        return FileBatchResult(
+            ids=[file_id for file_id in file_ids if file_id in deleted_ids],
+            missing=[file_id for file_id in file_ids if file_id not in deleted_ids]
+        )
+    
+    @staticmethod
+    async def _schedule_blob_removal(db: AsyncSession, hashes: List[str]):
+        try:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, partial(
+                remove_orphaned_blobs.apply_async, args=[hashes], retry=False
+            ))
+        except Exception as e:
+            # Without a broker, unlink inline rather than wait for the sweep
+            logger.warning(f"Could not queue blob removal, removing inline: {e}")
+            await BlobService.remove_orphans(db, hashes)
+    
+    @staticmethod
+    async def _schedule_chunking(sha256: str):
+        try:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, partial(
+                chunk_blob.apply_async, args=[sha256], retry=False
+            ))
+        except Exception as e:
+            # The blob stays plain until the chunk_blobs backfill reaches it
+            logger.warning(f"Could not queue chunking of blob {sha256}: {e}")
+    
+    @staticmethod
+    def _id_array(file_ids: List[int]):
+        # One array parameter instead of an IN list with a bind per id
+        return bindparam("file_ids", file_ids, type_=ARRAY(Integer))
+    
     @staticmethod
     async def search_files(
         db: AsyncSession, 
@@ -189,80 +706,159 @@ class FileService:
     ) -> FileListResponse:
         offset = (search_query.page - 1) * search_query.per_page
         
-        query = select(File).where(File.user_id == user.id)
+        filters = [File.user_id == user.id]
+        
+        # Keyset paging needs a stable sort key, so cursor mode always
+        # orders newest first rather than by relevance
+        keyset = search_query.cursor is not None
         
+        rank = None
         if search_query.query:
-            search_term = f"%{search_query.query}%"
-            query = query.where(
-                or_(
-                    File.filename.ilike(search_term),
-                    File.original_filename.ilike(search_term),
-                    File.title.ilike(search_term)
-                )
-            )
+            text_filter, rank = FileService._text_search(search_query.query)
+            filters.append(text_filter)
         
         if search_query.tags:
-            tag_subquery = (
-                select(Tag.file_id)
-                .where(Tag.tag.in_([tag.lower() for tag in search_query.tags]))
-                .group_by(Tag.file_id)
-                .having(func.count(Tag.tag) == len(search_query.tags))
-            )
-            query = query.where(File.id.in_(tag_subquery))
+            filters.append(await TagService.match_all(db, user, search_query.tags))
         
         if search_query.mime_type:
-            query = query.where(File.mime_type.like(f"{search_query.mime_type}%"))
+            filters.append(File.mime_type.like(f"{search_query.mime_type}%"))
         
-        query = (
-            query
-            .options(selectinload(File.tags))
-            .order_by(File.created_at.desc())
-            .offset(offset)
-            .limit(search_query.per_page)
-        )
+        tensor_filters = FileService._tensor_filters(search_query)
+        if tensor_filters:
+            filters.append(File.sha256.in_(select(Blob.sha256).where(*tensor_filters)))
+        
+        order_by = [File.created_at.desc(), File.id.desc()]
+        if rank is not None and not keyset:
+            order_by.insert(0, rank.desc())
+        
+        query = select(*FILE_RESPONSE_COLUMNS, FileService._tag_names()).where(*filters).order_by(*order_by)
+        
+        if keyset:
+            query = FileService._seek(query, search_query.cursor, search_query.per_page)
+        else:
+            query = query.offset(offset).limit(search_query.per_page)
         
         result = await db.execute(query)
-        files = result.scalars().all()
+        files = result.all()
         
-        count_query = select(func.count(File.id)).where(File.user_id == user.id)
-        if search_query.query:
-            search_term = f"%{search_query.query}%"
-            count_query = count_query.where(
-                or_(
-                    File.filename.ilike(search_term),
-                    File.original_filename.ilike(search_term),
-                    File.title.ilike(search_term)
-                )
-            )
+        next_cursor = None
+        if keyset:
+            files, next_cursor = FileService._next_cursor(files, search_query.per_page)
         
-        total_result = await db.execute(count_query)
-        total = total_result.scalar()
-        
-        file_responses = []
-        for file in files:
-            file_response = FileResponse(
-                id=file.id,
-                title=file.title,
-                filename=file.filename,
-                original_filename=file.original_filename,
-                size_bytes=file.size_bytes,
-                mime_type=file.mime_type,
-                sha256=file.sha256,
-                upload_status=file.upload_status,
-                blocked=file.blocked,
-                download_count=file.download_count,
-                created_at=file.created_at,
-                tags=[tag.tag for tag in file.tags],
-                download_url=f"/api/v1/files/{file.id}/download"
-            )
-            file_responses.append(file_response)
+        total = None
+        if search_query.include_total:
+            total = await FileService._count_matches(db, user, filters, search_query)
+        
+        file_responses = [FileService.to_response(row, row.tags) for row in files]
         
-        total_pages = (total + search_query.per_page - 1) // search_query.per_page
+        total_pages = None
+        if total is not None:
+            total_pages = (total + search_query.per_page - 1) // search_query.per_page
         
         return FileListResponse(
             files=file_responses,
             total=total,
             page=search_query.page,
             per_page=search_query.per_page,
-            total_pages=total_pages
-        )
\ No newline at end of file
+            total_pages=total_pages,
+            next_cursor=next_cursor
+        )
+    
+    @staticmethod
+    def _seek(query, cursor: str, per_page: int):
+        """Continue a (created_at, id) descending listing after ``cursor``.
+        
+        An empty cursor starts from the newest file. One extra row is fetched
+        so _next_cursor can tell whether another page exists.
+        """
+        if cursor:
+            try:
+                created_at, file_id = decode_cursor(cursor)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor"
+                )
+            query = query.where(tuple_(File.created_at, File.id) < tuple_(created_at, file_id))
+        
+        return query.limit(per_page + 1)
+    
+    @staticmethod
+    def _next_cursor(files: List[Row], per_page: int) -> Tuple[List[Row], Optional[str]]:
+        if len(files) <= per_page:
+            return files, None
+        
+        files = files[:per_page]
+        return files, encode_cursor(files[-1].created_at, files[-1].id)
+    
+    @staticmethod
+    async def _count_matches(db: AsyncSession, user: User, filters: list, search_query: SearchQuery) -> int:
+        if len(filters) == 1:
+            # No filter beyond ownership: the maintained counter is exact
+            return user.file_count
+        
+        cache_key = None
+        if not search_query.exact:
+            cache_key = (
+                user.id,
+                user.file_count,
+                search_query.query,
+                tuple(sorted(tag.lower() for tag in search_query.tags or [])),
+                search_query.mime_type,
+                tuple(sorted(search_query.dtypes or [])),
+                search_query.min_parameters,
+                search_query.max_parameters,
+                tuple(sorted((search_query.metadata or {}).items()))
+            )
+            cached = count_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        result = await db.execute(select(func.count(File.id)).where(*filters))
+        total = result.scalar()
+        
+        if cache_key is not None:
+            count_cache.put(cache_key, total)
+        
+        return total
+    
+    @staticmethod
+    def _tensor_filters(search_query: SearchQuery) -> list:
+        # Containment operators, so the GIN indexes on blobs serve them
+        conditions = []
+        if search_query.dtypes:
+            conditions.append(Blob.tensor_dtypes.contains([dtype.upper() for dtype in search_query.dtypes]))
+        if search_query.min_parameters is not None:
+            conditions.append(Blob.parameter_count >= search_query.min_parameters)
+        if search_query.max_parameters is not None:
+            conditions.append(Blob.parameter_count <= search_query.max_parameters)
+        if search_query.metadata:
+            conditions.append(Blob.tensor_metadata.contains(search_query.metadata))
+        return conditions
+    
+    @staticmethod
+    def _text_search(text: str):
+        """Match condition and relevance score for a free-text query.
+        
+        Whole words and prefixes go through the search_vector GIN index; the
+        trigram operators catch typos and partial words inside a name. Both
+        are index-backed, unlike a leading-wildcard ILIKE.
+        """
+        text = text.strip()
+        words = [word for word in re.split(r"[\W_]+", text.lower()) if word]
+        
+        conditions = [
+            File.filename.op("%")(text),
+            File.title.op("%")(text)
+        ]
+        rank = func.greatest(
+            func.similarity(File.filename, text),
+            func.coalesce(func.similarity(File.title, text), 0)
+        )
+        
+        if words:
+            ts_query = func.to_tsquery("simple", " & ".join(f"{word}:*" for word in words))
+            conditions.insert(0, File.search_vector.op("@@")(ts_query))
+            rank = func.ts_rank_cd(File.search_vector, ts_query) + rank
+        
+        return or_(*conditions), rank
\ No newline at end of file
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func, and_, or_
+from fastapi import HTTPException, status
+from app.models.user import User
+from app.models.file import File
+from app.models.upload_session import UploadSession
+from app.services.user_cache import user_cache
+from app.config import settings
+
+class QuotaService:
+    """Storage quota kept as reservations on users.storage_used.
+    
+    Bytes are reserved when an upload starts, with one conditional UPDATE
+    that both checks and charges the quota, so concurrent uploads can never
+    overshoot it and no lock is held across the transfer. Reservations are
+    released when an upload fails, turns out to be a duplicate, is aborted
+    or expires, and when a file is deleted. reconcile() repairs any drift.
+    """
+
+    @staticmethod
+    async def reserve(db: AsyncSession, user: User, size_bytes: int) -> int:
+        """Charge ``size_bytes`` to the user, or raise 413 if it would not
+        fit. Returns the bytes left under the quota afterwards. The caller
+        owns the transaction."""
+        result = await db.execute(
+            update(User)
+            .where(and_(User.id == user.id, User.storage_used + size_bytes <= User.storage_limit))
+            .values(storage_used=User.storage_used + size_bytes)
+            .returning(User.storage_limit - User.storage_used)
+            .execution_options(synchronize_session=False)
+        )
+        remaining = result.scalar_one_or_none()
+
+        if remaining is None:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="Storage quota exceeded"
+            )
+
+        await user_cache.invalidate(user.id)
+        return remaining
+
+    @staticmethod
+    async def release(db: AsyncSession, user_id: int, size_bytes: int):
+        if size_bytes <= 0:
+            return
+
+        await db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(storage_used=func.greatest(User.storage_used - size_bytes, 0))
+            .execution_options(synchronize_session=False)
+        )
+        await user_cache.invalidate(user_id)
+
+    @staticmethod
+    async def reconcile(db: AsyncSession) -> int:
+        """Recompute storage_used and file_count from files plus the
+        reservations of live upload sessions, in one set-based UPDATE.
+        
+        Single-request uploads hold reservations that no table records, so
+        users active within STORAGE_RECONCILE_IDLE_MINUTES are left alone.
+        """
+        file_totals = (
+            select(
+                File.user_id,
+                func.sum(File.size_bytes).label("bytes"),
+                func.count(File.id).label("files")
+            )
+            .group_by(File.user_id)
+            .subquery()
+        )
+        session_totals = (
+            select(
+                UploadSession.user_id,
+                func.sum(UploadSession.size_bytes).label("bytes")
+            )
+            .where(UploadSession.status.in_(["active", "completing"]))
+            .group_by(UploadSession.user_id)
+            .subquery()
+        )
+
+        expected_bytes = (
+            func.coalesce(
+                select(file_totals.c.bytes).where(file_totals.c.user_id == User.id).scalar_subquery(), 0
+            )
+            + func.coalesce(
+                select(session_totals.c.bytes).where(session_totals.c.user_id == User.id).scalar_subquery(), 0
+            )
+        )
+        expected_files = func.coalesce(
+            select(file_totals.c.files).where(file_totals.c.user_id == User.id).scalar_subquery(), 0
+        )
+
+        idle_since = datetime.now(timezone.utc) - timedelta(minutes=settings.STORAGE_RECONCILE_IDLE_MINUTES)
+        result = await db.execute(
+            update(User)
+            .where(and_(
+                User.updated_at < idle_since,
+                or_(User.storage_used != expected_bytes, User.file_count != expected_files)
+            ))
+            .values(storage_used=expected_bytes, file_count=expected_files)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+        return result.rowcount
\ No newline at end of file
@@ -0,0 +1,181 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from collections import Counter
+from sqlalchemy import select, delete, func, false, true, literal, and_, or_, any_, bindparam, Integer
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from fastapi import HTTPException, status
+from typing import Dict, Iterable, List
+from app.models.user import User
+from app.models.file import File
+from app.models.tag import Tag, TagName, UserTagCount
+from app.schemas.file import TagCount
+
+MAX_TAG_LENGTH = 100
+
+class TagService:
+    """Tags are interned in tag_names and referenced by integer id.
+    
+    user_tag_counts holds how many of a user's files carry each tag. It is
+    adjusted in the same transaction as every tag insert or delete, so facet
+    and suggestion queries read it directly instead of aggregating tags.
+    """
+
+    @staticmethod
+    def normalize(names: Iterable[str]) -> List[str]:
+        normalized = []
+        for name in names or []:
+            name = name.strip().lower()
+            if not name or name in normalized:
+                continue
+            if len(name) > MAX_TAG_LENGTH:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Tags are limited to {MAX_TAG_LENGTH} characters"
+                )
+            normalized.append(name)
+        return normalized
+
+    @staticmethod
+    async def resolve(db: AsyncSession, names: List[str], create: bool = False) -> Dict[str, int]:
+        """Map normalized tag names to ids, interning unknown names if ``create``."""
+        if not names:
+            return {}
+
+        if create:
+            await db.execute(
+                insert(TagName)
+                .values([{"name": name} for name in names])
+                .on_conflict_do_nothing(index_elements=["name"])
+            )
+
+        result = await db.execute(select(TagName.name, TagName.id).where(TagName.name.in_(names)))
+        return {row.name: row.id for row in result}
+
+    @staticmethod
+    async def attach(db: AsyncSession, file: File, names: List[str]):
+        names = TagService.normalize(names)
+        tag_ids = await TagService.resolve(db, names, create=True)
+
+        for name in names:
+            db.add(Tag(file_id=file.id, user_id=file.user_id, tag_id=tag_ids[name]))
+
+        await TagService.adjust_counts(db, file.user_id, Counter(tag_ids.values()))
+
+    @staticmethod
+    async def retag(db: AsyncSession, user: User, file_ids: List[int], add: List[str], remove: List[str]):
+        """Add and remove tags on many files with one statement each way."""
+        add = TagService.normalize(add)
+        remove = [name for name in TagService.normalize(remove) if name not in add]
+        deltas = Counter()
+
+        remove_ids = await TagService.resolve(db, remove)
+        if file_ids and remove_ids:
+            result = await db.execute(
+                delete(Tag)
+                .where(and_(
+                    Tag.user_id == user.id,
+                    Tag.file_id == any_(bindparam("file_ids", file_ids, type_=ARRAY(Integer))),
+                    Tag.tag_id == any_(bindparam("tag_ids", list(remove_ids.values()), type_=ARRAY(Integer)))
+                ))
+                .returning(Tag.tag_id)
+                .execution_options(synchronize_session=False)
+            )
+            deltas.subtract(result.scalars().all())
+
+        add_ids = await TagService.resolve(db, add, create=True)
+        if file_ids and add_ids:
+            # Every (file, tag) pair as a VALUES row would need three bind
+            # parameters each, more than a statement may have for a full batch
+            files = func.unnest(
+                bindparam("file_ids", file_ids, type_=ARRAY(Integer))
+            ).table_valued("file_id").render_derived(name="files")
+            tags = func.unnest(
+                bindparam("tag_ids", list(add_ids.values()), type_=ARRAY(Integer))
+            ).table_valued("tag_id").render_derived(name="tags")
+            result = await db.execute(
+                insert(Tag)
+                .from_select(
+                    ["file_id", "user_id", "tag_id"],
+                    select(files.c.file_id, literal(user.id), tags.c.tag_id).select_from(files.join(tags, true()))
+                )
+                .on_conflict_do_nothing(constraint="unique_file_tag")
+                .returning(Tag.tag_id)
+            )
+            deltas.update(result.scalars().all())
+
+        await TagService.adjust_counts(db, user.id, deltas)
+
+    @staticmethod
+    async def adjust_counts(db: AsyncSession, user_id: int, deltas: Dict[int, int]):
+        """Apply per-tag changes in file count, dropping tags that reach zero."""
+        # Sorted ids keep row lock order stable across concurrent writers
+        tag_ids = sorted(tag_id for tag_id, delta in deltas.items() if delta)
+        if not tag_ids:
+            return
+
+        statement = insert(UserTagCount).values([
+            {"user_id": user_id, "tag_id": tag_id, "file_count": deltas[tag_id]}
+            for tag_id in tag_ids
+        ])
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=["user_id", "tag_id"],
+            set_={"file_count": UserTagCount.file_count + statement.excluded.file_count}
+        ))
+        await db.execute(
+            delete(UserTagCount)
+            .where(and_(
+                UserTagCount.user_id == user_id,
+                UserTagCount.tag_id.in_(tag_ids),
+                UserTagCount.file_count <= 0
+            ))
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    async def match_all(db: AsyncSession, user: User, names: List[str]):
+        """Filter condition for the user's files carrying every tag in ``names``.
+        
+        Each tag becomes its own semi-join on (user_id, tag_id, file_id), so
+        Postgres can intersect the per-tag index scans.
+        """
+        names = TagService.normalize(names)
+        tag_ids = await TagService.resolve(db, names)
+
+        if len(tag_ids) < len(names):
+            # A tag nobody has used cannot match anything
+            return false()
+
+        return and_(*[
+            File.id.in_(
+                select(Tag.file_id).where(and_(Tag.user_id == user.id, Tag.tag_id == tag_id))
+            )
+            for tag_id in tag_ids.values()
+        ])
+
+    @staticmethod
+    async def facets(db: AsyncSession, user: User, limit: int = 100) -> List[TagCount]:
+        result = await db.execute(
+            select(TagName.name, UserTagCount.file_count)
+            .join(TagName, TagName.id == UserTagCount.tag_id)
+            .where(UserTagCount.user_id == user.id)
+            .order_by(UserTagCount.file_count.desc(), TagName.name)
+            .limit(limit)
+        )
+        return [TagCount(tag=row.name, count=row.file_count) for row in result]
+
+    @staticmethod
+    async def suggest(db: AsyncSession, user: User, prefix: str, limit: int = 10) -> List[TagCount]:
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        starts_with = TagName.name.like(f"{escaped}%", escape="\\")
+
+        result = await db.execute(
+            select(TagName.name, UserTagCount.file_count)
+            .join(TagName, TagName.id == UserTagCount.tag_id)
+            .where(and_(UserTagCount.user_id == user.id, or_(starts_with, TagName.name.op("%")(prefix))))
+            .order_by(starts_with.desc(), UserTagCount.file_count.desc(), TagName.name)
+            .limit(limit)
+        )
+        return [TagCount(tag=row.name, count=row.file_count) for row in result]
\ No newline at end of file
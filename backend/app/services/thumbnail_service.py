@@ -0,0 +1,196 @@
+import asyncio
+import glob
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from PIL import Image
+from app.config import settings
+
+THUMBNAIL_FORMATS = {
+    "jpeg": ("JPEG", "jpg", "image/jpeg"),
+    "webp": ("WEBP", "webp", "image/webp")
+}
+
+# Pillow releases the GIL while decoding and resampling, so a small thread
+# pool renders in parallel without blocking the event loop. At most
+# THUMBNAIL_MAX_PENDING renders wait for a thread; more are turned away.
+_render_executor = ThreadPoolExecutor(
+    max_workers=settings.THUMBNAIL_WORKERS,
+    thread_name_prefix="thumbnail"
+)
+_render_stats = {"in_flight": 0, "rejected": 0}
+
+# Renders finish on executor threads, which all update the cache total
+_cache_lock = threading.Lock()
+
+class ThumbnailService:
+    """Disk cache of rendered thumbnails keyed by (sha256, size bucket, format).
+
+    Requested sizes snap up to a small set of buckets so a handful of files
+    per image serve every size. Hits bump the entry's mtime, and once the
+    cache grows past THUMBNAIL_CACHE_MAX_BYTES the least recently used
+    entries are evicted.
+    """
+
+    _cache_bytes: Optional[int] = None
+
+    @staticmethod
+    def snap_size(size: int) -> int:
+        for bucket in settings.THUMBNAIL_BUCKETS:
+            if size <= bucket:
+                return bucket
+        return settings.THUMBNAIL_BUCKETS[-1]
+
+    @staticmethod
+    def cache_dir() -> str:
+        return os.path.join(settings.UPLOAD_DIR, ".thumbnails")
+
+    @staticmethod
+    def cache_path(sha256: str, bucket: int, fmt: str) -> str:
+        extension = THUMBNAIL_FORMATS[fmt][1]
+        return os.path.join(ThumbnailService.cache_dir(), sha256[:2], f"{sha256}_{bucket}.{extension}")
+
+    @staticmethod
+    def etag(sha256: str, bucket: int, fmt: str) -> str:
+        return f'"{sha256}-{bucket}.{fmt}"'
+
+    @staticmethod
+    def get_cached(sha256: str, bucket: int, fmt: str) -> Optional[str]:
+        path = ThumbnailService.cache_path(sha256, bucket, fmt)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    @staticmethod
+    def get_or_create(source_path: str, sha256: str, size: int, fmt: str = "jpeg") -> Tuple[str, int]:
+        bucket = ThumbnailService.snap_size(size)
+
+        cached = ThumbnailService.get_cached(sha256, bucket, fmt)
+        if cached:
+            return cached, bucket
+
+        path = ThumbnailService.cache_path(sha256, bucket, fmt)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            ThumbnailService.render(source_path, temp_path, bucket, fmt)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        ThumbnailService._account(os.path.getsize(path))
+
+        return path, bucket
+
+    @staticmethod
+    def render_stats() -> dict:
+        in_flight = _render_stats["in_flight"]
+        return {
+            "workers": settings.THUMBNAIL_WORKERS,
+            "in_flight": in_flight,
+            "queued": max(in_flight - settings.THUMBNAIL_WORKERS, 0),
+            "rejected": _render_stats["rejected"]
+        }
+
+    @staticmethod
+    async def get_or_create_async(source_path: str, sha256: str, size: int, fmt: str = "jpeg") -> Tuple[str, int]:
+        if _render_stats["in_flight"] >= settings.THUMBNAIL_WORKERS + settings.THUMBNAIL_MAX_PENDING:
+            _render_stats["rejected"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many thumbnails being generated",
+                headers={"Retry-After": "1"}
+            )
+
+        _render_stats["in_flight"] += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                _render_executor, ThumbnailService.get_or_create, source_path, sha256, size, fmt
+            )
+        finally:
+            _render_stats["in_flight"] -= 1
+
+    @staticmethod
+    def render(source_path: str, dest_path: str, size: int, fmt: str = "jpeg"):
+        pil_format = THUMBNAIL_FORMATS[fmt][0]
+
+        with Image.open(source_path) as img:
+            # JPEGs can be decoded straight at a reduced DCT scale, which skips
+            # most of the work for large photos
+            if img.format == "JPEG":
+                img.draft("RGB", (size, size))
+
+            # Convert to RGB if necessary
+            if img.mode in ('RGBA', 'LA'):
+                background = Image.new('RGB', img.size, (255, 255, 255))
+                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
+                img = background
+            elif img.mode != 'RGB':
+                img = img.convert('RGB')
+
+            # Calculate thumbnail size maintaining aspect ratio
+            # reducing_gap lets Pillow box-reduce first and LANCZOS only the last step
+            img.thumbnail((size, size), Image.Resampling.LANCZOS, reducing_gap=3.0)
+            img.save(dest_path, format=pil_format, quality=85, optimize=True)
+
+    @staticmethod
+    def purge(sha256: str):
+        pattern = os.path.join(ThumbnailService.cache_dir(), sha256[:2], f"{sha256}_*")
+        for path in glob.glob(pattern):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _account(added_bytes: int):
+        # The running total is per process and only approximate; every
+        # eviction pass rescans the directory and corrects it.
+        with _cache_lock:
+            if ThumbnailService._cache_bytes is None:
+                ThumbnailService._cache_bytes = ThumbnailService._scan()[1]
+            else:
+                ThumbnailService._cache_bytes += added_bytes
+
+            if ThumbnailService._cache_bytes > settings.THUMBNAIL_CACHE_MAX_BYTES:
+                ThumbnailService._evict()
+
+    @staticmethod
+    def _scan():
+        entries = []
+        total = 0
+        for root, _, names in os.walk(ThumbnailService.cache_dir()):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        return entries, total
+
+    @staticmethod
+    def _evict():
+        entries, total = ThumbnailService._scan()
+        # Evict down to 90% so a full cache does not rescan on every write
+        target = settings.THUMBNAIL_CACHE_MAX_BYTES * 0.9
+
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+
+        ThumbnailService._cache_bytes = total
\ No newline at end of file
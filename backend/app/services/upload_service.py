@@ -0,0 +1,317 @@
+import os
+import shutil
+import uuid
+import aiofiles
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, and_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import selectinload
+from fastapi import HTTPException, status
+from typing import AsyncIterator, Optional
+from app.models.user import User
+from app.models.file import File
+from app.models.upload_session import UploadSession, UploadPart
+from app.schemas.upload import UploadInit, UploadSessionResponse, UploadPartResponse
+from app.services.file_service import FileService
+from app.services.quota_service import QuotaService
+from app.services.tag_service import TagService
+from app.utils.file_utils import (
+    StreamDigest,
+    is_allowed_file,
+    generate_temp_path,
+    ensure_directory_exists,
+    get_upload_session_dir
+)
+from app.config import settings
+
+class UploadService:
+    @staticmethod
+    async def create_session(db: AsyncSession, user: User, upload_data: UploadInit) -> UploadSession:
+        if not is_allowed_file(upload_data.filename):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="File type not allowed"
+            )
+
+        if upload_data.size_bytes > settings.MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="File too large"
+            )
+
+        # Honour the requested part size within bounds, growing it when needed
+        # so that the part count never exceeds UPLOAD_MAX_PARTS.
+        part_size = max(
+            upload_data.part_size or settings.UPLOAD_PART_SIZE,
+            settings.UPLOAD_MIN_PART_SIZE,
+            -(-upload_data.size_bytes // settings.UPLOAD_MAX_PARTS)
+        )
+        part_count = -(-upload_data.size_bytes // part_size)
+
+        session = UploadSession(
+            id=str(uuid.uuid4()),
+            user_id=user.id,
+            filename=upload_data.filename,
+            title=upload_data.title,
+            tags=TagService.normalize(upload_data.tags),
+            size_bytes=upload_data.size_bytes,
+            part_size=part_size,
+            part_count=part_count,
+            status="active",
+            expires_at=UploadService._new_expiry(),
+            parts=[]
+        )
+
+        os.makedirs(get_upload_session_dir(session.id), exist_ok=True)
+
+        # The session holds the reservation until it completes, is aborted or
+        # expires
+        await QuotaService.reserve(db, user, upload_data.size_bytes)
+        db.add(session)
+        await db.commit()
+
+        return session
+
+    @staticmethod
+    async def get_session(db: AsyncSession, upload_id: str, user: User) -> UploadSession:
+        query = (
+            select(UploadSession)
+            .where(and_(UploadSession.id == upload_id, UploadSession.user_id == user.id))
+            .options(selectinload(UploadSession.parts))
+        )
+
+        result = await db.execute(query)
+        session = result.scalar_one_or_none()
+
+        if not session:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Upload session not found"
+            )
+
+        return session
+
+    @staticmethod
+    async def upload_part(
+        db: AsyncSession,
+        user: User,
+        upload_id: str,
+        part_number: int,
+        stream: AsyncIterator[bytes],
+        expected_sha256: Optional[str] = None
+    ) -> UploadPartResponse:
+        session = await UploadService._get_active_session(db, upload_id, user)
+
+        if part_number < 1 or part_number > session.part_count:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid part number"
+            )
+
+        expected_size = session.part_size
+        if part_number == session.part_count:
+            expected_size = session.size_bytes - session.part_size * (session.part_count - 1)
+
+        # Each attempt writes to its own temp file, so a retried part can race
+        # a stalled earlier attempt without corrupting the stored part.
+        part_path = os.path.join(get_upload_session_dir(session.id), str(part_number))
+        temp_path = f"{part_path}.{uuid.uuid4().hex}.part"
+        digest = StreamDigest()
+
+        try:
+            async with aiofiles.open(temp_path, 'wb') as f:
+                async for chunk in stream:
+                    digest.update(chunk)
+
+                    if digest.size > expected_size:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail="Part too large"
+                        )
+
+                    await f.write(chunk)
+
+            if digest.size != expected_size:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Part size mismatch: expected {expected_size} bytes, got {digest.size}"
+                )
+
+            if expected_sha256 and expected_sha256.lower() != digest.sha256:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Part checksum mismatch"
+                )
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        os.replace(temp_path, part_path)
+
+        upsert = (
+            insert(UploadPart)
+            .values(
+                session_id=session.id,
+                part_number=part_number,
+                size_bytes=digest.size,
+                sha256=digest.sha256
+            )
+            .on_conflict_do_update(
+                constraint="unique_session_part",
+                set_={"size_bytes": digest.size, "sha256": digest.sha256}
+            )
+        )
+        await db.execute(upsert)
+
+        # Activity keeps the session alive so slow uploads are not reaped
+        session.expires_at = UploadService._new_expiry()
+        await db.commit()
+
+        return UploadPartResponse(
+            part_number=part_number,
+            size_bytes=digest.size,
+            sha256=digest.sha256
+        )
+
+    @staticmethod
+    async def complete_session(
+        db: AsyncSession,
+        user: User,
+        upload_id: str,
+        expected_sha256: Optional[str] = None
+    ) -> File:
+        session = await UploadService._get_active_session(db, upload_id, user)
+
+        received = {part.part_number for part in session.parts}
+        missing = [n for n in range(1, session.part_count + 1) if n not in received]
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Missing parts: {missing[:20]}"
+            )
+
+        # Claim the session so two concurrent completions cannot both assemble
+        claim = await db.execute(
+            update(UploadSession)
+            .where(and_(UploadSession.id == session.id, UploadSession.status == "active"))
+            .values(status="completing", expires_at=UploadService._new_expiry())
+        )
+        await db.commit()
+        if claim.rowcount == 0:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Upload session is already being completed"
+            )
+
+        session_dir = get_upload_session_dir(session.id)
+        temp_path = generate_temp_path()
+        await ensure_directory_exists(temp_path)
+
+        try:
+            digest = StreamDigest()
+            async with aiofiles.open(temp_path, 'wb') as out:
+                for part_number in range(1, session.part_count + 1):
+                    async with aiofiles.open(os.path.join(session_dir, str(part_number)), 'rb') as part:
+                        while chunk := await part.read(settings.UPLOAD_CHUNK_SIZE):
+                            digest.update(chunk)
+                            await out.write(chunk)
+
+            if expected_sha256 and expected_sha256.lower() != digest.sha256:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="File checksum mismatch"
+                )
+
+            db_file = await FileService.register_file(
+                db, user, temp_path, digest, session.filename, session.tags, session.title
+            )
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            await db.rollback()
+            await db.execute(
+                update(UploadSession)
+                .where(UploadSession.id == session.id)
+                .values(status="active")
+            )
+            await db.commit()
+            raise
+
+        session.status = "completed"
+        await db.commit()
+        shutil.rmtree(session_dir, ignore_errors=True)
+
+        return db_file
+
+    @staticmethod
+    async def abort_session(db: AsyncSession, upload_id: str, user: User) -> bool:
+        session = await UploadService._get_active_session(db, upload_id, user)
+
+        session.status = "aborted"
+        await QuotaService.release(db, user.id, session.size_bytes)
+        await db.commit()
+
+        shutil.rmtree(get_upload_session_dir(session.id), ignore_errors=True)
+
+        return True
+
+    @staticmethod
+    async def expire_sessions(db: AsyncSession) -> int:
+        query = select(UploadSession).where(
+            and_(
+                UploadSession.status.in_(["active", "completing"]),
+                UploadSession.expires_at < datetime.now(timezone.utc)
+            )
+        )
+
+        result = await db.execute(query)
+        sessions = result.scalars().all()
+
+        for session in sessions:
+            session.status = "expired"
+            await QuotaService.release(db, session.user_id, session.size_bytes)
+            shutil.rmtree(get_upload_session_dir(session.id), ignore_errors=True)
+
+        await db.commit()
+
+        return len(sessions)
+
+    @staticmethod
+    def to_response(session: UploadSession) -> UploadSessionResponse:
+        return UploadSessionResponse(
+            upload_id=session.id,
+            filename=session.filename,
+            size_bytes=session.size_bytes,
+            part_size=session.part_size,
+            part_count=session.part_count,
+            status=session.status,
+            expires_at=session.expires_at,
+            parts=[
+                UploadPartResponse.model_validate(part)
+                for part in sorted(session.parts, key=lambda p: p.part_number)
+            ]
+        )
+
+    @staticmethod
+    async def _get_active_session(db: AsyncSession, upload_id: str, user: User) -> UploadSession:
+        session = await UploadService.get_session(db, upload_id, user)
+
+        if session.status == "completed":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Upload session already completed"
+            )
+
+        if session.status != "active" or session.expires_at < datetime.now(timezone.utc):
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Upload session is no longer active"
+            )
+
+        return session
+
+    @staticmethod
+    def _new_expiry() -> datetime:
+        return datetime.now(timezone.utc) + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
\ No newline at end of file
@@ -0,0 +1,124 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from sqlalchemy import DateTime
+from app.models.user import User
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "tensorbin:user:"
+
+# The password hash never leaves the database; nothing downstream of
+# authentication needs it
+CACHED_COLUMNS = [column for column in User.__table__.columns if column.key != "password_hash"]
+
+class UserCache:
+    """Short-TTL cache of authenticated users keyed by id.
+
+    An in-process LRU sits in front of an optional Redis tier shared by all
+    workers. Hits come back as detached User objects, so code downstream of
+    get_current_user must write to users with UPDATE statements rather than
+    attribute assignment.
+
+    invalidate() clears the local entry and the Redis entry; other
+    processes' local entries age out within USER_CACHE_TTL_SECONDS. Anything
+    that must be exact is checked by the database itself: QuotaService.reserve
+    charges storage_used with a conditional UPDATE ... RETURNING.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._redis = None
+
+    async def start(self):
+        if settings.USER_CACHE_BACKEND == "redis":
+            self._redis = aioredis.from_url(settings.REDIS_URL)
+
+    async def stop(self):
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    async def get(self, user_id: int) -> Optional[User]:
+        if settings.USER_CACHE_TTL_SECONDS <= 0:
+            return None
+
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            expires_at, snapshot = entry
+            if expires_at >= time.monotonic():
+                self._entries.move_to_end(user_id)
+                return User(**snapshot)
+            del self._entries[user_id]
+
+        if self._redis is None:
+            return None
+
+        try:
+            raw = await self._redis.get(f"{REDIS_KEY_PREFIX}{user_id}")
+        except RedisError as e:
+            logger.warning(f"User cache read failed: {e}")
+            return None
+
+        if raw is None:
+            return None
+
+        snapshot = UserCache._decode(raw)
+        self._store_local(user_id, snapshot)
+        return User(**snapshot)
+
+    async def put(self, user: User):
+        if settings.USER_CACHE_TTL_SECONDS <= 0:
+            return
+
+        snapshot = {column.key: getattr(user, column.key) for column in CACHED_COLUMNS}
+        self._store_local(user.id, snapshot)
+
+        if self._redis is None:
+            return
+
+        try:
+            await self._redis.set(
+                f"{REDIS_KEY_PREFIX}{user.id}",
+                UserCache._encode(snapshot),
+                ex=settings.USER_CACHE_TTL_SECONDS
+            )
+        except RedisError as e:
+            logger.warning(f"User cache write failed: {e}")
+
+    async def invalidate(self, user_id: int):
+        self._entries.pop(user_id, None)
+
+        if self._redis is None:
+            return
+
+        try:
+            await self._redis.delete(f"{REDIS_KEY_PREFIX}{user_id}")
+        except RedisError as e:
+            logger.warning(f"User cache invalidation failed: {e}")
+
+    def _store_local(self, user_id: int, snapshot: Dict):
+        self._entries[user_id] = (time.monotonic() + settings.USER_CACHE_TTL_SECONDS, snapshot)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > settings.USER_CACHE_SIZE:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _encode(snapshot: Dict) -> str:
+        return json.dumps(snapshot, default=lambda value: value.isoformat())
+
+    @staticmethod
+    def _decode(raw: bytes) -> Dict:
+        snapshot = json.loads(raw)
+        for column in CACHED_COLUMNS:
+            if isinstance(column.type, DateTime) and snapshot.get(column.key):
+                snapshot[column.key] = datetime.fromisoformat(snapshot[column.key])
+        return snapshot
+
+user_cache = UserCache()
\ No newline at end of file
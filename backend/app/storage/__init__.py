@@ -0,0 +1,13 @@
+from app.storage.base import StorageBackend, StoredObject, blob_key, compressed_key
+from app.storage.local import LocalStorage
+from app.config import settings
+
+def create_storage() -> StorageBackend:
+    if settings.STORAGE_BACKEND == "s3":
+        from app.storage.s3 import S3Storage
+        return S3Storage()
+    return LocalStorage(settings.UPLOAD_DIR)
+
+storage = create_storage()
+
+__all__ = ["StorageBackend", "StoredObject", "LocalStorage", "blob_key", "compressed_key", "storage"]
\ No newline at end of file
@@ -0,0 +1,120 @@
+import asyncio
+import os
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Optional
+
+def blob_key(sha256: str) -> str:
+    # Fan out by hash prefix so no single directory or listing grows unbounded
+    return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+def compressed_key(sha256: str) -> str:
+    return blob_key(sha256) + ".zst"
+
+class StorageBackend(ABC):
+    """Where blob bytes live. Keys are relative, slash-separated paths."""
+
+    @abstractmethod
+    async def put_stream(self, key: str, chunks: AsyncIterator[bytes]) -> int:
+        """Store everything ``chunks`` yields under ``key``; returns the size."""
+
+    @abstractmethod
+    async def put_file(self, key: str, path: str):
+        """Store a copy of the local file ``path`` under ``key``."""
+
+    @abstractmethod
+    def get_range(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        """Yield bytes [start, end] inclusive."""
+
+    @abstractmethod
+    async def delete(self, key: str):
+        """Remove ``key``; a missing key is not an error."""
+
+    @abstractmethod
+    async def size(self, key: str) -> Optional[int]:
+        """Size of ``key`` in bytes, or None if it does not exist."""
+
+    @abstractmethod
+    async def presign(
+        self,
+        key: str,
+        expires_seconds: int,
+        filename: Optional[str] = None,
+        media_type: Optional[str] = None
+    ) -> Optional[str]:
+        """A URL clients can download ``key`` from directly, if supported."""
+
+    @abstractmethod
+    def locate(self, key: str) -> str:
+        """Human-readable location of ``key``, recorded on blob rows."""
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path of ``key`` when the backend is a local disk."""
+        return None
+
+    async def exists(self, key: str) -> bool:
+        return await self.size(key) is not None
+
+    async def read_range(self, key: str, start: int, end: int) -> bytes:
+        return b"".join([chunk async for chunk in self.get_range(key, start, end)])
+
+    async def close(self):
+        pass
+
+class StoredObject:
+    """A blob held by a remote backend and read through ranged requests."""
+
+    def __init__(self, storage: StorageBackend, key: str, size: int):
+        self.storage = storage
+        self.key = key
+        self.size = size
+        self.loop = asyncio.get_running_loop()
+
+    def iter_range(self, start: int, end: int) -> AsyncIterator[bytes]:
+        return self.storage.get_range(self.key, start, end)
+
+    def open(self) -> "StoredObjectReader":
+        return StoredObjectReader(self)
+
+class StoredObjectReader:
+    """Blocking file object over a StoredObject for header parsers.
+
+    Reads are run on the object's event loop, so this must be used from a
+    worker thread (run_in_executor), never from the loop itself.
+    """
+
+    def __init__(self, stored: StoredObject):
+        self.stored = stored
+        self.position = 0
+
+    def seek(self, position: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            position += self.position
+        elif whence == os.SEEK_END:
+            position += self.stored.size
+        self.position = max(position, 0)
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+    def read(self, size: int = -1) -> bytes:
+        end = self.stored.size if size < 0 else min(self.position + size, self.stored.size)
+        if end <= self.position:
+            return b""
+
+        future = asyncio.run_coroutine_threadsafe(
+            self.stored.storage.read_range(self.stored.key, self.position, end - 1),
+            self.stored.loop
+        )
+        data = future.result()
+        self.position += len(data)
+        return data
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
\ No newline at end of file
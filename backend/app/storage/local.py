@@ -0,0 +1,88 @@
+import asyncio
+import os
+import shutil
+import uuid
+import aiofiles
+from typing import AsyncIterator, Optional
+from app.storage.base import StorageBackend
+from app.config import settings
+
+class LocalStorage(StorageBackend):
+    """Blobs as files under one directory, the original layout."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def local_path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def locate(self, key: str) -> str:
+        return self.local_path(key)
+
+    async def put_stream(self, key: str, chunks: AsyncIterator[bytes]) -> int:
+        path = self.local_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        size = 0
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            async with aiofiles.open(temp_path, "wb") as f:
+                async for chunk in chunks:
+                    await f.write(chunk)
+                    size += len(chunk)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        return size
+
+    async def put_file(self, key: str, path: str):
+        destination = self.local_path(key)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+
+        temp_path = f"{destination}.{uuid.uuid4().hex}.tmp"
+        try:
+            try:
+                os.link(path, temp_path)
+            except OSError:
+                # Another filesystem, or one without hard links
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, shutil.copyfile, path, temp_path)
+            os.replace(temp_path, destination)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    async def get_range(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        remaining = end - start + 1
+        async with aiofiles.open(self.local_path(key), "rb") as f:
+            await f.seek(start)
+            while remaining > 0:
+                chunk = await f.read(min(settings.UPLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    async def delete(self, key: str):
+        try:
+            os.remove(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+    async def size(self, key: str) -> Optional[int]:
+        try:
+            return os.stat(self.local_path(key)).st_size
+        except FileNotFoundError:
+            return None
+
+    async def presign(
+        self,
+        key: str,
+        expires_seconds: int,
+        filename: Optional[str] = None,
+        media_type: Optional[str] = None
+    ) -> Optional[str]:
+        # Local files are served by the API's own signed download links
+        return None
\ No newline at end of file
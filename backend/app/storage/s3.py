@@ -0,0 +1,194 @@
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+from typing import AsyncIterator, List, Optional
+import aiofiles
+from app.storage.base import StorageBackend
+from app.utils.download_utils import content_disposition
+from app.config import settings
+
+try:
+    import aioboto3
+    from aiobotocore.config import AioConfig
+    from botocore.exceptions import ClientError
+except ImportError:  # pragma: no cover - only needed with STORAGE_BACKEND=s3
+    aioboto3 = None
+
+logger = logging.getLogger(__name__)
+
+MISSING_CODES = {"404", "NoSuchKey", "NotFound"}
+
+class S3Storage(StorageBackend):
+    """Blobs as objects in an S3-compatible bucket (AWS, MinIO, moto).
+
+    One pooled client is kept per event loop. Uploads larger than a part go
+    through multipart upload, with up to STORAGE_S3_MAX_CONCURRENCY parts
+    in flight.
+    """
+
+    def __init__(self):
+        if aioboto3 is None:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires the aioboto3 package")
+
+        self.bucket = settings.STORAGE_S3_BUCKET
+        self.prefix = settings.STORAGE_S3_PREFIX.strip("/")
+        self._session = aioboto3.Session(
+            aws_access_key_id=settings.STORAGE_S3_ACCESS_KEY_ID or None,
+            aws_secret_access_key=settings.STORAGE_S3_SECRET_ACCESS_KEY or None,
+            region_name=settings.STORAGE_S3_REGION or None
+        )
+        self._config = AioConfig(max_pool_connections=settings.STORAGE_S3_MAX_POOL_CONNECTIONS)
+        self._client = None
+        self._client_loop = None
+        self._exit_stack: Optional[AsyncExitStack] = None
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def locate(self, key: str) -> str:
+        return f"s3://{self.bucket}/{self._object_key(key)}"
+
+    async def _get_client(self):
+        # aiohttp sessions are bound to the loop that created them, and
+        # Celery runs every task in a fresh loop
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            await self.close()
+            exit_stack = AsyncExitStack()
+            self._client = await exit_stack.enter_async_context(self._session.client(
+                "s3",
+                endpoint_url=settings.STORAGE_S3_ENDPOINT_URL or None,
+                config=self._config
+            ))
+            self._client_loop = loop
+            self._exit_stack = exit_stack
+        return self._client
+
+    async def close(self):
+        exit_stack = self._exit_stack
+        self._client = None
+        self._client_loop = None
+        self._exit_stack = None
+        if exit_stack is None:
+            return
+
+        try:
+            await exit_stack.aclose()
+        except Exception as e:
+            # A client left behind by a loop that has since closed cannot
+            # shut down cleanly; its sockets went with that loop
+            logger.debug(f"Could not close S3 client cleanly: {e}")
+
+    async def put_stream(self, key: str, chunks: AsyncIterator[bytes]) -> int:
+        client = await self._get_client()
+        object_key = self._object_key(key)
+        part_size = settings.STORAGE_S3_PART_SIZE
+
+        buffer = bytearray()
+        size = 0
+        upload_id = None
+        part_count = 0
+        parts: List[dict] = []
+        pending = set()
+        slots = asyncio.Semaphore(settings.STORAGE_S3_MAX_CONCURRENCY)
+
+        async def send_part(number: int, body: bytes):
+            try:
+                result = await client.upload_part(
+                    Bucket=self.bucket, Key=object_key, UploadId=upload_id,
+                    PartNumber=number, Body=body
+                )
+                parts.append({"PartNumber": number, "ETag": result["ETag"]})
+            finally:
+                slots.release()
+
+        async def queue_part(body: bytes):
+            nonlocal part_count
+            await slots.acquire()
+            # Surface a failed part now rather than after the whole stream
+            for task in [task for task in pending if task.done()]:
+                pending.discard(task)
+                task.result()
+            part_count += 1
+            pending.add(asyncio.create_task(send_part(part_count, body)))
+
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                size += len(chunk)
+                while len(buffer) >= part_size:
+                    if upload_id is None:
+                        result = await client.create_multipart_upload(Bucket=self.bucket, Key=object_key)
+                        upload_id = result["UploadId"]
+                    body = bytes(buffer[:part_size])
+                    del buffer[:part_size]
+                    await queue_part(body)
+
+            if upload_id is None:
+                await client.put_object(Bucket=self.bucket, Key=object_key, Body=bytes(buffer))
+                return size
+
+            if buffer:
+                await queue_part(bytes(buffer))
+            await asyncio.gather(*pending)
+
+            await client.complete_multipart_upload(
+                Bucket=self.bucket, Key=object_key, UploadId=upload_id,
+                MultipartUpload={"Parts": sorted(parts, key=lambda part: part["PartNumber"])}
+            )
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            if upload_id is not None:
+                await client.abort_multipart_upload(Bucket=self.bucket, Key=object_key, UploadId=upload_id)
+            raise
+
+        return size
+
+    async def put_file(self, key: str, path: str):
+        async def read_file():
+            async with aiofiles.open(path, "rb") as f:
+                while chunk := await f.read(settings.UPLOAD_CHUNK_SIZE):
+                    yield chunk
+
+        await self.put_stream(key, read_file())
+
+    async def get_range(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        client = await self._get_client()
+        response = await client.get_object(
+            Bucket=self.bucket, Key=self._object_key(key), Range=f"bytes={start}-{end}"
+        )
+        body = response["Body"]
+        async with body:
+            while chunk := await body.read(settings.UPLOAD_CHUNK_SIZE):
+                yield chunk
+
+    async def delete(self, key: str):
+        client = await self._get_client()
+        await client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+    async def size(self, key: str) -> Optional[int]:
+        client = await self._get_client()
+        try:
+            result = await client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in MISSING_CODES:
+                return None
+            raise
+        return result["ContentLength"]
+
+    async def presign(
+        self,
+        key: str,
+        expires_seconds: int,
+        filename: Optional[str] = None,
+        media_type: Optional[str] = None
+    ) -> Optional[str]:
+        params = {"Bucket": self.bucket, "Key": self._object_key(key)}
+        if filename:
+            params["ResponseContentDisposition"] = content_disposition(filename)
+        if media_type:
+            params["ResponseContentType"] = media_type
+
+        client = await self._get_client()
+        return await client.generate_presigned_url("get_object", Params=params, ExpiresIn=expires_seconds)
\ No newline at end of file
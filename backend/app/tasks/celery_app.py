@@ -15,4 +15,22 @@ celery_app.conf.update(
     timezone="UTC",
     enable_utc=True,
     result_expires=3600,
+    beat_schedule={
+        "expire-upload-sessions": {
+            "task": "app.tasks.file_tasks.expire_upload_sessions",
+            "schedule": 3600.0,
+        },
+        "reconcile-storage-usage": {
+            "task": "app.tasks.file_tasks.reconcile_storage_usage",
+            "schedule": 3600.0,
+        },
+        "collect-chunks": {
+            "task": "app.tasks.file_tasks.collect_chunks",
+            "schedule": 3600.0,
+        },
+        "sweep-orphaned-blobs": {
+            "task": "app.tasks.file_tasks.sweep_orphaned_blobs",
+            "schedule": 3600.0,
+        },
+    },
 )
\ No newline at end of file
@@ -1,34 +1,49 @@
 import os
+import asyncio
 from celery import Celery
-from PIL import Image
+from sqlalchemy import pool
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from app.tasks.celery_app import celery_app
+from app.storage import storage
 from app.config import settings
 
+def _run_with_session(func):
+    # Workers run each task in a fresh event loop, so the pooled API engine
+    # cannot be shared; use a throwaway NullPool engine per task run.
+    async def runner():
+        engine = create_async_engine(settings.DATABASE_URL, poolclass=pool.NullPool)
+        try:
+            session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+            async with session_factory() as db:
+                return await func(db)
+        finally:
+            # The storage client belongs to this loop too
+            await storage.close()
+            await engine.dispose()
+    
+    return asyncio.run(runner())
+
 @celery_app.task
-def generate_thumbnail(file_path: str, file_id: int):
+def generate_thumbnail(file_path: str, sha256: str, mime_type: str = None):
+    from app.services.thumbnail_service import ThumbnailService
+    
     try:
         if not os.path.exists(file_path):
             return {"status": "error", "message": "File not found"}
         
-        filename = os.path.basename(file_path)
-        name, ext = os.path.splitext(filename)
-        
-        if ext.lower() not in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp']:
+        if not mime_type or not mime_type.startswith('image/'):
             return {"status": "skipped", "message": "Not an image file"}
         
-        thumbnail_dir = os.path.join(os.path.dirname(file_path), "thumbnails")
-        os.makedirs(thumbnail_dir, exist_ok=True)
-        
-        thumbnail_path = os.path.join(thumbnail_dir, f"{name}_thumb{ext}")
-        
-        with Image.open(file_path) as img:
-            img.thumbnail((512, 512), Image.Resampling.LANCZOS)
-            img.save(thumbnail_path, optimize=True, quality=85)
+        # Pre-warm the cache buckets that the thumbnail endpoint serves from
+        thumbnail_paths = []
+        for bucket in settings.THUMBNAIL_BUCKETS:
+            thumbnail_path, _ = ThumbnailService.get_or_create(file_path, sha256, bucket)
+            thumbnail_paths.append(thumbnail_path)
         
         return {
             "status": "success", 
-            "thumbnail_path": thumbnail_path,
-            "file_id": file_id
+            "thumbnail_paths": thumbnail_paths,
+            "sha256": sha256
         }
         
     except Exception as e:
@@ -48,5 +63,104 @@ def analyze_file_content(file_path: str, file_id: int):
         
         return {"status": "success", "analysis": analysis_result}
         
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@celery_app.task
+def expire_upload_sessions():
+    from app.services.upload_service import UploadService
+    
+    try:
+        expired = _run_with_session(UploadService.expire_sessions)
+        return {"status": "success", "expired": expired}
+        
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@celery_app.task
+def reconcile_storage_usage():
+    from app.services.quota_service import QuotaService
+    
+    try:
+        corrected = _run_with_session(QuotaService.reconcile)
+        return {"status": "success", "corrected": corrected}
+        
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@celery_app.task
+def index_tensor_headers():
+    from app.services.blob_service import BlobService
+    
+    try:
+        indexed = _run_with_session(BlobService.index_tensor_headers)
+        return {"status": "success", "indexed": indexed}
+        
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@celery_app.task(ignore_result=True)
+def chunk_blob(sha256: str):
+    from app.services.chunk_service import ChunkService
+    
+    try:
+        moved = _run_with_session(lambda db: ChunkService.chunk_blob(db, sha256))
+        return {"status": "success" if moved else "skipped", "sha256": sha256}
+        
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@celery_app.task
+def chunk_blobs():
+    from app.services.chunk_service import ChunkService
+    
+    try:
+        moved = _run_with_session(ChunkService.chunk_blobs)
+        return {"status": "success", "chunked": moved}
+        
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@celery_app.task
+def collect_chunks():
+    from app.services.chunk_service import ChunkService
+    
+    try:
+        removed = _run_with_session(ChunkService.collect_garbage)
+        return {"status": "success", "removed": removed}
+        
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@celery_app.task
+def chunk_store_report():
+    from app.services.chunk_service import ChunkService
+    
+    try:
+        report = _run_with_session(ChunkService.savings_report)
+        return {"status": "success", "report": report}
+        
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@celery_app.task(ignore_result=True)
+def remove_orphaned_blobs(hashes: list):
+    from app.services.blob_service import BlobService
+    
+    try:
+        removed = _run_with_session(lambda db: BlobService.remove_orphans(db, hashes))
+        return {"status": "success", "removed": removed}
+        
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@celery_app.task
+def sweep_orphaned_blobs():
+    from app.services.blob_service import BlobService
+    
+    try:
+        removed = _run_with_session(BlobService.sweep_orphans)
+        return {"status": "success", "removed": removed}
+        
     except Exception as e:
         return {"status": "error", "message": str(e)}
\ No newline at end of file
@@ -1,11 +1,22 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from typing import Optional, Tuple, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 from app.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+# bcrypt releases the GIL, so a few dedicated threads hash in parallel while
+# the event loop keeps serving other requests. Work beyond the queue limit is
+# shed with a 503 instead of piling up behind a login burst.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+_hash_stats = {"in_flight": 0, "rejected": 0}
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -13,6 +24,39 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+async def hash_password(password: str) -> str:
+    return await _run_password_job(pwd_context.hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify off the event loop. The second value is a replacement hash
+    when the stored one was made with outdated cost parameters."""
+    return await _run_password_job(pwd_context.verify_and_update, plain_password, hashed_password)
+
+def password_hash_stats() -> dict:
+    in_flight = _hash_stats["in_flight"]
+    return {
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "in_flight": in_flight,
+        "queued": max(in_flight - settings.PASSWORD_HASH_WORKERS, 0),
+        "rejected": _hash_stats["rejected"]
+    }
+
+async def _run_password_job(func, *args):
+    if _hash_stats["in_flight"] >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE:
+        _hash_stats["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent authentication requests",
+            headers={"Retry-After": "1"}
+        )
+
+    _hash_stats["in_flight"] += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_stats["in_flight"] -= 1
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -35,6 +79,31 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def create_download_token(data: dict, expires_delta: Optional[timedelta] = None):
+    # Carries everything needed to serve the file so that verifying a link
+    # is a pure HMAC check with no database round trip.
+    to_encode = data.copy()
+    if expires_delta:
+        expire = datetime.utcnow() + expires_delta
+    else:
+        expire = datetime.utcnow() + timedelta(minutes=settings.DOWNLOAD_URL_EXPIRE_MINUTES)
+    
+    to_encode.update({"exp": expire, "type": "download"})
+    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return encoded_jwt
+
+def create_claim_token(data: dict, expires_delta: Optional[timedelta] = None):
+    # Binds a possession challenge to one user, blob and set of ranges
+    to_encode = data.copy()
+    if expires_delta:
+        expire = datetime.utcnow() + expires_delta
+    else:
+        expire = datetime.utcnow() + timedelta(minutes=settings.CLAIM_CHALLENGE_EXPIRE_MINUTES)
+    
+    to_encode.update({"exp": expire, "type": "claim"})
+    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return encoded_jwt
+
 def verify_token(token: str, token_type: str = "access") -> Optional[dict]:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
@@ -0,0 +1,168 @@
+import bisect
+import hashlib
+import os
+import aiofiles
+import numpy
+from typing import AsyncIterator, BinaryIO, Iterator, List, Tuple, Union
+from app.storage.base import StoredObject
+from app.utils.compression_utils import CompressedBlob
+from app.config import settings
+
+# Fixed per-byte values for the gear hash. They are derived rather than
+# random so every process cuts the same content at the same boundaries.
+GEAR = tuple(
+    int.from_bytes(hashlib.sha256(bytes([value])).digest()[:8], "little")
+    for value in range(256)
+)
+GEAR_ARRAY = numpy.array(GEAR, dtype=numpy.uint64)
+# Bytes a fingerprint depends on: each step shifts the oldest one further out
+GEAR_WINDOW = 64
+# Fingerprints computed per step while looking for a cut; small enough to
+# stay in cache and not to hash far past a boundary
+HASH_BLOCK_SIZE = 32768
+
+def chunk_limits(average_size: int) -> Tuple[int, int, int]:
+    return average_size // 4, average_size, average_size * 4
+
+def _cut_mask(average_size: int) -> int:
+    # Test the high bits: after 64 shifts they depend on the whole window
+    bits = max(average_size.bit_length() - 1, 1)
+    return ((1 << bits) - 1) << (64 - bits)
+
+def _find_cut(data: bytes, min_size: int, limit: int, mask: int) -> int:
+    # The fingerprint at i is the sum of GEAR[data[i - k]] << k over the 64
+    # bytes up to i, modulo 2**64; older bytes are shifted out. Summing
+    # shifted copies of the looked-up values gives it for a whole block at
+    # once. Bytes before min_size are never a boundary and are not hashed.
+    mask = numpy.uint64(mask)
+    start = min_size
+    while start < limit:
+        end = min(start + HASH_BLOCK_SIZE, limit)
+        first = max(start - (GEAR_WINDOW - 1), min_size)
+        fingerprints = GEAR_ARRAY[numpy.frombuffer(data, dtype=numpy.uint8, count=end - first, offset=first)]
+        shift = 1
+        while shift < GEAR_WINDOW:
+            fingerprints[shift:] += fingerprints[:-shift] << numpy.uint64(shift)
+            shift *= 2
+
+        cuts = numpy.flatnonzero((fingerprints[start - first:] & mask) == 0)
+        if cuts.size:
+            return start + int(cuts[0]) + 1
+        start = end
+    return limit
+
+def iter_chunks(f: BinaryIO, average_size: int) -> Iterator[bytes]:
+    """Split a stream with a gear-hash content-defined chunker.
+
+    Boundaries depend only on nearby bytes, so an insertion or edit shifts
+    the chunks around it and leaves the rest of the file's chunks as they
+    were. Chunk sizes stay between a quarter of and four times the average.
+    """
+    min_size, _, max_size = chunk_limits(average_size)
+    mask = _cut_mask(average_size)
+
+    buffer = b""
+    eof = False
+    while True:
+        while not eof and len(buffer) < max_size:
+            block = f.read(max_size)
+            if not block:
+                eof = True
+            buffer += block
+
+        if not buffer:
+            return
+
+        cut = _find_cut(buffer, min_size, min(max_size, len(buffer)), mask)
+        yield buffer[:cut]
+        buffer = buffer[cut:]
+
+def get_chunk_path(sha256: str) -> str:
+    return os.path.join(settings.UPLOAD_DIR, "chunks", sha256[:2], sha256[2:4], sha256)
+
+class ChunkedBlob:
+    """A blob stored as consecutive chunk files, read as one byte sequence."""
+
+    def __init__(self, chunks: List[Tuple[int, int, str]]):
+        # (offset within the blob, size, chunk path), in order
+        self.chunks = chunks
+        self.offsets = [offset for offset, _, _ in chunks]
+        self.size = chunks[-1][0] + chunks[-1][1] if chunks else 0
+
+    def _locate(self, position: int) -> int:
+        return bisect.bisect_right(self.offsets, position) - 1
+
+    async def iter_range(self, start: int, end: int) -> AsyncIterator[bytes]:
+        """Yield bytes [start, end] inclusive."""
+        index = self._locate(start)
+        while index < len(self.chunks) and start <= end:
+            offset, size, path = self.chunks[index]
+            stop = min(end, offset + size - 1)
+            remaining = stop - start + 1
+            async with aiofiles.open(path, "rb") as f:
+                await f.seek(start - offset)
+                while remaining > 0:
+                    data = await f.read(min(settings.UPLOAD_CHUNK_SIZE, remaining))
+                    if not data:
+                        raise IOError(f"Chunk {path} is shorter than recorded")
+                    remaining -= len(data)
+                    yield data
+            start = stop + 1
+            index += 1
+
+    def open(self) -> "ChunkedReader":
+        return ChunkedReader(self)
+
+class ChunkedReader:
+    """Minimal blocking file object over a ChunkedBlob, for header parsers."""
+
+    def __init__(self, blob: ChunkedBlob):
+        self.blob = blob
+        self.position = 0
+
+    def seek(self, position: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            position += self.position
+        elif whence == os.SEEK_END:
+            position += self.blob.size
+        self.position = max(position, 0)
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+    def read(self, size: int = -1) -> bytes:
+        end = self.blob.size if size < 0 else min(self.position + size, self.blob.size)
+        parts = []
+        index = self.blob._locate(self.position)
+        while self.position < end:
+            offset, chunk_size, path = self.blob.chunks[index]
+            wanted = min(end, offset + chunk_size) - self.position
+            with open(path, "rb") as f:
+                f.seek(self.position - offset)
+                data = f.read(wanted)
+            if len(data) != wanted:
+                raise IOError(f"Chunk {path} is shorter than recorded")
+            parts.append(data)
+            self.position += len(data)
+            index += 1
+        return b"".join(parts)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Where a blob's bytes live: a plain file path, its chunks, an object in
+# remote storage, or seekable zstd frames in either of those
+BlobSource = Union[str, ChunkedBlob, StoredObject, CompressedBlob]
+
+def open_source(source: BlobSource) -> Tuple[BinaryIO, int]:
+    if not isinstance(source, str):
+        return source.open(), source.size
+    size = os.stat(source).st_size
+    return open(source, "rb"), size
\ No newline at end of file
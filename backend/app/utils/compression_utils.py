@@ -0,0 +1,212 @@
+import bisect
+import os
+import struct
+import aiofiles
+import zstandard
+from typing import AsyncIterator, BinaryIO, List, Optional, Tuple, Union
+from app.storage.base import StoredObject
+from app.config import settings
+
+# Seek table of the zstd seekable format: a skippable frame that decoders
+# ignore, so the stored object stays one valid zstd stream
+SKIPPABLE_MAGIC = 0x184D2A5E
+SEEKABLE_MAGIC = 0x8F92EAB1
+SKIPPABLE_HEADER = struct.Struct("<II")
+SEEK_ENTRY = struct.Struct("<II")
+SEEK_FOOTER = struct.Struct("<IBI")
+CHECKSUM_FLAG = 0x80
+
+# Media types that are already compressed are not worth sampling
+PRECOMPRESSED_PREFIXES = ("image/", "video/", "audio/")
+PRECOMPRESSED_TYPES = {
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/x-bzip2",
+    "application/x-xz",
+    "application/x-7z-compressed",
+    "application/x-rar",
+    "application/zstd",
+    "application/pdf"
+}
+
+class InvalidSeekTable(ValueError):
+    pass
+
+def compressible(size_bytes: int, mime_type: Optional[str]) -> bool:
+    mime_type = mime_type or ""
+    return (
+        settings.COMPRESSION_ENABLED
+        and size_bytes >= settings.COMPRESSION_MIN_SIZE
+        and not mime_type.startswith(PRECOMPRESSED_PREFIXES)
+        and mime_type not in PRECOMPRESSED_TYPES
+    )
+
+def sample_ratio(path: str) -> float:
+    """Compression ratio of the first COMPRESSION_SAMPLE_SIZE bytes."""
+    with open(path, "rb") as f:
+        sample = f.read(settings.COMPRESSION_SAMPLE_SIZE)
+    if not sample:
+        return 1.0
+    compressed = zstandard.ZstdCompressor(level=settings.COMPRESSION_LEVEL).compress(sample)
+    return len(sample) / len(compressed)
+
+def compress_file(source_path: str, dest_path: str) -> int:
+    """Write ``source_path`` to ``dest_path`` as independent zstd frames of
+    COMPRESSION_FRAME_SIZE bytes followed by a seek table, so any byte range
+    can be served by decompressing only the frames that cover it. Returns
+    the compressed size."""
+    compressor = zstandard.ZstdCompressor(level=settings.COMPRESSION_LEVEL)
+    entries = []
+    with open(source_path, "rb") as src, open(dest_path, "wb") as dest:
+        while data := src.read(settings.COMPRESSION_FRAME_SIZE):
+            frame = compressor.compress(data)
+            dest.write(frame)
+            entries.append(SEEK_ENTRY.pack(len(frame), len(data)))
+
+        footer = SEEK_FOOTER.pack(len(entries), 0, SEEKABLE_MAGIC)
+        table = b"".join(entries) + footer
+        dest.write(SKIPPABLE_HEADER.pack(SKIPPABLE_MAGIC, len(table)))
+        dest.write(table)
+        return dest.tell()
+
+def _table_layout(tail: bytes) -> Tuple[int, int]:
+    # (frame count, entry size) from the footer at the end of ``tail``
+    if len(tail) < SEEK_FOOTER.size:
+        raise InvalidSeekTable("Object too short for a seek table")
+
+    count, descriptor, magic = SEEK_FOOTER.unpack_from(tail, len(tail) - SEEK_FOOTER.size)
+    if magic != SEEKABLE_MAGIC:
+        raise InvalidSeekTable("Missing seekable magic number")
+
+    return count, SEEK_ENTRY.size + (4 if descriptor & CHECKSUM_FLAG else 0)
+
+def seek_table_length(tail: bytes) -> int:
+    """Bytes the whole seek table needs, given at least its footer."""
+    count, entry_size = _table_layout(tail)
+    return count * entry_size + SEEK_FOOTER.size
+
+def parse_seek_table(tail: bytes, stored_size: int) -> List[Tuple[int, int, int, int]]:
+    """Frames as (compressed offset, compressed size, offset, size) from the
+    bytes at the end of a seekable object, which must hold the whole table."""
+    count, entry_size = _table_layout(tail)
+    table_size = count * entry_size + SEEK_FOOTER.size
+    start = len(tail) - table_size
+    if start < 0:
+        raise InvalidSeekTable("Seek table is larger than the bytes read")
+
+    frames = []
+    stored_offset = 0
+    offset = 0
+    for position in range(start, start + count * entry_size, entry_size):
+        stored, size = SEEK_ENTRY.unpack_from(tail, position)
+        frames.append((stored_offset, stored, offset, size))
+        stored_offset += stored
+        offset += size
+
+    if stored_offset + SKIPPABLE_HEADER.size + table_size != stored_size:
+        raise InvalidSeekTable("Seek table does not match the object size")
+    return frames
+
+# Where the compressed bytes themselves live
+StoredSource = Union[str, StoredObject]
+
+async def _read_stored(stored: StoredSource, start: int, length: int) -> bytes:
+    if isinstance(stored, str):
+        async with aiofiles.open(stored, "rb") as f:
+            await f.seek(start)
+            data = await f.read(length)
+    else:
+        data = await stored.storage.read_range(stored.key, start, start + length - 1)
+    if len(data) != length:
+        raise IOError("Compressed blob is shorter than its seek table says")
+    return data
+
+def _stored_size(stored: StoredSource) -> int:
+    return os.stat(stored).st_size if isinstance(stored, str) else stored.size
+
+async def load_compressed(stored: StoredSource) -> "CompressedBlob":
+    stored_size = _stored_size(stored)
+    if stored_size < SEEK_FOOTER.size:
+        raise InvalidSeekTable("Object too short for a seek table")
+    tail = await _read_stored(stored, stored_size - SEEK_FOOTER.size, SEEK_FOOTER.size)
+    length = seek_table_length(tail)
+    if length > stored_size:
+        raise InvalidSeekTable("Seek table is larger than the object")
+    if length > SEEK_FOOTER.size:
+        tail = await _read_stored(stored, stored_size - length, length)
+    return CompressedBlob(stored, stored_size, parse_seek_table(tail, stored_size))
+
+class CompressedBlob:
+    """A blob stored as seekable zstd frames, read as its original bytes."""
+
+    def __init__(self, stored: StoredSource, stored_size: int, frames: List[Tuple[int, int, int, int]]):
+        self.stored = stored
+        self.stored_size = stored_size
+        self.frames = frames
+        self.offsets = [offset for _, _, offset, _ in frames]
+        self.size = frames[-1][2] + frames[-1][3] if frames else 0
+
+    def _locate(self, position: int) -> int:
+        return bisect.bisect_right(self.offsets, position) - 1
+
+    async def iter_range(self, start: int, end: int) -> AsyncIterator[bytes]:
+        """Yield bytes [start, end] inclusive of the original content."""
+        decompressor = zstandard.ZstdDecompressor()
+        index = self._locate(start)
+        while index < len(self.frames) and start <= end:
+            stored_offset, stored_size, offset, size = self.frames[index]
+            frame = await _read_stored(self.stored, stored_offset, stored_size)
+            data = decompressor.decompress(frame, max_output_size=size)
+            yield data[start - offset:min(end, offset + size - 1) - offset + 1]
+            start = offset + size
+            index += 1
+
+    def open(self) -> "CompressedReader":
+        return CompressedReader(self)
+
+class CompressedReader:
+    """Minimal blocking file object over a CompressedBlob, for header parsers."""
+
+    def __init__(self, blob: CompressedBlob):
+        self.blob = blob
+        self.position = 0
+        self.decompressor = zstandard.ZstdDecompressor()
+        self.stored: BinaryIO = open(blob.stored, "rb") if isinstance(blob.stored, str) else blob.stored.open()
+
+    def seek(self, position: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            position += self.position
+        elif whence == os.SEEK_END:
+            position += self.blob.size
+        self.position = max(position, 0)
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+    def read(self, size: int = -1) -> bytes:
+        end = self.blob.size if size < 0 else min(self.position + size, self.blob.size)
+        parts = []
+        index = self.blob._locate(self.position)
+        while self.position < end:
+            stored_offset, stored_size, offset, frame_size = self.blob.frames[index]
+            self.stored.seek(stored_offset)
+            frame = self.stored.read(stored_size)
+            if len(frame) != stored_size:
+                raise IOError("Compressed blob is shorter than its seek table says")
+            data = self.decompressor.decompress(frame, max_output_size=frame_size)
+            wanted = min(end, offset + frame_size) - self.position
+            parts.append(data[self.position - offset:self.position - offset + wanted])
+            self.position += wanted
+            index += 1
+        return b"".join(parts)
+
+    def close(self):
+        self.stored.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
\ No newline at end of file
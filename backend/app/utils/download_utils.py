@@ -0,0 +1,361 @@
+import os
+import uuid
+import aiofiles
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional, Tuple
+from urllib.parse import quote
+from fastapi import Request
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
+from app.config import settings
+from app.storage.base import StoredObject
+from app.utils.chunk_utils import BlobSource
+from app.utils.compression_utils import CompressedBlob
+
+MAX_RANGES = 16
+
+OFFLOAD_HEADERS = {
+    "x-accel-redirect": "X-Accel-Redirect",
+    "x-sendfile": "X-Sendfile"
+}
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+def parse_range_header(header: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """Parse a ``bytes=`` Range header into sorted, merged inclusive ranges.
+
+    Returns None when the header should be ignored and the full body served,
+    and raises RangeNotSatisfiable when no requested range overlaps the file.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+
+    if size == 0:
+        raise RangeNotSatisfiable()
+
+    ranges = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+
+        start_str, sep, end_str = part.partition("-")
+        if not sep:
+            return None
+
+        try:
+            if start_str == "":
+                # Suffix range: the last N bytes
+                length = int(end_str)
+                if length <= 0:
+                    continue
+                start, end = max(size - length, 0), size - 1
+            else:
+                start = int(start_str)
+                end = int(end_str) if end_str else size - 1
+                if start > end and end_str:
+                    return None
+                if start >= size:
+                    continue
+                end = min(end, size - 1)
+        except ValueError:
+            return None
+
+        ranges.append((start, end))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+
+    if len(merged) > MAX_RANGES:
+        return None
+
+    return merged
+
+def etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def accepts_encoding(header: str, coding: str) -> bool:
+    """Whether an Accept-Encoding header allows ``coding``. An explicit
+    entry wins over ``*``, which covers every coding not listed."""
+    weights = {}
+    for item in header.split(","):
+        name, *params = item.split(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+
+    weight = weights.get(coding, weights.get("*", 0.0))
+    return weight > 0
+
+def content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+async def iter_file_range(path: str, start: int, end: int) -> AsyncIterator[bytes]:
+    remaining = end - start + 1
+    async with aiofiles.open(path, "rb") as f:
+        await f.seek(start)
+        while remaining > 0:
+            chunk = await f.read(min(settings.UPLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def iter_source_range(source: BlobSource, start: int, end: int) -> AsyncIterator[bytes]:
+    if not isinstance(source, str):
+        return source.iter_range(start, end)
+    return iter_file_range(source, start, end)
+
+def source_size(source: BlobSource) -> int:
+    if not isinstance(source, str):
+        return source.size
+    return os.stat(source).st_size
+
+@asynccontextmanager
+async def local_copy(source: BlobSource, temp_path: str) -> AsyncIterator[str]:
+    """A filesystem path holding the source's bytes, for libraries that
+    need one. Plain files are used in place; anything else is copied to
+    ``temp_path`` and removed afterwards."""
+    if isinstance(source, str):
+        yield source
+        return
+
+    os.makedirs(os.path.dirname(temp_path), exist_ok=True)
+    try:
+        async with aiofiles.open(temp_path, "wb") as f:
+            async for chunk in source.iter_range(0, source.size - 1):
+                await f.write(chunk)
+        yield temp_path
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def range_response(
+    path: BlobSource,
+    start: int,
+    end: int,
+    status_code: int = 200,
+    headers: Optional[dict] = None,
+    media_type: Optional[str] = None
+) -> StreamingResponse:
+    """Stream bytes [start, end] of a stored blob."""
+    headers = dict(headers or {})
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        iter_source_range(path, start, end),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers
+    )
+
+async def iter_segments(
+    path: BlobSource,
+    prefix: bytes,
+    ranges: List[Tuple[int, int]]
+) -> AsyncIterator[bytes]:
+    """A prefix from memory followed by byte ranges of one blob."""
+    yield prefix
+    for start, end in ranges:
+        async for chunk in iter_source_range(path, start, end):
+            yield chunk
+
+def segments_length(prefix: bytes, ranges: List[Tuple[int, int]]) -> int:
+    return len(prefix) + sum(end - start + 1 for start, end in ranges)
+
+def offload_response(path: str, headers: dict, media_type: str) -> Response:
+    """Hand the transfer to the front proxy via an internal-redirect header.
+
+    The proxy applies Range and streams from disk itself, so the API only
+    does auth and accounting.
+    """
+    header = OFFLOAD_HEADERS[settings.DOWNLOAD_OFFLOAD]
+    if settings.DOWNLOAD_OFFLOAD == "x-sendfile":
+        target = os.path.abspath(path)
+    else:
+        relative = os.path.relpath(path, settings.UPLOAD_DIR).replace(os.sep, "/")
+        target = settings.DOWNLOAD_OFFLOAD_PREFIX.rstrip("/") + "/" + quote(relative)
+
+    return Response(media_type=media_type, headers={**headers, header: target})
+
+async def presigned_redirect(
+    request: Request,
+    source: BlobSource,
+    etag: str,
+    media_type: str,
+    filename: str
+) -> Optional[Response]:
+    """Send the client straight to the object store when it can serve the
+    bytes, so the API does auth and accounting only. The store applies
+    Range itself. Returns None when the download must be served here."""
+    if not isinstance(source, StoredObject) or not settings.STORAGE_S3_PRESIGN_DOWNLOADS:
+        return None
+
+    # Conditional requests are cheaper to answer here than to redirect
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return None
+
+    url = await source.storage.presign(
+        source.key,
+        settings.STORAGE_S3_PRESIGN_EXPIRE_SECONDS,
+        filename=filename,
+        media_type=media_type
+    )
+    if url is None:
+        return None
+
+    return RedirectResponse(url, status_code=307, headers={"ETag": etag, "Cache-Control": "no-store"})
+
+async def iter_multipart_ranges(
+    path: BlobSource,
+    ranges: List[Tuple[int, int]],
+    size: int,
+    media_type: str,
+    boundary: str
+) -> AsyncIterator[bytes]:
+    for start, end in ranges:
+        yield (
+            f"--{boundary}\r\n"
+            f"Content-Type: {media_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+        ).encode()
+        async for chunk in iter_source_range(path, start, end):
+            yield chunk
+        yield b"\r\n"
+    yield f"--{boundary}--\r\n".encode()
+
+def multipart_length(ranges: List[Tuple[int, int]], size: int, media_type: str, boundary: str) -> int:
+    length = len(f"--{boundary}--\r\n")
+    for start, end in ranges:
+        length += len(
+            f"--{boundary}\r\n"
+            f"Content-Type: {media_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+        )
+        length += end - start + 1 + 2
+    return length
+
+def build_download_response(
+    request: Request,
+    path: BlobSource,
+    etag: str,
+    media_type: str,
+    filename: str
+) -> Response:
+    """Serve a stored file honouring If-None-Match, If-Range and Range.
+
+    Compressed blobs go out as stored, with Content-Encoding: zstd, to
+    clients that accept it and want the whole file. Range requests and
+    other clients get the decompressed bytes.
+    """
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": content_disposition(filename)
+    }
+
+    encoded = False
+    if isinstance(path, CompressedBlob):
+        # Caches must keep the two encodings apart
+        headers["Vary"] = "Accept-Encoding"
+        if not request.headers.get("range") and accepts_encoding(request.headers.get("accept-encoding", ""), "zstd"):
+            # The seek table is a skippable frame, so the stored object
+            # decodes as one zstd stream
+            encoded = True
+            etag = etag[:-1] + '-zstd"'
+            headers["Content-Encoding"] = "zstd"
+            path = path.stored
+
+    size = source_size(path)
+    headers["ETag"] = etag
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        not_modified = {"ETag": etag}
+        if "Vary" in headers:
+            not_modified["Vary"] = headers["Vary"]
+        return Response(status_code=304, headers=not_modified)
+
+    # The proxy can only serve whole files, so chunked blobs stay here, and
+    # it would not label an encoded body as such
+    if settings.DOWNLOAD_OFFLOAD in OFFLOAD_HEADERS and isinstance(path, str) and not encoded:
+        return offload_response(path, headers, media_type)
+
+    ranges = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            ranges = parse_range_header(range_header, size)
+        except RangeNotSatisfiable:
+            return Response(
+                status_code=416,
+                headers={"Content-Range": f"bytes */{size}", "ETag": etag}
+            )
+
+    if not ranges:
+        if isinstance(path, str):
+            return FileResponse(path=path, media_type=media_type, headers=headers)
+        return range_response(path, 0, size - 1, headers=headers, media_type=media_type)
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return range_response(
+            path, start, end, status_code=206, headers=headers, media_type=media_type
+        )
+
+    boundary = uuid.uuid4().hex
+    headers["Content-Length"] = str(multipart_length(ranges, size, media_type, boundary))
+    return StreamingResponse(
+        iter_multipart_ranges(path, ranges, size, media_type, boundary),
+        status_code=206,
+        media_type=f"multipart/byteranges; boundary={boundary}",
+        headers=headers
+    )
+
+def is_new_download(request: Request, response: Response) -> bool:
+    """Whether a download response starts a transfer, rather than resuming
+    one or answering a conditional request."""
+    if response.status_code == 206:
+        return response.headers.get("content-range", "").startswith("bytes 0-")
+
+    if response.status_code == 307:
+        offloaded = True
+    elif response.status_code == 200:
+        offloaded = settings.DOWNLOAD_OFFLOAD in OFFLOAD_HEADERS
+    else:
+        return False
+
+    if offloaded:
+        # The proxy or object store applies Range itself, so judge by what
+        # was asked for
+        range_header = request.headers.get("range", "").replace(" ", "")
+        return not range_header or range_header.startswith("bytes=0-")
+
+    return True
\ No newline at end of file
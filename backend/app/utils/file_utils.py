@@ -6,6 +6,30 @@ from pathlib import Path
 from typing import Optional
 from app.config import settings
 
+MIME_SNIFF_BYTES = 65536
+
+class StreamDigest:
+    """Tracks size, SHA-256 and the leading bytes of a stream as it is written."""
+
+    def __init__(self):
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+        self._head = bytearray()
+
+    def update(self, chunk: bytes):
+        self.size += len(chunk)
+        self._sha256.update(chunk)
+        if len(self._head) < MIME_SNIFF_BYTES:
+            self._head.extend(chunk[:MIME_SNIFF_BYTES - len(self._head)])
+
+    @property
+    def sha256(self) -> str:
+        return self._sha256.hexdigest()
+
+    @property
+    def mime_type(self) -> Optional[str]:
+        return get_mime_type_from_buffer(bytes(self._head))
+
 async def calculate_sha256(file_path: str) -> str:
     sha256_hash = hashlib.sha256()
     async with aiofiles.open(file_path, "rb") as f:
@@ -19,6 +43,12 @@ def get_mime_type(file_path: str) -> Optional[str]:
     except:
         return None
 
+def get_mime_type_from_buffer(buffer: bytes) -> Optional[str]:
+    try:
+        return magic.from_buffer(buffer, mime=True)
+    except:
+        return None
+
 def is_allowed_file(filename: str) -> bool:
     if not filename:
         return False
@@ -26,21 +56,14 @@ def is_allowed_file(filename: str) -> bool:
     file_ext = Path(filename).suffix.lower()
     return file_ext in settings.ALLOWED_EXTENSIONS
 
-def generate_file_path(user_id: int, filename: str) -> str:
-    from datetime import datetime
-    
-    now = datetime.now()
-    year_month = now.strftime("%Y/%m")
-    
-    safe_filename = "".join(c for c in filename if c.isalnum() or c in "._-").rstrip()
-    if not safe_filename:
-        safe_filename = "file"
-    
-    timestamp = now.strftime("%Y%m%d_%H%M%S")
-    unique_filename = f"{timestamp}_{safe_filename}"
-    
-    return os.path.join(settings.UPLOAD_DIR, str(user_id), year_month, unique_filename)
-
 async def ensure_directory_exists(file_path: str):
     directory = os.path.dirname(file_path)
-    os.makedirs(directory, exist_ok=True)
\ No newline at end of file
+    os.makedirs(directory, exist_ok=True)
+
+def get_upload_session_dir(upload_id: str) -> str:
+    return os.path.join(settings.UPLOAD_DIR, ".sessions", upload_id)
+
+def generate_temp_path() -> str:
+    import uuid
+    
+    return os.path.join(settings.UPLOAD_DIR, ".tmp", f"{uuid.uuid4().hex}.part")
\ No newline at end of file
@@ -0,0 +1,28 @@
+import hashlib
+import secrets
+from typing import List, Tuple
+from app.config import settings
+from app.utils.chunk_utils import BlobSource
+
+def pick_ranges(size_bytes: int) -> List[Tuple[int, int]]:
+    """Random inclusive byte ranges a client must hash to prove it holds
+    a blob of this size. Small blobs are challenged in full."""
+    count = settings.CLAIM_PROOF_RANGES
+    length = settings.CLAIM_PROOF_RANGE_BYTES
+    if size_bytes == 0:
+        return []
+    if size_bytes <= count * length:
+        return [(0, size_bytes - 1)]
+
+    starts = sorted(secrets.randbelow(size_bytes - length + 1) for _ in range(count))
+    return [(start, start + length - 1) for start in starts]
+
+async def prove(source: BlobSource, ranges: List[Tuple[int, int]]) -> str:
+    """SHA-256 over the challenged ranges, concatenated in order."""
+    from app.utils.download_utils import iter_source_range
+
+    digest = hashlib.sha256()
+    for start, end in ranges:
+        async for chunk in iter_source_range(source, start, end):
+            digest.update(chunk)
+    return digest.hexdigest()
\ No newline at end of file
@@ -0,0 +1,180 @@
+import json
+import math
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import settings
+from app.utils.chunk_utils import BlobSource, open_source
+
+# Layout: an 8-byte little-endian header length, that many bytes of JSON,
+# then the raw tensor data the header's data_offsets point into.
+HEADER_PREFIX = struct.Struct("<Q")
+
+# Bits per element of every dtype the format defines
+DTYPE_BITS = {
+    "BOOL": 8,
+    "U8": 8,
+    "I8": 8,
+    "F8_E5M2": 8,
+    "F8_E4M3": 8,
+    "F8_E8M0": 8,
+    "I16": 16,
+    "U16": 16,
+    "F16": 16,
+    "BF16": 16,
+    "I32": 32,
+    "U32": 32,
+    "F32": 32,
+    "C64": 64,
+    "F64": 64,
+    "I64": 64,
+    "U64": 64,
+    "F4": 4,
+    "F6_E2M3": 6,
+    "F6_E3M2": 6
+}
+
+class InvalidTensorHeader(ValueError):
+    pass
+
+def read_safetensors_header(source: BlobSource) -> Optional[Tuple[Dict[str, Any], int]]:
+    """Read and validate the JSON header of a safetensors file.
+
+    Only the leading bytes are read; tensor data is never touched. Returns
+    the header and the offset its data section starts at, or None when the
+    file does not look like safetensors at all. Raises InvalidTensorHeader
+    when it does but the header is malformed.
+    """
+    f, size = open_source(source)
+    with f:
+        prefix = f.read(HEADER_PREFIX.size + 1)
+        if len(prefix) < HEADER_PREFIX.size + 1 or prefix[-1:] != b"{":
+            return None
+
+        (header_size,) = HEADER_PREFIX.unpack(prefix[:HEADER_PREFIX.size])
+        if header_size > settings.SAFETENSORS_MAX_HEADER_BYTES or HEADER_PREFIX.size + header_size > size:
+            return None
+
+        f.seek(HEADER_PREFIX.size)
+        raw = f.read(header_size)
+
+    try:
+        header = json.loads(raw)
+    except (UnicodeDecodeError, ValueError):
+        raise InvalidTensorHeader("Header is not valid JSON")
+
+    if not isinstance(header, dict):
+        raise InvalidTensorHeader("Header is not a JSON object")
+
+    data_start = HEADER_PREFIX.size + header_size
+    data_size = size - data_start
+    for name, entry in header.items():
+        if name == "__metadata__":
+            continue
+        _check_entry(name, entry, data_size)
+
+    return header, data_start
+
+def _is_int(value: Any) -> bool:
+    # JSON true/false decode to bool, which is an int subclass
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _check_entry(name: str, entry: Any, data_size: int):
+    if not isinstance(entry, dict):
+        raise InvalidTensorHeader(f"Tensor {name!r} is not an object")
+
+    dtype = entry.get("dtype")
+    shape = entry.get("shape")
+    offsets = entry.get("data_offsets")
+    if not isinstance(dtype, str) or dtype not in DTYPE_BITS:
+        raise InvalidTensorHeader(f"Tensor {name!r} has an unknown dtype")
+    if not isinstance(shape, list) or not all(_is_int(dim) and dim >= 0 for dim in shape):
+        raise InvalidTensorHeader(f"Tensor {name!r} has an invalid shape")
+    if (
+        not isinstance(offsets, list)
+        or len(offsets) != 2
+        or not all(_is_int(offset) for offset in offsets)
+        or not 0 <= offsets[0] <= offsets[1] <= data_size
+    ):
+        raise InvalidTensorHeader(f"Tensor {name!r} has invalid data offsets")
+    # Also bounds the element count by the file size, so a huge shape
+    # cannot overflow parameter_count
+    if math.prod(shape) * DTYPE_BITS[dtype] != (offsets[1] - offsets[0]) * 8:
+        raise InvalidTensorHeader(f"Tensor {name!r} does not fill its data offsets")
+
+def _string_metadata(metadata: Any) -> Optional[Dict[str, str]]:
+    # The format only allows string values; readers such as the reference
+    # implementation reject anything else
+    if not isinstance(metadata, dict):
+        return None
+    return {
+        str(key): value if isinstance(value, str) else json.dumps(value)
+        for key, value in metadata.items()
+    }
+
+def summarize_header(header: Dict[str, Any]) -> Dict[str, Any]:
+    """Blob column values describing a parsed header."""
+    tensors = {name: entry for name, entry in header.items() if name != "__metadata__"}
+
+    # Coerced to strings so containment filters behave predictably
+    metadata = _string_metadata(header.get("__metadata__"))
+
+    return {
+        "tensor_count": len(tensors),
+        "parameter_count": sum(math.prod(entry["shape"]) for entry in tensors.values()),
+        "tensor_dtypes": sorted({entry["dtype"] for entry in tensors.values()}),
+        "tensor_metadata": metadata
+    }
+
+def index_tensor_header(source: BlobSource) -> Optional[Dict[str, Any]]:
+    """Summary columns for a stored blob, or None if it has no tensor header."""
+    try:
+        parsed = read_safetensors_header(source)
+    except (OSError, InvalidTensorHeader):
+        return None
+
+    if parsed is None:
+        return None
+
+    return summarize_header(parsed[0])
+
+def build_subset(
+    header: Dict[str, Any],
+    data_start: int,
+    names: List[str]
+) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """Lay out a safetensors file holding only ``names``.
+
+    Returns the new length prefix and header, and the inclusive byte ranges
+    of the source file that follow it, in order. Tensors are packed in
+    their original order, and neighbours that were adjacent in the source
+    come back as one range so they are read in a single pass. ``header``
+    must have passed read_safetensors_header, which checks every entry.
+    """
+    selected = sorted(set(names), key=lambda name: (header[name]["data_offsets"][0], name))
+
+    subset: Dict[str, Any] = {}
+    metadata = _string_metadata(header.get("__metadata__"))
+    if metadata is not None:
+        subset["__metadata__"] = metadata
+
+    ranges: List[Tuple[int, int]] = []
+    offset = 0
+    for name in selected:
+        entry = header[name]
+        begin, end = entry["data_offsets"]
+        subset[name] = {"dtype": entry["dtype"], "shape": entry["shape"], "data_offsets": [offset, offset + end - begin]}
+        offset += end - begin
+
+        if begin == end:
+            continue
+        start, stop = data_start + begin, data_start + end - 1
+        if ranges and ranges[-1][1] + 1 == start:
+            ranges[-1] = (ranges[-1][0], stop)
+        else:
+            ranges.append((start, stop))
+
+    encoded = json.dumps(subset, separators=(",", ":")).encode()
+    # Pad with spaces so the data section stays 8-byte aligned
+    encoded += b" " * (-len(encoded) % 8)
+
+    return HEADER_PREFIX.pack(len(encoded)) + encoded, ranges
\ No newline at end of file
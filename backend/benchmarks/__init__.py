@@ -0,0 +1,2 @@
+# Point UPLOAD_DIR at a scratch directory before any script imports the app
+from benchmarks import common  # noqa: F401
\ No newline at end of file
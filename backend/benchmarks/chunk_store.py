@@ -0,0 +1,101 @@
+"""Ingest and download throughput of chunked blobs against plain ones, and
+the storage a near-identical fine-tune costs in each.
+
+Uploads a random base checkpoint and a variant with scattered edits and a
+few inserted bytes, moves both into the chunk store, and downloads them
+before and after. Chunking is timed on its own, as the worker runs it
+after the upload has been answered. The files are deleted at the end;
+their chunks are left to the regular chunk garbage collection.
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from sqlalchemy import func, select
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.chunk import BlobChunk, Chunk
+from app.services.chunk_service import ChunkService
+from app.services.file_service import FileService
+from benchmarks.common import api_client, print_table, register, upload
+
+def fine_tune(base: bytes, edits: int, edit_size: int) -> bytes:
+    """``base`` with ``edits`` regions rewritten, plus a short insertion
+    near the start that shifts every later byte."""
+    data = bytearray(base)
+    for _ in range(edits):
+        start = random.randrange(0, len(data) - edit_size)
+        data[start:start + edit_size] = os.urandom(edit_size)
+    data[1000:1000] = b"fine-tuned"
+    return bytes(data)
+
+async def unique_chunk_bytes(hashes: list) -> int:
+    async with AsyncSessionLocal() as db:
+        referenced = select(BlobChunk.chunk_sha256).where(BlobChunk.blob_sha256.in_(hashes))
+        return int(await db.scalar(
+            select(func.coalesce(func.sum(Chunk.size_bytes), 0)).where(Chunk.sha256.in_(referenced))
+        ))
+
+async def no_chunking(sha256: str):
+    pass
+
+async def main(args):
+    settings.CHUNK_STORE_ENABLED = True
+    settings.CHUNK_MIN_BLOB_SIZE = 0
+    settings.COMPRESSION_ENABLED = False
+    FileService._schedule_chunking = no_chunking
+    size_mb = args.size_mb
+
+    base = os.urandom(size_mb * 1024 * 1024)
+    variant = fine_tune(base, args.edits, args.edit_kb * 1024)
+    timings = []
+
+    async with api_client() as client:
+        auth = await register(client)
+
+        async def download(record: dict) -> float:
+            started = time.perf_counter()
+            response = await client.get(f"/files/{record['id']}/download", headers=auth)
+            assert response.status_code == 200 and response.headers["etag"] == f'"{record["sha256"]}"'
+            return time.perf_counter() - started
+
+        records = []
+        for name, content in [("base", base), ("fine-tune", variant)]:
+            started = time.perf_counter()
+            record = await upload(client, auth, f"{name}.safetensors", content)
+            uploaded = time.perf_counter() - started
+            plain_read = await download(record)
+
+            started = time.perf_counter()
+            async with AsyncSessionLocal() as db:
+                assert await ChunkService.chunk_blob(db, record["sha256"])
+            chunked = time.perf_counter() - started
+
+            timings.append((name, size_mb / uploaded, size_mb / chunked, size_mb / plain_read, size_mb / await download(record)))
+            records.append(record)
+
+        hashes = [record["sha256"] for record in records]
+        stored = await unique_chunk_bytes(hashes)
+        plain = len(base) + len(variant)
+
+        for record in records:
+            await client.delete(f"/files/{record['id']}", headers=auth)
+
+    print(f"{size_mb} MiB base, fine-tune with {args.edits} edits of {args.edit_kb} KiB, CHUNK_AVG_SIZE={settings.CHUNK_AVG_SIZE}\n")
+    print_table(
+        ["blob", "upload MiB/s", "chunking MiB/s", "plain read MiB/s", "chunked read MiB/s"],
+        timings
+    )
+    print()
+    print_table(
+        ["layout", "MiB stored", "of plain"],
+        [("plain", plain / 2 ** 20, 1.0), ("chunked", stored / 2 ** 20, stored / plain)]
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=512)
+    parser.add_argument("--edits", type=int, default=20)
+    parser.add_argument("--edit-kb", type=int, default=64)
+    asyncio.run(main(parser.parse_args()))
\ No newline at end of file
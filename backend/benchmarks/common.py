@@ -0,0 +1,105 @@
+"""Helpers shared by the benchmark scripts.
+
+Each script drives the ASGI app in-process through httpx, against the
+database and storage the settings point at, so run them from ``backend/``
+with the same environment as the API:
+
+    python -m benchmarks.ranged_downloads --help
+
+Blobs, chunks and thumbnails go to a scratch UPLOAD_DIR, removed when the
+run ends, unless one is set in the environment.
+"""
+import asyncio
+import atexit
+import logging
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Sequence, Tuple
+import httpx
+
+# Settings are read when app.config is imported, so this has to run first;
+# the package __init__ imports this module for that reason
+if "UPLOAD_DIR" not in os.environ:
+    os.environ["UPLOAD_DIR"] = tempfile.mkdtemp(prefix="tensorbin-bench-")
+    atexit.register(shutil.rmtree, os.environ["UPLOAD_DIR"], ignore_errors=True)
+
+from app.database import engine
+from app.main import app
+
+# Statement and request logging in development would dominate every timing
+engine.echo = False
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+@asynccontextmanager
+async def api_client() -> AsyncIterator[httpx.AsyncClient]:
+    """A client for the app with its startup and shutdown hooks run."""
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(app=app, base_url="http://bench/api/v1", timeout=None) as client:
+            yield client
+
+async def register(client: httpx.AsyncClient) -> Dict[str, str]:
+    """Auth headers for a new throwaway user."""
+    response = await client.post("/auth/register", json={
+        "email": f"bench-{uuid.uuid4().hex[:12]}@example.com",
+        "password": "benchmark-password"
+    })
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+async def upload(client: httpx.AsyncClient, auth: Dict[str, str], filename: str, content: bytes) -> dict:
+    response = await client.post("/files/upload", files={"file": (filename, content)}, headers=auth)
+    response.raise_for_status()
+    return response.json()
+
+async def timed(call: Callable[[], Awaitable[object]]) -> float:
+    """Seconds one call takes."""
+    started = time.perf_counter()
+    await call()
+    return time.perf_counter() - started
+
+async def run_concurrently(
+    call: Callable[[], Awaitable[object]],
+    requests: int,
+    concurrency: int
+) -> Tuple[List[float], float]:
+    """Run ``call`` ``requests`` times with ``concurrency`` in flight.
+    Returns the per-call latencies and the wall time."""
+    latencies: List[float] = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            latencies.append(await timed(call))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - started
+
+def percentile(samples: Sequence[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds."""
+    return {
+        "p50": statistics.median(samples) * 1000,
+        "p95": percentile(samples, 0.95) * 1000,
+        "p99": percentile(samples, 0.99) * 1000,
+        "max": max(samples) * 1000
+    }
+
+def print_table(headers: Sequence[str], rows: Sequence[Sequence[object]]):
+    cells = [[str(header) for header in headers]] + [
+        [f"{value:.2f}" if isinstance(value, float) else str(value) for value in row]
+        for row in rows
+    ]
+    widths = [max(len(row[column]) for row in cells) for column in range(len(headers))]
+    for index, row in enumerate(cells):
+        print("  ".join(value.rjust(width) for value, width in zip(row, widths)))
+        if index == 0:
+            print("  ".join("-" * width for width in widths))
\ No newline at end of file
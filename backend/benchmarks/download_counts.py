@@ -0,0 +1,57 @@
+"""Download throughput on a single hot file.
+
+``per-request`` reproduces the old accounting, an UPDATE and commit of
+files.download_count on every download; ``batched`` is the buffered
+DownloadCounter flushing in bulk. Both count every download exactly once.
+"""
+import argparse
+import asyncio
+from sqlalchemy import select, update
+from app.database import AsyncSessionLocal, engine
+from app.models.file import File
+from app.services.download_counter import download_counter
+from benchmarks.common import api_client, print_table, register, run_concurrently, summarize, upload
+
+async def record_per_request(file_id: int):
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(File).where(File.id == file_id).values(download_count=File.download_count + 1)
+        )
+        await db.commit()
+
+async def main(args):
+    batched_record = download_counter.record
+    rows = []
+
+    async with api_client() as client:
+        auth = await register(client)
+        record = await upload(client, auth, "hot.bin", b"\0" * args.size_kb * 1024)
+        url = f"/files/{record['id']}/download"
+
+        async def download():
+            response = await client.get(url, headers=auth)
+            assert response.status_code == 200
+
+        for mode, recorder in [("per-request", record_per_request), ("batched", batched_record)]:
+            download_counter.record = recorder
+            latencies, wall = await run_concurrently(download, args.requests, args.concurrency)
+            await download_counter.flush()
+            rows.append((mode, args.requests / wall, *summarize(latencies).values()))
+
+        async with AsyncSessionLocal() as db:
+            counted = await db.scalar(select(File.download_count).where(File.id == record["id"]))
+        assert counted == 2 * args.requests, counted
+
+    print(f"{args.requests} downloads of one {args.size_kb} KiB file, {args.concurrency} concurrent\n")
+    print_table(["accounting", "req/s", "p50 ms", "p95 ms", "p99 ms", "max ms"], rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--size-kb", type=int, default=4)
+    args = parser.parse_args()
+    # Per-request accounting holds a second pooled connection per download
+    if args.concurrency > engine.pool.size() // 2:
+        parser.error(f"--concurrency must be at most {engine.pool.size() // 2}, half the pool")
+    asyncio.run(main(args))
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""Latency of GET /files/ while /auth/login is being hammered.
+
+``inline`` verifies bcrypt hashes on the event loop, as logins used to;
+``executor`` is the bounded password-hash pool. Hashes use the
+configured BCRYPT_ROUNDS.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from app.config import settings
+from app.utils import auth as auth_utils
+from benchmarks.common import api_client, print_table, summarize, timed
+
+async def hash_inline(func, *args):
+    return func(*args)
+
+async def main(args):
+    run_pooled = auth_utils._run_password_job
+    rows = []
+
+    async with api_client() as client:
+        credentials = {"email": f"bench-{uuid.uuid4().hex[:12]}@example.com", "password": "benchmark-password"}
+        response = await client.post("/auth/register", json=credentials)
+        response.raise_for_status()
+        auth = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        async def probe():
+            response = await client.get("/files/", headers=auth)
+            assert response.status_code == 200
+
+        for mode, runner in [("idle", None), ("inline", hash_inline), ("executor", run_pooled)]:
+            auth_utils._run_password_job = runner or run_pooled
+            deadline = time.perf_counter() + args.seconds
+            logins = 0
+
+            async def hammer():
+                nonlocal logins
+                while time.perf_counter() < deadline:
+                    response = await client.post("/auth/login", json=credentials)
+                    assert response.status_code == 200, response.text
+                    logins += 1
+
+            workers = [asyncio.create_task(hammer()) for _ in range(args.logins if runner else 0)]
+            latencies = []
+            while time.perf_counter() < deadline:
+                latencies.append(await timed(probe))
+                await asyncio.sleep(args.probe_interval_ms / 1000)
+            await asyncio.gather(*workers)
+            rows.append((mode, logins / args.seconds if runner else "-", *summarize(latencies).values()))
+        auth_utils._run_password_job = run_pooled
+
+    print(
+        f"GET /files/ with {args.logins} clients logging in for {args.seconds:g} s, "
+        f"BCRYPT_ROUNDS={settings.BCRYPT_ROUNDS}, PASSWORD_HASH_WORKERS={settings.PASSWORD_HASH_WORKERS}\n"
+    )
+    print_table(["hashing", "logins/s", "p50 ms", "p95 ms", "p99 ms", "max ms"], rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--probe-interval-ms", type=float, default=10)
+    args = parser.parse_args()
+    if args.logins > settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE:
+        parser.error("--logins is above what the hash queue admits")
+    asyncio.run(main(args))
\ No newline at end of file
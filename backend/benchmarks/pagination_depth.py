@@ -0,0 +1,95 @@
+"""Latency of the first page against a deep page, by offset and by cursor.
+
+Seeds one user with --files rows sharing a single blob, then times
+GET /files/ and GET /files/search at page 1 and at the last page, and the
+same positions reached with a keyset cursor. The seeded rows are removed
+afterwards.
+"""
+import argparse
+import asyncio
+from sqlalchemy import delete, func, insert, literal_column, select, text, true, update
+from app.database import AsyncSessionLocal
+from app.models.file import File
+from app.models.user import User
+from app.utils.pagination import encode_cursor
+from benchmarks.common import api_client, print_table, register, summarize, timed, upload
+
+async def seed(user_id: int, template_id: int, count: int):
+    """``count`` copies of a file row, one second apart in created_at."""
+    async with AsyncSessionLocal() as db:
+        template = select(File).where(File.id == template_id).subquery()
+        series = func.generate_series(1, count).table_valued("n").render_derived(name="series")
+        columns = ["user_id", "title", "filename", "original_filename", "file_path",
+                   "size_bytes", "mime_type", "sha256", "upload_status"]
+        await db.execute(insert(File).from_select(
+            columns + ["created_at"],
+            select(*[template.c[name] for name in columns],
+                   template.c.created_at - series.c.n * literal_column("interval '1 second'"))
+            .select_from(template.join(series, true()))
+        ))
+        await db.execute(update(User).where(User.id == user_id).values(file_count=User.file_count + count))
+        await db.commit()
+        # Plan against real statistics, as a long-lived table would have
+        await db.execute(text("ANALYZE files"))
+
+async def cursor_at(user_id: int, position: int) -> str:
+    """The cursor a client holds after reading ``position`` files."""
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(
+            select(File.created_at, File.id)
+            .where(File.user_id == user_id)
+            .order_by(File.created_at.desc(), File.id.desc())
+            .offset(position - 1)
+            .limit(1)
+        )).one()
+    return encode_cursor(row.created_at, row.id)
+
+async def unseed(user_id: int, template_id: int):
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(File).where(File.user_id == user_id, File.id != template_id))
+        await db.execute(update(User).where(User.id == user_id).values(file_count=1))
+        await db.commit()
+
+async def main(args):
+    last_page = args.files // args.per_page
+    rows = []
+
+    async with api_client() as client:
+        auth = await register(client)
+        template = await upload(client, auth, "seed.safetensors", b"seed")
+        user_id = (await client.get("/auth/me", headers=auth)).json()["id"]
+        await seed(user_id, template["id"], args.files)
+        try:
+            deep_cursor = await cursor_at(user_id, (last_page - 1) * args.per_page)
+            # include_total=false so search timings are paging alone
+            search = {"mime_type": template["mime_type"], "include_total": "false"}
+
+            cases = [
+                ("/files/", "page 1", {"page": 1}),
+                ("/files/", f"page {last_page}", {"page": last_page}),
+                ("/files/", "cursor start", {"cursor": ""}),
+                ("/files/", f"cursor at page {last_page}", {"cursor": deep_cursor}),
+                ("/files/search", "page 1", {**search, "page": 1}),
+                ("/files/search", f"page {last_page}", {**search, "page": last_page}),
+                ("/files/search", "cursor start", {**search, "cursor": ""}),
+                ("/files/search", f"cursor at page {last_page}", {**search, "cursor": deep_cursor}),
+            ]
+            for path, name, params in cases:
+                async def fetch():
+                    response = await client.get(path, params={**params, "per_page": args.per_page}, headers=auth)
+                    assert response.status_code == 200 and len(response.json()["files"]) == args.per_page
+
+                latencies = [await timed(fetch) for _ in range(args.repeat)]
+                rows.append((path, name, *summarize(latencies).values()))
+        finally:
+            await unseed(user_id, template["id"])
+
+    print(f"{args.files} files, {args.per_page} per page, {args.repeat} requests each\n")
+    print_table(["endpoint", "position", "p50 ms", "p95 ms", "p99 ms", "max ms"], rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
\ No newline at end of file
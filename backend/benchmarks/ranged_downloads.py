@@ -0,0 +1,74 @@
+"""Concurrent ranged reads of one large file.
+
+Compares fetching the file whole against fetching it as parallel
+segments, the way resuming download tools do, and reports the latency of
+random single-range reads and of conditional requests answered with 304.
+"""
+import argparse
+import asyncio
+import os
+import random
+from app.config import settings
+from benchmarks.common import api_client, print_table, register, run_concurrently, summarize, timed, upload
+
+async def main(args):
+    size = args.size_mb * 1024 * 1024
+    range_size = args.range_kb * 1024
+    content = os.urandom(size)
+
+    async with api_client() as client:
+        auth = await register(client)
+        record = await upload(client, auth, "bench.safetensors", content)
+        url = f"/files/{record['id']}/download"
+
+        async def whole():
+            response = await client.get(url, headers=auth)
+            assert len(response.content) == size
+
+        segment = -(-size // args.segments)
+
+        async def fetch_segment(start: int):
+            end = min(start + segment, size) - 1
+            response = await client.get(url, headers={**auth, "Range": f"bytes={start}-{end}"})
+            assert response.status_code == 206 and len(response.content) == end - start + 1
+
+        async def segmented():
+            await asyncio.gather(*(fetch_segment(start) for start in range(0, size, segment)))
+
+        async def random_range():
+            start = random.randrange(0, size - range_size)
+            response = await client.get(
+                url, headers={**auth, "Range": f"bytes={start}-{start + range_size - 1}"}
+            )
+            assert response.status_code == 206
+
+        async def not_modified():
+            response = await client.get(url, headers={**auth, "If-None-Match": f'"{record["sha256"]}"'})
+            assert response.status_code == 304
+
+        rows = []
+        for name, call in [("whole file", whole), (f"{args.segments} segments", segmented)]:
+            seconds = min([await timed(call) for _ in range(args.repeat)])
+            rows.append((name, seconds * 1000, args.size_mb / seconds))
+        print(f"Transfer of {args.size_mb} MiB (best of {args.repeat})\n")
+        print_table(["mode", "ms", "MiB/s"], rows)
+
+        rows = []
+        for name, call in [(f"{args.range_kb} KiB range", random_range), ("304", not_modified)]:
+            latencies, wall = await run_concurrently(call, args.requests, args.concurrency)
+            rows.append((name, *summarize(latencies).values(), args.requests / wall))
+        print(f"\n{args.requests} requests, {args.concurrency} concurrent\n")
+        print_table(["request", "p50 ms", "p95 ms", "p99 ms", "max ms", "req/s"], rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--segments", type=int, default=8)
+    parser.add_argument("--range-kb", type=int, default=1024)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    if args.size_mb * 1024 * 1024 > settings.MAX_FILE_SIZE:
+        parser.error("--size-mb is above MAX_FILE_SIZE")
+    asyncio.run(main(args))
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""Serialization cost of one page of files, without the database.
+
+``response_model`` is the old path: a FileResponse per row, then FastAPI
+validating the page against response_model again and rendering it with
+the standard json module. ``orjson`` is the current one: the page built
+once through FileService.to_response, dumped to JSON types by pydantic
+and rendered by orjson. ``model_construct`` is the current path with
+models assembled without validation, which pydantic v2 does in Python
+and so more slowly.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app.schemas.file import FileListResponse, FileResponse
+from app.services.file_service import FileService
+from benchmarks.common import print_table
+
+def make_rows(count: int) -> list:
+    created_at = datetime(2026, 10, 17, tzinfo=timezone.utc)
+    return [
+        SimpleNamespace(
+            id=n,
+            title=f"Checkpoint {n}",
+            filename=f"checkpoint-{n}.safetensors",
+            original_filename=f"checkpoint-{n}.safetensors",
+            size_bytes=6_000_000_000 + n,
+            mime_type="application/octet-stream",
+            sha256=f"{n:064x}",
+            upload_status="completed",
+            blocked=False,
+            download_count=n * 7,
+            created_at=created_at - timedelta(minutes=n),
+            tags=["sdxl", "lora", "v2"]
+        )
+        for n in range(count)
+    ]
+
+async def through_response_model(rows: list, response_field) -> bytes:
+    page = FileListResponse(
+        files=[
+            FileResponse(
+                id=row.id,
+                title=row.title,
+                filename=row.filename,
+                original_filename=row.original_filename,
+                size_bytes=row.size_bytes,
+                mime_type=row.mime_type,
+                sha256=row.sha256,
+                upload_status=row.upload_status,
+                blocked=row.blocked,
+                download_count=row.download_count,
+                created_at=row.created_at,
+                tags=list(row.tags),
+                download_url=f"/api/v1/files/{row.id}/download"
+            )
+            for row in rows
+        ],
+        total=len(rows), page=1, per_page=len(rows), total_pages=1
+    )
+    content = await serialize_response(field=response_field, response_content=page, is_coroutine=True)
+    return JSONResponse(content).body
+
+async def through_orjson(rows: list, response_field) -> bytes:
+    page = FileListResponse(
+        files=[FileService.to_response(row, row.tags) for row in rows],
+        total=len(rows), page=1, per_page=len(rows), total_pages=1
+    )
+    return ORJSONResponse(page.model_dump(mode="json")).body
+
+async def through_model_construct(rows: list, response_field) -> bytes:
+    page = FileListResponse.model_construct(
+        files=[
+            FileResponse.model_construct(
+                **{name: getattr(row, name) for name in FileResponse.model_fields if name != "download_url"},
+                download_url=f"/api/v1/files/{row.id}/download"
+            )
+            for row in rows
+        ],
+        total=len(rows), page=1, per_page=len(rows), total_pages=1, next_cursor=None
+    )
+    return ORJSONResponse(page.model_dump(mode="json")).body
+
+async def main(args):
+    rows = make_rows(args.page_size)
+    response_field = create_response_field(name="page", type_=FileListResponse)
+    paths = [
+        ("response_model", through_response_model),
+        ("orjson", through_orjson),
+        ("model_construct", through_model_construct)
+    ]
+    bodies = [await build(rows, response_field) for _, build in paths]
+    assert bodies[1] == bodies[2], "paths disagree"
+
+    results = []
+    for name, build in paths:
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            for _ in range(args.number):
+                await build(rows, response_field)
+            best = min(best, (time.perf_counter() - started) / args.number)
+        results.append((name, best * 1e6))
+
+    baseline = results[0][1]
+    print(f"One page of {args.page_size} files, best of {args.repeat} x {args.number}\n")
+    print_table(["path", "us/page", "speedup"], [(name, us, baseline / us) for name, us in results])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""Latency of an unrelated endpoint while thumbnails are being rendered.
+
+``inline`` renders inside the request handler on the event loop, as the
+thumbnail endpoint used to; ``executor`` is the bounded render pool.
+GET /files/ is probed throughout a burst of cache-missing thumbnails.
+"""
+import argparse
+import asyncio
+import io
+import os
+import time
+from PIL import Image
+from app.services.thumbnail_service import ThumbnailService
+from benchmarks.common import api_client, print_table, register, summarize, timed, upload
+
+def large_jpeg(width: int, height: int) -> bytes:
+    img = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    # A random corner keeps each image's hash, and so its cache entry, apart
+    img.paste(Image.frombytes("RGB", (16, 16), os.urandom(16 * 16 * 3)))
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+async def render_inline(source_path: str, sha256: str, size: int, fmt: str = "jpeg"):
+    return ThumbnailService.get_or_create(source_path, sha256, size, fmt)
+
+async def main(args):
+    render_pooled = ThumbnailService.get_or_create_async
+    rows = []
+
+    async with api_client() as client:
+        auth = await register(client)
+        images = [
+            await upload(client, auth, f"photo-{n}.jpg", large_jpeg(args.width, args.height))
+            for n in range(args.images)
+        ]
+
+        async def probe():
+            response = await client.get("/files/", headers=auth)
+            assert response.status_code == 200
+
+        async def thumbnail(record: dict):
+            response = await client.get(f"/files/{record['id']}/thumbnail?size=256", headers=auth)
+            assert response.status_code == 200, response.text
+
+        async def probe_during(load) -> list:
+            latencies = []
+            task = asyncio.create_task(load())
+            while not task.done():
+                latencies.append(await timed(probe))
+                await asyncio.sleep(args.probe_interval_ms / 1000)
+            await task
+            return latencies
+
+        async def idle():
+            await asyncio.sleep(2)
+
+        async def burst():
+            await asyncio.gather(*(thumbnail(record) for record in images))
+
+        rows.append(("idle", "-", *summarize(await probe_during(idle)).values()))
+        for mode, render in [("inline", render_inline), ("executor", render_pooled)]:
+            ThumbnailService.get_or_create_async = render
+            for record in images:
+                ThumbnailService.purge(record["sha256"])
+            started = time.perf_counter()
+            latencies = await probe_during(burst)
+            rows.append((mode, (time.perf_counter() - started) * 1000, *summarize(latencies).values()))
+        ThumbnailService.get_or_create_async = render_pooled
+
+    megapixels = args.width * args.height / 1e6
+    print(f"GET /files/ while {args.images} thumbnails of {megapixels:.0f} MP JPEGs render\n")
+    print_table(["rendering", "burst ms", "p50 ms", "p95 ms", "p99 ms", "max ms"], rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=8)
+    parser.add_argument("--width", type=int, default=7000)
+    parser.add_argument("--height", type=int, default=5000)
+    parser.add_argument("--probe-interval-ms", type=float, default=10)
+    asyncio.run(main(parser.parse_args()))
\ No newline at end of file
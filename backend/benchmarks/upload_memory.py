@@ -0,0 +1,72 @@
+"""Peak RSS of the API process against upload size.
+
+Each size is uploaded by a fresh process, so its peak resident set is
+its own. With streamed ingest the peak should stay flat as size grows.
+"""
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from sqlalchemy import update
+from app.database import AsyncSessionLocal
+from app.models.user import User
+from benchmarks.common import api_client, print_table, register
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def write_random_file(path: str, size: int):
+    block = os.urandom(1024 * 1024)
+    with open(path, "wb") as f:
+        for start in range(0, size, len(block)):
+            f.write(block[:min(len(block), size - start)])
+
+async def measure(size: int):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "upload.bin")
+        write_random_file(path, size)
+
+        async with api_client() as client:
+            auth = await register(client)
+            me = (await client.get("/auth/me", headers=auth)).json()
+            async with AsyncSessionLocal() as db:
+                # The highest tier, so quota does not cap the sizes tried
+                await db.execute(update(User).where(User.id == me["id"]).values(tier=2))
+                await db.commit()
+
+            baseline = peak_rss_mb()
+            started = time.perf_counter()
+            with open(path, "rb") as f:
+                response = await client.post("/files/upload", files={"file": ("upload.bin", f)}, headers=auth)
+            seconds = time.perf_counter() - started
+            response.raise_for_status()
+            await client.delete(f"/files/{response.json()['id']}", headers=auth)
+
+    print(f"{baseline} {peak_rss_mb()} {seconds}")
+
+def main(args):
+    rows = []
+    for size_mb in args.sizes_mb:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.upload_memory", "--child", str(size_mb)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        baseline, peak, seconds = map(float, output.split()[-3:])
+        rows.append((size_mb, baseline, peak, peak - baseline, size_mb / seconds))
+
+    print_table(["upload MiB", "RSS before MiB", "peak RSS MiB", "growth MiB", "MiB/s"], rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[16, 256, 1024, 4096])
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        asyncio.run(measure(args.child * 1024 * 1024))
+    else:
+        main(args)
\ No newline at end of file
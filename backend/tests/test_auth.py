@@ -0,0 +1,72 @@
+import asyncio
+import time
+import uuid
+import pytest
+from passlib.hash import bcrypt
+from sqlalchemy import select, update
+from app.config import settings
+from app.models.user import User
+from app.utils import auth as auth_utils
+
+@pytest.fixture
+async def account(client):
+    credentials = {"email": f"user-{uuid.uuid4().hex[:12]}@example.com", "password": "password123"}
+    response = await client.post("/auth/register", json=credentials)
+    assert response.status_code == 200, response.text
+    return credentials
+
+async def test_login(client, account):
+    response = await client.post("/auth/login", json=account)
+    assert response.status_code == 200
+    assert response.json()["access_token"]
+
+    wrong = await client.post("/auth/login", json={**account, "password": "wrong-password"})
+    assert wrong.status_code == 401
+
+async def test_login_rehashes_outdated_hash(db, client, account):
+    outdated = bcrypt.using(rounds=settings.BCRYPT_ROUNDS + 1).hash(account["password"])
+    await db.execute(update(User).where(User.email == account["email"]).values(password_hash=outdated))
+    await db.commit()
+
+    assert (await client.post("/auth/login", json=account)).status_code == 200
+
+    db.expire_all()
+    rehashed = await db.scalar(select(User.password_hash).where(User.email == account["email"]))
+    assert rehashed != outdated
+    assert bcrypt.from_string(rehashed).rounds == settings.BCRYPT_ROUNDS
+    assert bcrypt.verify(account["password"], rehashed)
+
+async def test_hashing_does_not_block_the_event_loop(client, account, monkeypatch):
+    class SlowContext:
+        def verify_and_update(self, password, hashed):
+            time.sleep(0.3)
+            return True, None
+
+    monkeypatch.setattr(auth_utils, "pwd_context", SlowContext())
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker = asyncio.create_task(tick())
+    try:
+        response = await client.post("/auth/login", json=account)
+    finally:
+        ticker.cancel()
+
+    assert response.status_code == 200
+    assert ticks >= 10
+
+async def test_full_hash_queue_is_shed(client, account, monkeypatch):
+    limit = settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE
+    monkeypatch.setitem(auth_utils._hash_stats, "in_flight", limit)
+    rejected = auth_utils.password_hash_stats()["rejected"]
+
+    response = await client.post("/auth/login", json=account)
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert auth_utils.password_hash_stats()["rejected"] == rejected + 1
\ No newline at end of file
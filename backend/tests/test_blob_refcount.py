@@ -0,0 +1,82 @@
+import os
+from sqlalchemy import select
+from app.models.blob import OrphanedBlob
+from app.services.blob_service import BlobService
+from app.services.file_service import FileService
+from app.storage import blob_key, storage
+
+async def orphan_recorded(db, sha256: str) -> bool:
+    return await db.scalar(select(OrphanedBlob.sha256).where(OrphanedBlob.sha256 == sha256)) is not None
+
+async def test_identical_uploads_share_one_blob(db, auth, register, upload, blob_row):
+    content = os.urandom(512)
+    first = await upload(auth, "a.txt", content)
+    second = await upload(await register(), "b.txt", content)
+
+    assert first["sha256"] == second["sha256"]
+    assert (await blob_row(first["sha256"])).ref_count == 2
+
+async def test_blob_outlives_all_but_its_last_reference(db, client, auth, register, upload, blob_row):
+    content = os.urandom(512)
+    other = await register()
+    first = await upload(auth, "a.txt", content)
+    second = await upload(other, "b.txt", content)
+    sha256 = first["sha256"]
+
+    assert (await client.delete(f"/files/{first['id']}", headers=auth)).status_code == 200
+    assert (await blob_row(sha256)).ref_count == 1
+    assert await storage.exists(blob_key(sha256))
+
+    assert (await client.delete(f"/files/{second['id']}", headers=other)).status_code == 200
+    assert await blob_row(sha256) is None
+    assert not await storage.exists(blob_key(sha256))
+    assert not await orphan_recorded(db, sha256)
+
+async def test_batch_delete_drops_every_reference(db, client, auth, register, upload, blob_row):
+    content = os.urandom(512)
+    other = await register()
+    shared = await upload(auth, "a.txt", content)
+    unique = await upload(auth, "b.txt")
+    theirs = await upload(other, "c.txt", content)
+
+    response = await client.post("/files/batch/delete", json={"ids": [shared["id"], unique["id"]]}, headers=auth)
+    assert response.json()["ids"] == [shared["id"], unique["id"]]
+    assert (await blob_row(shared["sha256"])).ref_count == 1
+    assert await blob_row(unique["sha256"]) is None
+    assert not await storage.exists(blob_key(unique["sha256"]))
+
+    await client.post("/files/batch/delete", json={"ids": [theirs["id"]]}, headers=other)
+    assert await blob_row(shared["sha256"]) is None
+    assert not await storage.exists(blob_key(shared["sha256"]))
+
+async def test_lost_removal_is_swept(db, client, auth, upload, monkeypatch):
+    async def lost(db, hashes):
+        pass
+
+    monkeypatch.setattr(FileService, "_schedule_blob_removal", lost)
+    file = await upload(auth, "a.txt")
+    await client.delete(f"/files/{file['id']}", headers=auth)
+
+    assert await orphan_recorded(db, file["sha256"])
+    assert await storage.exists(blob_key(file["sha256"]))
+
+    await BlobService.sweep_orphans(db)
+
+    assert not await orphan_recorded(db, file["sha256"])
+    assert not await storage.exists(blob_key(file["sha256"]))
+
+async def test_sweep_keeps_content_uploaded_again(db, client, auth, upload, blob_row, monkeypatch):
+    async def lost(db, hashes):
+        pass
+
+    monkeypatch.setattr(FileService, "_schedule_blob_removal", lost)
+    content = os.urandom(512)
+    file = await upload(auth, "a.txt", content)
+    await client.delete(f"/files/{file['id']}", headers=auth)
+    await upload(auth, "again.txt", content)
+
+    await BlobService.sweep_orphans(db)
+
+    assert not await orphan_recorded(db, file["sha256"])
+    assert (await blob_row(file["sha256"])).ref_count == 1
+    assert await storage.exists(blob_key(file["sha256"]))
@@ -0,0 +1,177 @@
+import hashlib
+import io
+import os
+import pytest
+from app.config import settings
+from app.models.chunk import Chunk
+from app.services import chunk_service
+from app.services.chunk_service import ChunkService
+from app.storage import blob_key, storage
+from app.utils import chunk_utils
+from app.utils.chunk_utils import GEAR, ChunkedBlob, _cut_mask, _find_cut, chunk_limits, iter_chunks
+
+AVERAGE = 4096
+
+def gear_loop_cut(data: bytes, min_size: int, limit: int, mask: int) -> int:
+    """The chunker one byte at a time, as stored chunks were first cut."""
+    fingerprint = 0
+    for i in range(min_size, limit):
+        fingerprint = ((fingerprint << 1) + GEAR[data[i]]) & ((1 << 64) - 1)
+        if not fingerprint & mask:
+            return i + 1
+    return limit
+
+@pytest.mark.parametrize("average", [64, 1024, AVERAGE])
+@pytest.mark.parametrize("block_size", [50, chunk_utils.HASH_BLOCK_SIZE])
+def test_cuts_match_the_gear_loop(average, block_size, sample, monkeypatch):
+    monkeypatch.setattr(chunk_utils, "HASH_BLOCK_SIZE", block_size)
+    data = sample(200_000, seed=average)
+    min_size, _, max_size = chunk_limits(average)
+    mask = _cut_mask(average)
+
+    for offset in range(0, len(data), 997):
+        window = data[offset:offset + max_size]
+        limit = min(max_size, len(window))
+        assert _find_cut(window, min_size, limit, mask) == gear_loop_cut(window, min_size, limit, mask)
+
+def test_chunks_reassemble_within_limits(sample):
+    data = sample(300_000)
+
+    chunks = list(iter_chunks(io.BytesIO(data), AVERAGE))
+
+    min_size, _, max_size = chunk_limits(AVERAGE)
+    assert b"".join(chunks) == data
+    assert all(min_size <= len(chunk) <= max_size for chunk in chunks[:-1])
+    assert len(chunks[-1]) <= max_size
+
+def test_edit_only_changes_nearby_chunks(sample):
+    data = sample(300_000)
+    edited = data[:150_000] + b"inserted" + data[150_000:]
+
+    digests = lambda content: {hashlib.sha256(chunk).hexdigest() for chunk in iter_chunks(io.BytesIO(content), AVERAGE)}
+    before, after = digests(data), digests(edited)
+
+    assert len(after - before) <= 2
+    assert len(before & after) >= len(before) - 2
+
+def test_empty_stream_has_no_chunks():
+    assert list(iter_chunks(io.BytesIO(b""), AVERAGE)) == []
+
+@pytest.fixture
+def chunked(tmp_path, sample):
+    data = sample(20_000)
+    chunks = []
+    offset = 0
+    for index, chunk in enumerate(iter_chunks(io.BytesIO(data), 1024)):
+        path = os.path.join(tmp_path, str(index))
+        with open(path, "wb") as f:
+            f.write(chunk)
+        chunks.append((offset, len(chunk), path))
+        offset += len(chunk)
+    return data, ChunkedBlob(chunks)
+
+@pytest.mark.parametrize("start, end", [(0, 19_999), (0, 0), (19_999, 19_999), (100, 9_000), (1_500, 1_600)])
+async def test_chunked_range(chunked, start, end):
+    data, blob = chunked
+
+    read = b"".join([part async for part in blob.iter_range(start, end)])
+
+    assert read == data[start:end + 1]
+
+def test_chunked_reader(chunked):
+    data, blob = chunked
+
+    with blob.open() as f:
+        f.seek(-500, os.SEEK_END)
+        tail = f.read()
+        f.seek(7_000)
+        middle = f.read(5_000)
+
+    assert tail == data[-500:]
+    assert middle == data[7_000:12_000]
+
+@pytest.fixture
+def chunk_store(monkeypatch):
+    monkeypatch.setattr(settings, "CHUNK_STORE_ENABLED", True)
+    monkeypatch.setattr(settings, "CHUNK_MIN_BLOB_SIZE", 1000)
+    monkeypatch.setattr(settings, "CHUNK_AVG_SIZE", AVERAGE)
+
+async def test_chunked_upload_keeps_plain_file_for_grace_period(db, client, auth, upload, chunk_store, blob_row, monkeypatch):
+    content = os.urandom(100_000)
+    file = await upload(auth, "model.bin", content)
+
+    blob = await blob_row(file["sha256"])
+    assert blob.layout == "chunked"
+    assert blob.plain_retired_at is not None
+    assert await storage.exists(blob_key(file["sha256"]))
+
+    assert await ChunkService.collect_garbage(db) == 0
+    assert await storage.exists(blob_key(file["sha256"]))
+
+    monkeypatch.setattr(settings, "CHUNK_GC_GRACE_MINUTES", 0)
+    await ChunkService.collect_garbage(db)
+
+    assert not await storage.exists(blob_key(file["sha256"]))
+    assert (await blob_row(file["sha256"])).plain_retired_at is None
+
+    response = await client.get(f"/files/{file['id']}/download", headers=auth)
+    assert response.content == content
+    response = await client.get(f"/files/{file['id']}/download", headers={**auth, "Range": "bytes=5000-60000"})
+    assert response.status_code == 206
+    assert response.content == content[5000:60001]
+
+async def test_deleting_chunked_blob_removes_retired_plain_file(db, client, auth, upload, chunk_store, blob_row):
+    file = await upload(auth, "model.bin", os.urandom(50_000))
+    assert (await blob_row(file["sha256"])).layout == "chunked"
+
+    await client.delete(f"/files/{file['id']}", headers=auth)
+
+    assert not await storage.exists(blob_key(file["sha256"]))
+
+async def test_long_run_keeps_chunks_touched(db, auth, upload, chunk_store, monkeypatch):
+    monkeypatch.setattr(settings, "CHUNK_STORE_ENABLED", False)
+    plain = await upload(auth, "plain.bin", os.urandom(100_000))
+    monkeypatch.setattr(settings, "CHUNK_STORE_ENABLED", True)
+
+    # Refresh after every batch
+    monkeypatch.setattr(chunk_service, "CHUNK_WRITE_BATCH_BYTES", 16384)
+    monkeypatch.setattr(settings, "CHUNK_GC_GRACE_MINUTES", 0)
+    touches = []
+    touch = ChunkService._touch
+
+    async def counting_touch(db, digests):
+        touches.append(len(digests))
+        return await touch(db, digests)
+
+    monkeypatch.setattr(ChunkService, "_touch", counting_touch)
+
+    assert await ChunkService.chunk_blob(db, plain["sha256"])
+    assert len(touches) > 2
+    assert touches == sorted(touches)
+
+async def test_chunk_collected_mid_run_aborts(db, auth, upload, chunk_store, blob_row, monkeypatch):
+    monkeypatch.setattr(settings, "CHUNK_STORE_ENABLED", False)
+    file = await upload(auth, "plain.bin", os.urandom(100_000))
+    monkeypatch.setattr(settings, "CHUNK_STORE_ENABLED", True)
+    monkeypatch.setattr(chunk_service, "CHUNK_WRITE_BATCH_BYTES", 16384)
+    monkeypatch.setattr(settings, "CHUNK_GC_GRACE_MINUTES", 0)
+
+    store = ChunkService._store
+    batches = []
+
+    async def store_then_collect(db, pending):
+        await store(db, pending)
+        batches.append(sorted(pending))
+        if len(batches) == 2:
+            # What collect_garbage does to an unreferenced chunk
+            await db.execute(Chunk.__table__.delete().where(Chunk.sha256 == batches[0][0]))
+            await db.commit()
+
+    monkeypatch.setattr(ChunkService, "_store", store_then_collect)
+
+    assert not await ChunkService.chunk_blob(db, file["sha256"])
+    # Stopped at the first refresh after the loss, not at the end
+    assert len(batches) == 2
+    blob = await blob_row(file["sha256"])
+    assert blob.layout == "plain"
+    assert await storage.exists(blob_key(file["sha256"]))
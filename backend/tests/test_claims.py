@@ -0,0 +1,106 @@
+import hashlib
+import os
+import pytest
+from sqlalchemy import select
+from app.config import settings
+from app.models.user import User
+
+@pytest.fixture
+async def stored(stored_file) -> bytes:
+    """Content another user has already uploaded."""
+    content, _, _ = await stored_file(os.urandom(20000), "owner.bin")
+    return content
+
+async def probe(client, auth: dict, sha256: str, size_bytes: int) -> dict:
+    response = await client.post("/files/probe", json={"sha256": sha256, "size_bytes": size_bytes}, headers=auth)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def proof(content: bytes, ranges: list) -> str:
+    return hashlib.sha256(b"".join(content[start:end + 1] for start, end in ranges)).hexdigest()
+
+async def claim(client, auth: dict, content: bytes, **fields):
+    return await client.post("/files/claim", json={
+        "sha256": hashlib.sha256(content).hexdigest(),
+        "size_bytes": len(content),
+        "filename": "claimed.bin",
+        **fields
+    }, headers=auth)
+
+async def storage_used(db, auth: dict, client) -> int:
+    me = (await client.get("/auth/me", headers=auth)).json()
+    db.expire_all()
+    return await db.scalar(select(User.storage_used).where(User.id == me["id"]))
+
+async def test_probe_does_not_reveal_other_users_content(client, register, stored):
+    other = await register()
+
+    result = await probe(client, other, hashlib.sha256(stored).hexdigest(), len(stored))
+
+    assert result["exists"] is False
+    assert result["challenge"]["ranges"] == [[0, len(stored) - 1]]
+
+async def test_claim_without_challenge_is_forbidden(client, register, stored):
+    other = await register()
+
+    response = await claim(client, other, stored, proof=hashlib.sha256(stored).hexdigest())
+
+    assert response.status_code == 403
+
+@pytest.mark.parametrize("probed", ["user", "sha256", "size"])
+async def test_claim_with_a_token_for_something_else_is_forbidden(client, register, stored, probed):
+    other = await register()
+    sha256, size_bytes, prober = hashlib.sha256(stored).hexdigest(), len(stored), other
+    if probed == "user":
+        prober = await register()
+    elif probed == "sha256":
+        sha256 = hashlib.sha256(b"something else").hexdigest()
+    else:
+        size_bytes += 1
+    challenge = (await probe(client, prober, sha256, size_bytes))["challenge"]
+
+    response = await claim(
+        client, other, stored, challenge=challenge["token"], proof=proof(stored, [[0, len(stored) - 1]])
+    )
+
+    assert response.status_code == 403
+
+async def test_claim_with_wrong_proof_is_not_found(db, client, register, stored):
+    other = await register()
+    challenge = (await probe(client, other, hashlib.sha256(stored).hexdigest(), len(stored)))["challenge"]
+
+    response = await claim(
+        client, other, stored, challenge=challenge["token"], proof=proof(os.urandom(len(stored)), challenge["ranges"])
+    )
+
+    assert response.status_code == 404
+    assert await storage_used(db, other, client) == 0
+
+async def test_claim_with_valid_proof_creates_a_charged_file(db, client, register, stored, monkeypatch):
+    monkeypatch.setattr(settings, "CLAIM_PROOF_RANGE_BYTES", 1024)
+    other = await register()
+    challenge = (await probe(client, other, hashlib.sha256(stored).hexdigest(), len(stored)))["challenge"]
+    assert len(challenge["ranges"]) == settings.CLAIM_PROOF_RANGES
+
+    response = await claim(
+        client, other, stored, challenge=challenge["token"], proof=proof(stored, challenge["ranges"]), tags=["Shared"]
+    )
+
+    assert response.status_code == 200, response.text
+    record = response.json()
+    assert record["sha256"] == hashlib.sha256(stored).hexdigest()
+    assert record["tags"] == ["shared"]
+    assert await storage_used(db, other, client) == len(stored)
+    download = await client.get(f"/files/{record['id']}/download", headers=other)
+    assert download.content == stored
+
+async def test_reclaiming_own_content_returns_the_existing_file(db, client, auth, upload):
+    content = os.urandom(3000)
+    record = await upload(auth, "mine.bin", content)
+
+    assert (await probe(client, auth, record["sha256"], len(content)))["exists"] is True
+    response = await claim(client, auth, content)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["id"] == record["id"]
+    assert await storage_used(db, auth, client) == len(content)
\ No newline at end of file
@@ -0,0 +1,131 @@
+import os
+import pytest
+import zstandard
+from app.config import settings
+from app.storage import compressed_key, storage
+from app.utils.compression_utils import (
+    InvalidSeekTable, SEEK_FOOTER, compress_file, compressible, load_compressed
+)
+
+FRAME_SIZE = 1000
+
+@pytest.fixture
+def frames(monkeypatch):
+    monkeypatch.setattr(settings, "COMPRESSION_FRAME_SIZE", FRAME_SIZE)
+
+def compressed(tmp_path, content: bytes) -> str:
+    source = os.path.join(tmp_path, "source")
+    dest = os.path.join(tmp_path, "source.zst")
+    with open(source, "wb") as f:
+        f.write(content)
+    assert compress_file(source, dest) == os.path.getsize(dest)
+    return dest
+
+async def read(blob, start: int, end: int) -> bytes:
+    return b"".join([chunk async for chunk in blob.iter_range(start, end)])
+
+async def test_stored_object_is_one_zstd_stream(tmp_path, frames, sample):
+    content = sample(10_500, compressible=True)
+    path = compressed(tmp_path, content)
+
+    with open(path, "rb") as f:
+        reader = zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True)
+        assert reader.read() == content
+
+@pytest.mark.parametrize("start, end", [
+    (0, 10_499), (0, 0), (10_499, 10_499), (999, 1000), (1500, 4200), (3000, 3999), (10_000, 10_499)
+])
+async def test_range_reads_cross_frames(tmp_path, frames, start, end, sample):
+    content = sample(10_500, compressible=True)
+    blob = await load_compressed(compressed(tmp_path, content))
+
+    assert len(blob.frames) == 11
+    assert blob.size == len(content)
+    assert await read(blob, start, end) == content[start:end + 1]
+
+async def test_reader_seeks_like_a_file(tmp_path, frames, sample):
+    content = sample(5000, compressible=True)
+    blob = await load_compressed(compressed(tmp_path, content))
+
+    with blob.open() as reader:
+        assert reader.read(10) == content[:10]
+        reader.seek(1990)
+        assert reader.read(20) == content[1990:2010]
+        reader.seek(-100, os.SEEK_END)
+        assert reader.read() == content[-100:]
+        reader.seek(-50, os.SEEK_CUR)
+        assert reader.tell() == 4950
+        assert reader.read(500) == content[4950:]
+        assert reader.read(1) == b""
+
+async def test_empty_file(tmp_path, frames):
+    blob = await load_compressed(compressed(tmp_path, b""))
+
+    assert blob.size == 0
+    assert blob.frames == []
+
+async def test_damaged_seek_tables_are_rejected(tmp_path, frames, sample):
+    path = compressed(tmp_path, sample(3000, compressible=True))
+    with open(path, "rb") as f:
+        data = f.read()
+
+    damaged = os.path.join(tmp_path, "damaged.zst")
+    count, descriptor, magic = SEEK_FOOTER.unpack_from(data, len(data) - SEEK_FOOTER.size)
+    for variant in [
+        data[:-1],
+        data[:-SEEK_FOOTER.size] + SEEK_FOOTER.pack(count, descriptor, magic ^ 1),
+        data[:-SEEK_FOOTER.size] + SEEK_FOOTER.pack(count + 1, descriptor, magic),
+        data[:-SEEK_FOOTER.size] + SEEK_FOOTER.pack(10 ** 6, descriptor, magic),
+        b"\0" * 4,
+    ]:
+        with open(damaged, "wb") as f:
+            f.write(variant)
+        with pytest.raises(InvalidSeekTable):
+            await load_compressed(damaged)
+
+def test_compressible(monkeypatch):
+    monkeypatch.setattr(settings, "COMPRESSION_ENABLED", True)
+    size = settings.COMPRESSION_MIN_SIZE
+
+    assert compressible(size, "application/octet-stream")
+    assert compressible(size, None)
+    assert not compressible(size - 1, "application/octet-stream")
+    assert not compressible(size, "image/png")
+    assert not compressible(size, "application/zip")
+
+    monkeypatch.setattr(settings, "COMPRESSION_ENABLED", False)
+    assert not compressible(size, "application/octet-stream")
+
+@pytest.fixture
+async def stored(stored_file, blob_row, sample, monkeypatch):
+    monkeypatch.setattr(settings, "COMPRESSION_ENABLED", True)
+    monkeypatch.setattr(settings, "COMPRESSION_FRAME_SIZE", 16384)
+    content, record, url = await stored_file(sample(200_000, compressible=True))
+    assert (await blob_row(record["sha256"])).layout == "zstd"
+    return content, record, url
+
+async def test_download_as_stored_to_zstd_clients(client, auth, stored):
+    content, record, url = stored
+
+    response = await client.get(url, headers={**auth, "Accept-Encoding": "zstd"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "zstd"
+    assert response.headers["etag"] == f'"{record["sha256"]}-zstd"'
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert await storage.size(compressed_key(record["sha256"])) == len(response.content)
+    reader = zstandard.ZstdDecompressor().stream_reader(response.content, read_across_frames=True)
+    assert reader.read() == content
+
+async def test_download_decompressed_otherwise(client, auth, stored):
+    content, record, url = stored
+
+    plain = await client.get(url, headers={**auth, "Accept-Encoding": "gzip"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] == f'"{record["sha256"]}"'
+    assert plain.content == content
+
+    ranged = await client.get(url, headers={**auth, "Accept-Encoding": "zstd", "Range": "bytes=16000-50000"})
+    assert ranged.status_code == 206
+    assert "content-encoding" not in ranged.headers
+    assert ranged.content == content[16000:50001]
\ No newline at end of file
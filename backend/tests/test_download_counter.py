@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import select
+from app.config import settings
+from app.models.file import File
+from app.services import download_counter as download_counter_module
+from app.services.download_counter import DownloadCounter, download_counter
+
+async def download_count(db, file_id: int) -> int:
+    db.expire_all()
+    return await db.scalar(select(File.download_count).where(File.id == file_id))
+
+async def test_flush_writes_aggregated_counts(db, auth, upload):
+    first = await upload(auth, "a.bin")
+    second = await upload(auth, "b.bin")
+    counter = DownloadCounter()
+
+    for file_id in [first["id"], second["id"], first["id"], first["id"]]:
+        await counter.record(file_id)
+
+    assert await counter.flush() == 4
+    assert await counter.flush() == 0
+    assert await download_count(db, first["id"]) == 3
+    assert await download_count(db, second["id"]) == 1
+
+async def test_failed_flush_keeps_counts(db, auth, upload, monkeypatch):
+    record = await upload(auth, "a.bin")
+    counter = DownloadCounter()
+    await counter.record(record["id"])
+
+    def unavailable():
+        raise ConnectionError("database is down")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(download_counter_module, "AsyncSessionLocal", unavailable)
+        with pytest.raises(ConnectionError):
+            await counter.flush()
+
+    await counter.record(record["id"])
+    assert await counter.flush() == 2
+    assert await download_count(db, record["id"]) == 2
+
+async def test_full_buffer_wakes_the_flusher(monkeypatch):
+    monkeypatch.setattr(settings, "DOWNLOAD_COUNT_MAX_PENDING", 3)
+    counter = DownloadCounter()
+
+    await counter.record(1)
+    await counter.record(2)
+    assert not counter._wake.is_set()
+    await counter.record(1)
+    assert counter._wake.is_set()
+
+async def test_only_new_downloads_are_counted(client, auth, upload):
+    record = await upload(auth, "a.bin", b"x" * 1000)
+    url = f"/files/{record['id']}/download"
+    etag = f'"{record["sha256"]}"'
+
+    def pending() -> int:
+        return download_counter._pending.get(record["id"], 0)
+
+    await client.get(url, headers=auth)
+    assert pending() == 1
+
+    # Resuming an interrupted transfer, or revalidating a cached copy
+    await client.get(url, headers={**auth, "Range": "bytes=500-"})
+    await client.get(url, headers={**auth, "If-None-Match": etag})
+    assert pending() == 1
+
+    await client.get(url, headers={**auth, "Range": "bytes=0-99"})
+    assert pending() == 2
\ No newline at end of file
@@ -0,0 +1,192 @@
+import base64
+import hashlib
+import os
+from datetime import timedelta
+import pytest
+from app.services.download_counter import download_counter
+from app.utils.auth import create_download_token
+from app.utils.download_utils import RangeNotSatisfiable, etag_matches, parse_range_header
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", [(0, 99)]),
+    ("bytes=100-", [(100, 999)]),
+    ("bytes=-100", [(900, 999)]),
+    ("bytes=-5000", [(0, 999)]),
+    ("bytes=900-5000", [(900, 999)]),
+    ("bytes=500-599, 0-99", [(0, 99), (500, 599)]),
+    ("bytes=0-99,100-199,150-299", [(0, 299)]),
+    ("bytes=0-99,2000-3000", [(0, 99)]),
+    ("BYTES = 0-0", [(0, 0)]),
+])
+def test_parse_range_header(header, expected):
+    assert parse_range_header(header, 1000) == expected
+
+@pytest.mark.parametrize("header", [
+    "items=0-99",
+    "bytes=",
+    "bytes=abc-def",
+    "bytes=100",
+    "bytes=200-100",
+    "bytes=" + ",".join(f"{n * 10}-{n * 10}" for n in range(17)),
+])
+def test_parse_range_header_ignored(header):
+    assert parse_range_header(header, 1000) is None
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=1000-", 1000),
+    ("bytes=1000-2000,3000-", 1000),
+    ("bytes=-0", 1000),
+    ("bytes=0-", 0),
+])
+def test_parse_range_header_unsatisfiable(header, size):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header(header, size)
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", "abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abcd"', '"abc"')
+
+@pytest.fixture
+async def stored(stored_file):
+    return await stored_file(os.urandom(10_000))
+
+def parse_multipart(response) -> list:
+    boundary = response.headers["content-type"].split("boundary=")[1]
+    parts = []
+    for part in response.content.split(f"--{boundary}".encode())[1:-1]:
+        head, _, body = part.partition(b"\r\n\r\n")
+        content_range = next(
+            line.split(b": ")[1].decode()
+            for line in head.split(b"\r\n") if line.lower().startswith(b"content-range")
+        )
+        parts.append((content_range, body[:-2]))
+    return parts
+
+async def test_full_download(client, auth, stored):
+    content, record, url = stored
+
+    response = await client.get(url, headers=auth)
+
+    assert response.status_code == 200
+    assert response.content == content
+    assert response.headers["etag"] == f'"{record["sha256"]}"'
+    assert response.headers["accept-ranges"] == "bytes"
+
+async def test_single_range(client, auth, stored):
+    content, _, url = stored
+
+    response = await client.get(url, headers={**auth, "Range": "bytes=-1000"})
+
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 9000-9999/10000"
+    assert response.headers["content-length"] == "1000"
+    assert response.content == content[9000:]
+
+async def test_multiple_ranges(client, auth, stored):
+    content, _, url = stored
+
+    response = await client.get(url, headers={**auth, "Range": "bytes=5000-5099,0-9,20-29"})
+
+    assert response.status_code == 206
+    assert response.headers["content-type"].startswith("multipart/byteranges; boundary=")
+    assert int(response.headers["content-length"]) == len(response.content)
+    assert parse_multipart(response) == [
+        ("bytes 0-9/10000", content[0:10]),
+        ("bytes 20-29/10000", content[20:30]),
+        ("bytes 5000-5099/10000", content[5000:5100])
+    ]
+
+async def test_unsatisfiable_range(client, auth, stored):
+    _, _, url = stored
+
+    response = await client.get(url, headers={**auth, "Range": "bytes=10000-"})
+
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */10000"
+
+async def test_if_range(client, auth, stored):
+    content, record, url = stored
+    etag = f'"{record["sha256"]}"'
+
+    matching = await client.get(url, headers={**auth, "Range": "bytes=0-99", "If-Range": etag})
+    assert matching.status_code == 206
+    assert matching.content == content[:100]
+
+    # The file changed since the client's partial copy: send all of it
+    stale = await client.get(url, headers={**auth, "Range": "bytes=0-99", "If-Range": '"stale"'})
+    assert stale.status_code == 200
+    assert stale.content == content
+
+async def test_if_none_match(client, auth, stored):
+    _, record, url = stored
+
+    response = await client.get(url, headers={**auth, "If-None-Match": f'W/"{record["sha256"]}"'})
+
+    assert response.status_code == 304
+    assert response.content == b""
+
+async def signed_token(client, auth: dict, file_id: int) -> str:
+    response = await client.post(f"/files/{file_id}/signed-url", params={"expires_minutes": 5}, headers=auth)
+    assert response.status_code == 200, response.text
+    prefix = "/api/v1/files/signed/"
+    assert response.json()["url"].startswith(prefix)
+    return response.json()["url"][len(prefix):]
+
+async def test_signed_link_serves_ranges_and_counts(client, auth, stored):
+    content, record, _ = stored
+    token = await signed_token(client, auth, record["id"])
+    before = download_counter._pending.get(record["id"], 0)
+
+    response = await client.get(f"/files/signed/{token}", headers={"Range": "bytes=0-99"})
+
+    assert response.status_code == 206
+    assert response.content == content[:100]
+    assert response.headers["etag"] == f'"{record["sha256"]}"'
+    assert "weights.bin" in response.headers["content-disposition"]
+    assert download_counter._pending.get(record["id"], 0) == before + 1
+
+    resumed = await client.get(f"/files/signed/{token}", headers={"Range": "bytes=100-"})
+    assert resumed.content == content[100:]
+    assert download_counter._pending.get(record["id"], 0) == before + 1
+
+async def test_signed_url_is_only_issued_to_the_owner(client, register, stored):
+    _, record, _ = stored
+
+    response = await client.post(f"/files/{record['id']}/signed-url", headers=await register())
+
+    assert response.status_code == 404
+
+async def test_expired_signed_link_is_forbidden(client, stored):
+    _, record, _ = stored
+    token = create_download_token(
+        {"sub": str(record["id"]), "name": "weights.bin", "mime": None, "sha256": record["sha256"]},
+        timedelta(seconds=-1)
+    )
+
+    response = await client.get(f"/files/signed/{token}")
+
+    assert response.status_code == 403
+
+async def test_tampered_signed_link_is_forbidden(client, auth, stored):
+    _, record, _ = stored
+    header, payload, signature = (await signed_token(client, auth, record["id"])).split(".")
+    forged = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)).replace(
+        record["sha256"].encode(), hashlib.sha256(b"other").hexdigest().encode()
+    )
+
+    for token in [
+        f"{header}.{base64.urlsafe_b64encode(forged).decode().rstrip('=')}.{signature}",
+        f"{header}.{payload}.{signature[:-4]}AAAA"
+    ]:
+        response = await client.get(f"/files/signed/{token}")
+        assert response.status_code == 403
+
+async def test_access_token_is_not_a_download_link(client, auth, stored):
+    access_token = auth["Authorization"].split(" ", 1)[1]
+
+    response = await client.get(f"/files/signed/{access_token}")
+
+    assert response.status_code == 403
\ No newline at end of file
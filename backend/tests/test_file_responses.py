@@ -0,0 +1,26 @@
+from app.schemas.file import FileResponse
+
+async def test_every_endpoint_serializes_files_alike(client, auth, upload):
+    uploaded = await upload(auth, "model.safetensors", title="Base model", tags="sdxl, base")
+    file_id = uploaded["id"]
+
+    single = (await client.get(f"/files/{file_id}", headers=auth)).json()
+    listed = (await client.get("/files/", headers=auth)).json()["files"]
+    searched = (await client.get("/files/search", params={"tags": "sdxl"}, headers=auth)).json()["files"]
+    batch = (await client.post("/files/batch/get", json={"ids": [file_id]}, headers=auth)).json()["files"]
+
+    assert listed == searched == batch == [single]
+    assert {key: uploaded[key] for key in single if key != "download_count"} == {
+        key: value for key, value in single.items() if key != "download_count"
+    }
+
+async def test_constructed_responses_match_the_schema(client, auth, upload):
+    await upload(auth, "notes.txt", b"plain notes", tags="docs")
+
+    listed = (await client.get("/files/", headers=auth)).json()["files"][0]
+
+    assert set(listed) == set(FileResponse.model_fields)
+    parsed = FileResponse.model_validate(listed)
+    assert parsed.model_dump(mode="json") == listed
+    assert listed["tags"] == ["docs"]
+    assert listed["download_url"] == f"/api/v1/files/{listed['id']}/download"
\ No newline at end of file
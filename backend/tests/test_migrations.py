@@ -0,0 +1,32 @@
+import asyncio
+import pytest
+from alembic import command
+from sqlalchemy import text
+
+async def columns(db, table: str) -> set:
+    result = await db.execute(
+        text("SELECT column_name FROM information_schema.columns WHERE table_name = :table"),
+        {"table": table}
+    )
+    return {row[0] for row in result}
+
+async def extensions(db) -> set:
+    result = await db.execute(text("SELECT extname FROM pg_extension"))
+    return {row[0] for row in result}
+
+async def test_search_indexes_downgrade_reverses_upgrade(database, db):
+    available = await db.scalar(text("SELECT count(*) FROM pg_available_extensions WHERE name = 'pg_trgm'"))
+    if not available:
+        pytest.skip("Re-applying 004 needs the pg_trgm extension")
+    await db.rollback()
+
+    await asyncio.to_thread(command.downgrade, database, "003")
+    try:
+        assert not {"title", "search_vector"} & await columns(db, "files")
+        assert "pg_trgm" not in await extensions(db)
+        await db.rollback()
+    finally:
+        await asyncio.to_thread(command.upgrade, database, "head")
+
+    assert {"title", "search_vector"} <= await columns(db, "files")
+    assert "pg_trgm" in await extensions(db)
@@ -0,0 +1,71 @@
+import base64
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.utils.pagination import decode_cursor, encode_cursor
+
+def raw_cursor(payload: bytes) -> str:
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 10, 17, 8, 30, 15, 123456, tzinfo=timezone(timedelta(hours=2)))
+
+    cursor = encode_cursor(created_at, 4242)
+
+    assert decode_cursor(cursor) == (created_at, 4242)
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not base64!",
+    raw_cursor(b"\xff\xfe"),
+    raw_cursor(b'{"created_at": 1}'),
+    raw_cursor(b"[1]"),
+    raw_cursor(b'["yesterday", 1]'),
+    raw_cursor(b'[null, 1]'),
+    raw_cursor(b'["2026-10-17T08:30:15", "x"]'),
+])
+def test_malformed_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+async def walk(client, auth, path: str, **params) -> list:
+    ids = []
+    cursor = ""
+    while cursor is not None:
+        response = await client.get(path, params={**params, "cursor": cursor, "per_page": 2}, headers=auth)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert len(body["files"]) <= 2
+        ids += [file["id"] for file in body["files"]]
+        cursor = body["next_cursor"]
+    return ids
+
+async def test_cursor_walks_listing_newest_first(client, auth, upload):
+    uploaded = [(await upload(auth, f"file-{n}.txt"))["id"] for n in range(5)]
+
+    assert await walk(client, auth, "/files/") == uploaded[::-1]
+
+    pages = await client.get("/files/", params={"page": 2, "per_page": 2}, headers=auth)
+    assert [file["id"] for file in pages.json()["files"]] == uploaded[::-1][2:4]
+    assert pages.json()["next_cursor"] is None
+
+async def test_cursor_is_stable_under_new_uploads(client, auth, upload):
+    uploaded = [(await upload(auth, f"file-{n}.txt"))["id"] for n in range(4)]
+    first = (await client.get("/files/", params={"cursor": "", "per_page": 2}, headers=auth)).json()
+
+    await upload(auth, "newer.txt")
+    rest = await client.get("/files/", params={"cursor": first["next_cursor"], "per_page": 2}, headers=auth)
+
+    assert [file["id"] for file in rest.json()["files"]] == uploaded[1::-1]
+
+async def test_cursor_walks_search(client, auth, upload):
+    matching = [(await upload(auth, f"report-{n}.txt", tags="quarterly"))["id"] for n in range(3)]
+    await upload(auth, "other.txt", tags="draft")
+
+    assert await walk(client, auth, "/files/search", tags="quarterly") == matching[::-1]
+
+async def test_invalid_cursor_is_rejected(client, auth):
+    response = await client.get("/files/", params={"cursor": "garbage"}, headers=auth)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
\ No newline at end of file
@@ -0,0 +1,99 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from app.database import AsyncSessionLocal
+from app.models.user import STORAGE_LIMITS, User
+from app.services.quota_service import QuotaService
+
+LIMIT = STORAGE_LIMITS[0]
+
+@pytest.fixture
+async def user(db, client, auth) -> User:
+    me = (await client.get("/auth/me", headers=auth)).json()
+    user = await db.scalar(select(User).where(User.id == me["id"]))
+    # Detached, so commits in the tests do not expire it
+    db.expunge(user)
+    return user
+
+async def storage_used(db, user_id: int) -> int:
+    db.expire_all()
+    return await db.scalar(select(User.storage_used).where(User.id == user_id))
+
+async def set_storage_used(db, user_id: int, value: int):
+    await db.execute(update(User).where(User.id == user_id).values(storage_used=value))
+    await db.commit()
+
+async def test_reserve_charges_and_returns_what_is_left(db, user):
+    assert await QuotaService.reserve(db, user, 1000) == LIMIT - 1000
+    assert await QuotaService.reserve(db, user, LIMIT - 1000) == 0
+    await db.commit()
+
+    assert await storage_used(db, user.id) == LIMIT
+
+async def test_reserve_over_quota_charges_nothing(db, user):
+    await set_storage_used(db, user.id, LIMIT - 10)
+
+    with pytest.raises(HTTPException) as excinfo:
+        await QuotaService.reserve(db, user, 11)
+    await db.commit()
+
+    assert excinfo.value.status_code == 413
+    assert await storage_used(db, user.id) == LIMIT - 10
+
+async def test_release_never_goes_negative(db, user):
+    await set_storage_used(db, user.id, 500)
+
+    await QuotaService.release(db, user.id, 200)
+    await db.commit()
+    assert await storage_used(db, user.id) == 300
+
+    await QuotaService.release(db, user.id, 1000)
+    await QuotaService.release(db, user.id, -5)
+    await db.commit()
+    assert await storage_used(db, user.id) == 0
+
+async def test_concurrent_reservations_never_overshoot(db, user):
+    await set_storage_used(db, user.id, LIMIT - 5 * 1000)
+
+    async def reserve() -> bool:
+        async with AsyncSessionLocal() as session:
+            try:
+                await QuotaService.reserve(session, user, 1000)
+            except HTTPException:
+                return False
+            await session.commit()
+            return True
+
+    results = await asyncio.gather(*(reserve() for _ in range(12)))
+
+    assert results.count(True) == 5
+    assert await storage_used(db, user.id) == LIMIT
+
+async def test_upload_and_delete_settle_the_quota(db, client, auth, user, upload):
+    content = os.urandom(3000)
+    record = await upload(auth, "a.bin", content)
+    assert await storage_used(db, user.id) == 3000
+
+    # The same content again is the same file, and is not charged twice
+    assert (await upload(auth, "b.bin", content))["id"] == record["id"]
+    assert await storage_used(db, user.id) == 3000
+
+    assert (await client.delete(f"/files/{record['id']}", headers=auth)).status_code == 200
+    assert await storage_used(db, user.id) == 0
+
+async def test_reconcile_repairs_idle_users(db, user, upload, auth):
+    await upload(auth, "a.bin", os.urandom(2000))
+    long_ago = datetime.now(timezone.utc) - timedelta(days=1)
+    await db.execute(
+        update(User).where(User.id == user.id).values(storage_used=123_456, file_count=9, updated_at=long_ago)
+    )
+    await db.commit()
+
+    assert await QuotaService.reconcile(db) >= 1
+
+    db.expire_all()
+    row = (await db.execute(select(User.storage_used, User.file_count).where(User.id == user.id))).one()
+    assert tuple(row) == (2000, 1)
\ No newline at end of file
@@ -0,0 +1,45 @@
+import pytest
+from sqlalchemy import text
+
+@pytest.fixture
+async def trigram(db):
+    installed = await db.scalar(text("SELECT count(*) FROM pg_extension WHERE extname = 'pg_trgm'"))
+    if not installed:
+        pytest.skip("pg_trgm is not installed in the test database")
+
+async def search(client, auth, query: str) -> list:
+    response = await client.get("/files/search", params={"query": query}, headers=auth)
+    assert response.status_code == 200, response.text
+    return [file["filename"] for file in response.json()["files"]]
+
+async def test_typo_matches_filename(client, auth, upload, trigram):
+    await upload(auth, "checkpoint.txt")
+    await upload(auth, "unrelated.txt")
+
+    assert await search(client, auth, "chekpoint") == ["checkpoint.txt"]
+
+async def test_typo_matches_title(client, auth, upload, trigram):
+    await upload(auth, "q3.txt", title="quarterly report")
+
+    assert await search(client, auth, "quartrly") == ["q3.txt"]
+
+async def test_exact_word_ranks_first(client, auth, upload, trigram):
+    await upload(auth, "weights_final.txt")
+    await upload(auth, "weight_finals.txt")
+
+    assert (await search(client, auth, "weights"))[0] == "weights_final.txt"
+
+async def test_search_is_scoped_to_user(client, auth, register, upload, trigram):
+    other = await register()
+    await upload(other, "checkpoint.txt")
+
+    assert await search(client, auth, "checkpoint") == []
+
+async def test_tag_suggest_tolerates_typos(client, auth, upload, trigram):
+    await upload(auth, "a.txt", tags="landscape")
+    await upload(auth, "b.txt", tags="landscape,portrait")
+
+    response = await client.get("/files/tags/suggest", params={"prefix": "lanscape"}, headers=auth)
+
+    assert response.status_code == 200
+    assert response.json()["suggestions"] == [{"tag": "landscape", "count": 2}]
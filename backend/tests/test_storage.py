@@ -0,0 +1,218 @@
+import asyncio
+import hashlib
+import os
+import socket
+import httpx
+import pytest
+from sqlalchemy import func, select
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.storage import LocalStorage, blob_key, storage
+
+PART_SIZE = 5 * 1024 * 1024  # S3's smallest allowed part
+
+async def chunks_of(data: bytes, size: int = 1024 * 1024):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+async def read(backend, key: str, start: int, end: int) -> bytes:
+    return b"".join([chunk async for chunk in backend.get_range(key, start, end)])
+
+@pytest.fixture
+def local(tmp_path):
+    return LocalStorage(str(tmp_path))
+
+async def test_local_round_trip(local):
+    data = os.urandom(10_000)
+
+    assert await local.put_stream("blobs/ab/cd/x", chunks_of(data, 3000)) == len(data)
+
+    assert await local.size("blobs/ab/cd/x") == len(data)
+    assert await read(local, "blobs/ab/cd/x", 0, 9_999) == data
+    assert await read(local, "blobs/ab/cd/x", 2_500, 7_499) == data[2_500:7_500]
+    assert await local.presign("blobs/ab/cd/x", 60) is None
+
+async def test_local_put_file_leaves_source(local, tmp_path):
+    source = os.path.join(tmp_path, "upload.tmp")
+    with open(source, "wb") as f:
+        f.write(b"content")
+
+    await local.put_file("blobs/ab/cd/x", source)
+
+    assert os.path.exists(source)
+    assert await local.read_range("blobs/ab/cd/x", 0, 6) == b"content"
+    assert os.listdir(os.path.join(tmp_path, "blobs", "ab", "cd")) == ["x"]
+
+async def test_local_missing_key(local):
+    assert await local.size("blobs/00/00/missing") is None
+    assert not await local.exists("blobs/00/00/missing")
+    await local.delete("blobs/00/00/missing")
+
+@pytest.fixture(scope="session")
+def s3_endpoint():
+    server_module = pytest.importorskip("moto.server")
+    pytest.importorskip("aioboto3")
+    boto3 = pytest.importorskip("boto3")
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = server_module.ThreadedMotoServer(ip_address="127.0.0.1", port=port)
+    server.start()
+    endpoint = f"http://127.0.0.1:{port}"
+    boto3.client(
+        "s3", endpoint_url=endpoint, region_name="us-east-1",
+        aws_access_key_id="testing", aws_secret_access_key="testing"
+    ).create_bucket(Bucket="tensorbin-test")
+    yield endpoint
+    server.stop()
+
+@pytest.fixture
+async def s3(s3_endpoint, monkeypatch):
+    from app.storage.s3 import S3Storage
+
+    monkeypatch.setattr(settings, "STORAGE_S3_BUCKET", "tensorbin-test")
+    monkeypatch.setattr(settings, "STORAGE_S3_PREFIX", "tests")
+    monkeypatch.setattr(settings, "STORAGE_S3_ENDPOINT_URL", s3_endpoint)
+    monkeypatch.setattr(settings, "STORAGE_S3_REGION", "us-east-1")
+    monkeypatch.setattr(settings, "STORAGE_S3_ACCESS_KEY_ID", "testing")
+    monkeypatch.setattr(settings, "STORAGE_S3_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setattr(settings, "STORAGE_S3_PART_SIZE", PART_SIZE)
+    monkeypatch.setattr(settings, "STORAGE_S3_MAX_CONCURRENCY", 2)
+    backend = S3Storage()
+    yield backend
+    await backend.close()
+
+async def head(backend, key: str) -> dict:
+    client = await backend._get_client()
+    return await client.head_object(Bucket=backend.bucket, Key=backend._object_key(key))
+
+async def open_uploads(backend) -> list:
+    client = await backend._get_client()
+    result = await client.list_multipart_uploads(Bucket=backend.bucket)
+    return result.get("Uploads", [])
+
+async def test_s3_small_object_is_one_put(s3):
+    data = os.urandom(100_000)
+
+    assert await s3.put_stream("blobs/aa/aa/small", chunks_of(data, 30_000)) == len(data)
+
+    assert "-" not in (await head(s3, "blobs/aa/aa/small"))["ETag"]
+    assert await s3.size("blobs/aa/aa/small") == len(data)
+    assert await read(s3, "blobs/aa/aa/small", 0, len(data) - 1) == data
+    assert await s3.read_range("blobs/aa/aa/small", 1_000, 1_999) == data[1_000:2_000]
+
+async def test_s3_large_object_is_multipart(s3):
+    data = os.urandom(2 * PART_SIZE + 1234)
+
+    assert await s3.put_stream("blobs/aa/bb/large", chunks_of(data)) == len(data)
+
+    # A multipart ETag ends in the number of parts
+    assert (await head(s3, "blobs/aa/bb/large"))["ETag"].strip('"').endswith("-3")
+    assert await s3.size("blobs/aa/bb/large") == len(data)
+    assert await read(s3, "blobs/aa/bb/large", 0, len(data) - 1) == data
+    # Across the first part boundary
+    start, end = PART_SIZE - 100, PART_SIZE + 100
+    assert await s3.read_range("blobs/aa/bb/large", start, end) == data[start:end + 1]
+    assert await open_uploads(s3) == []
+
+async def test_s3_failed_stream_aborts_upload(s3):
+    async def failing():
+        yield os.urandom(PART_SIZE)
+        yield os.urandom(PART_SIZE)
+        raise ConnectionResetError("client went away")
+
+    with pytest.raises(ConnectionResetError):
+        await s3.put_stream("blobs/aa/cc/failed", failing())
+
+    assert await open_uploads(s3) == []
+    assert not await s3.exists("blobs/aa/cc/failed")
+
+async def test_s3_put_file_leaves_source(s3, tmp_path):
+    source = os.path.join(tmp_path, "upload.tmp")
+    with open(source, "wb") as f:
+        f.write(b"content")
+
+    await s3.put_file("blobs/aa/dd/file", source)
+
+    assert os.path.exists(source)
+    assert await s3.read_range("blobs/aa/dd/file", 0, 6) == b"content"
+
+async def test_s3_missing_and_deleted(s3):
+    assert await s3.size("blobs/aa/ee/missing") is None
+    assert not await s3.exists("blobs/aa/ee/missing")
+
+    await s3.put_stream("blobs/aa/ee/gone", chunks_of(b"x"))
+    assert await s3.exists("blobs/aa/ee/gone")
+    await s3.delete("blobs/aa/ee/gone")
+    assert not await s3.exists("blobs/aa/ee/gone")
+
+async def test_s3_presigned_url_serves_object(s3):
+    await s3.put_stream("blobs/aa/ff/signed", chunks_of(b"signed content"))
+
+    url = await s3.presign("blobs/aa/ff/signed", 60, filename="model weights.bin", media_type="application/x-test")
+
+    async with httpx.AsyncClient() as client:
+        response = await client.get(url)
+    assert response.status_code == 200
+    assert response.content == b"signed content"
+    assert response.headers["content-type"] == "application/x-test"
+    assert response.headers["content-disposition"] == "attachment; filename*=utf-8''model%20weights.bin"
+
+def test_s3_client_from_finished_loop_is_closed(s3):
+    async def use():
+        return await s3.size("blobs/aa/ff/nothing")
+
+    # Like Celery: each task in a loop of its own
+    asyncio.run(use())
+    first_client, first_stack = s3._client, s3._exit_stack
+    closed = []
+    aclose = first_stack.aclose
+
+    async def tracked_close():
+        closed.append(True)
+        await aclose()
+
+    first_stack.aclose = tracked_close
+    asyncio.run(use())
+
+    assert closed == [True]
+    assert s3._client is not first_client
+    assert s3._exit_stack is not first_stack
+
+async def test_acquire_stores_outside_the_hash_lock(auth, upload, monkeypatch):
+    content = b"stored before the lock " * 100
+    sha256 = hashlib.sha256(content).hexdigest()
+    put_file = storage.put_file
+    lock_free = []
+
+    async def checking_put_file(key: str, path: str):
+        async with AsyncSessionLocal() as other:
+            lock_free.append(await other.scalar(select(func.pg_try_advisory_xact_lock(func.hashtext(sha256)))))
+        await put_file(key, path)
+
+    monkeypatch.setattr(storage, "put_file", checking_put_file)
+    await upload(auth, "unlocked.bin", content)
+
+    assert lock_free == [True]
+
+async def test_acquire_stores_again_when_removed_meanwhile(auth, upload, monkeypatch):
+    content = b"removed by an orphan sweep " * 100
+    sha256 = hashlib.sha256(content).hexdigest()
+    put_file = storage.put_file
+    calls = []
+
+    async def racing_put_file(key: str, path: str):
+        await put_file(key, path)
+        calls.append(key)
+        if len(calls) == 1:
+            # An earlier orphan with this hash is removed before the lock
+            await storage.delete(key)
+
+    monkeypatch.setattr(storage, "put_file", racing_put_file)
+    record = await upload(auth, "restored.bin", content)
+
+    assert calls == [blob_key(sha256)] * 2
+    assert await storage.exists(blob_key(sha256))
+    assert await read(storage, blob_key(sha256), 0, len(content) - 1) == content
+    assert record["size_bytes"] == len(content)
\ No newline at end of file
@@ -0,0 +1,110 @@
+import os
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, insert, select, true
+from app.config import settings
+from app.models.file import File
+from app.schemas.file import MAX_BATCH_TAGS
+from app.services.tag_service import MAX_TAG_LENGTH, TagService
+
+def test_normalize():
+    assert TagService.normalize(["  SDXL ", "lora", "sdxl", "", "   ", "LoRA", "v2"]) == ["sdxl", "lora", "v2"]
+    assert TagService.normalize([]) == []
+    assert TagService.normalize(None) == []
+
+def test_normalize_rejects_long_tags():
+    assert TagService.normalize(["x" * MAX_TAG_LENGTH]) == ["x" * MAX_TAG_LENGTH]
+
+    with pytest.raises(HTTPException) as excinfo:
+        TagService.normalize(["ok", "x" * (MAX_TAG_LENGTH + 1)])
+    assert excinfo.value.status_code == 400
+
+async def test_upload_returns_tags_as_stored(client, auth, upload):
+    record = await upload(auth, "model.bin", tags=" SDXL,lora , sdxl,,")
+
+    assert record["tags"] == ["sdxl", "lora"]
+    stored = (await client.get(f"/files/{record['id']}", headers=auth)).json()
+    assert sorted(stored["tags"]) == sorted(record["tags"])
+
+async def test_tag_facets_count_normalized_names(client, auth, upload):
+    await upload(auth, "a.bin", tags="Portrait")
+    await upload(auth, "b.bin", tags="portrait,LANDSCAPE")
+
+    response = await client.get("/files/tags", headers=auth)
+
+    assert response.status_code == 200
+    counts = {item["tag"]: item["count"] for item in response.json()["tags"]}
+    assert counts == {"portrait": 2, "landscape": 1}
+
+async def test_retag_in_batch(client, auth, upload):
+    record = await upload(auth, "a.bin", tags="draft,keep")
+
+    response = await client.post(
+        "/files/batch/tags", json={"ids": [record["id"]], "add": ["Final"], "remove": ["DRAFT"]}, headers=auth
+    )
+
+    assert response.status_code == 200
+    tags = (await client.get(f"/files/{record['id']}", headers=auth)).json()["tags"]
+    assert sorted(tags) == ["final", "keep"]
+
+async def test_retag_full_batch(db, client, auth, upload):
+    record = await upload(auth, "a.bin")
+    # Copies of the row stand in for a batch's worth of uploads
+    template = select(File).where(File.id == record["id"]).subquery()
+    series = func.generate_series(2, settings.FILE_BATCH_MAX_ITEMS).table_valued("n").render_derived(name="series")
+    columns = ["user_id", "title", "filename", "original_filename", "file_path", "size_bytes", "mime_type", "sha256"]
+    result = await db.execute(
+        insert(File)
+        .from_select(columns, select(*[template.c[name] for name in columns]).select_from(template.join(series, true())))
+        .returning(File.id)
+    )
+    await db.commit()
+    ids = [record["id"]] + list(result.scalars())
+    tags = [f"tag-{n}" for n in range(11)]
+
+    response = await client.post("/files/batch/tags", json={"ids": ids, "add": tags}, headers=auth)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["missing"] == []
+    counts = {item["tag"]: item["count"] for item in (await client.get("/files/tags", headers=auth)).json()["tags"]}
+    assert counts == {tag: len(ids) for tag in tags}
+
+    response = await client.post("/files/batch/tags", json={"ids": ids, "remove": tags[1:]}, headers=auth)
+
+    assert response.status_code == 200, response.text
+    counts = {item["tag"]: item["count"] for item in (await client.get("/files/tags", headers=auth)).json()["tags"]}
+    assert counts == {tags[0]: len(ids)}
+
+async def test_retag_caps_tags_per_request(client, auth, upload):
+    record = await upload(auth, "a.bin")
+    tags = [f"tag-{n}" for n in range(MAX_BATCH_TAGS + 1)]
+
+    for field in ("add", "remove"):
+        response = await client.post("/files/batch/tags", json={"ids": [record["id"]], field: tags}, headers=auth)
+        assert response.status_code == 422
+
+async def test_upload_session_stores_normalized_tags(client, auth):
+    content = os.urandom(500)
+    session = await client.post(
+        "/uploads/", json={"filename": "model.bin", "size_bytes": len(content), "tags": ["SDXL", "sdxl", " lora "]},
+        headers=auth
+    )
+    upload_id = session.json()["upload_id"]
+    await client.put(f"/uploads/{upload_id}/parts/1", content=content, headers=auth)
+
+    response = await client.post(f"/uploads/{upload_id}/complete", json={}, headers=auth)
+
+    assert response.status_code == 200, response.text
+    record = response.json()
+    assert record["tags"] == ["sdxl", "lora"]
+    stored = (await client.get(f"/files/{record['id']}", headers=auth)).json()
+    assert sorted(stored["tags"]) == sorted(record["tags"])
+
+async def test_upload_session_rejects_long_tags_before_reserving(client, auth):
+    response = await client.post(
+        "/uploads/", json={"filename": "model.bin", "size_bytes": 500, "tags": ["x" * (MAX_TAG_LENGTH + 1)]},
+        headers=auth
+    )
+
+    assert response.status_code == 400
+    assert (await client.get("/auth/me", headers=auth)).json()["storage_used"] == 0
\ No newline at end of file
@@ -0,0 +1,212 @@
+import json
+import os
+import struct
+import pytest
+from app.config import settings
+from app.utils.tensor_header import (
+    InvalidTensorHeader, build_subset, index_tensor_header, read_safetensors_header, summarize_header
+)
+
+def encode(header: dict, data: bytes = b"") -> bytes:
+    encoded = json.dumps(header).encode()
+    return struct.pack("<Q", len(encoded)) + encoded + data
+
+def write_file(tmp_path, header: dict, data: bytes = b"") -> str:
+    path = os.path.join(tmp_path, "model.safetensors")
+    with open(path, "wb") as f:
+        f.write(encode(header, data))
+    return path
+
+def tensor(dtype: str, shape: list, offsets: list) -> dict:
+    return {"dtype": dtype, "shape": shape, "data_offsets": offsets}
+
+def test_reads_file_written_by_safetensors(tmp_path):
+    safetensors = pytest.importorskip("safetensors")
+    serialized = bytes(safetensors.serialize({
+        "weight": {"dtype": "float32", "shape": [2, 3], "data": bytes(24)},
+        "bias": {"dtype": "bfloat16", "shape": [3], "data": bytes(6)}
+    }, {"format": "pt"}))
+    path = os.path.join(tmp_path, "model.safetensors")
+    with open(path, "wb") as f:
+        f.write(serialized)
+
+    header, data_start = read_safetensors_header(path)
+
+    assert header["__metadata__"] == {"format": "pt"}
+    assert header["weight"]["shape"] == [2, 3]
+    assert header["bias"]["dtype"] == "BF16"
+    assert data_start == len(serialized) - 30
+
+def test_other_files_are_not_safetensors(tmp_path):
+    path = os.path.join(tmp_path, "notes.txt")
+    with open(path, "wb") as f:
+        f.write(b"just some text, nothing else")
+
+    assert read_safetensors_header(path) is None
+
+def test_header_longer_than_file_is_not_safetensors(tmp_path):
+    path = os.path.join(tmp_path, "model.safetensors")
+    with open(path, "wb") as f:
+        f.write(struct.pack("<Q", 1000) + b"{}")
+
+    assert read_safetensors_header(path) is None
+
+@pytest.mark.parametrize("entry", [
+    tensor("F31", [2], [0, 8]),
+    tensor(["F32"], [2], [0, 8]),
+    tensor("F32", [True, 2], [0, 8]),
+    tensor("F32", [-1], [0, 8]),
+    tensor("F32", [2], [False, 8]),
+    tensor("F32", [2], [0, 16]),
+    tensor("F32", [2], [8, 0]),
+    tensor("F32", [2, 2], [0, 8]),
+    tensor("F32", [2**40, 2**40], [0, 8]),
+    "F32"
+])
+def test_rejects_invalid_entry(tmp_path, entry):
+    path = write_file(tmp_path, {"t": entry}, bytes(8))
+
+    with pytest.raises(InvalidTensorHeader):
+        read_safetensors_header(path)
+    assert index_tensor_header(path) is None
+
+def test_accepts_sub_byte_dtypes(tmp_path):
+    path = write_file(tmp_path, {"t": tensor("F4", [2, 3], [0, 3])}, bytes(3))
+
+    header, _ = read_safetensors_header(path)
+
+    assert header["t"]["dtype"] == "F4"
+
+def test_summary(tmp_path):
+    path = write_file(tmp_path, {
+        "__metadata__": {"format": "pt", "epoch": 3},
+        "a": tensor("F16", [4, 2], [0, 16]),
+        "b": tensor("I64", [], [16, 24]),
+        "c": tensor("F16", [0, 5], [24, 24])
+    }, bytes(24))
+
+    summary = summarize_header(read_safetensors_header(path)[0])
+
+    assert summary == {
+        "tensor_count": 3,
+        "parameter_count": 9,
+        "tensor_dtypes": ["F16", "I64"],
+        "tensor_metadata": {"format": "pt", "epoch": "3"}
+    }
+
+async def test_upload_with_oversized_shape_is_not_indexed(client, auth, upload):
+    content = encode({"t": tensor("F32", [2**40, 2**40], [0, 8])}, bytes(8))
+    file = await upload(auth, "huge.safetensors", content)
+
+    response = await client.get(f"/files/{file['id']}/tensors", headers=auth)
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "File has no tensor header"
+
+async def test_upload_is_indexed(client, auth, upload):
+    content = encode({"t": tensor("BF16", [3, 4], [0, 24])}, bytes(24))
+    file = await upload(auth, "model.safetensors", content)
+
+    response = await client.get(f"/files/{file['id']}/tensors", headers=auth)
+
+    assert response.status_code == 200
+    assert response.json()["parameter_count"] == 12
+
+
+def serialized_model() -> bytes:
+    safetensors = pytest.importorskip("safetensors")
+    return bytes(safetensors.serialize({
+        "embed.weight": {"dtype": "float16", "shape": [4, 8], "data": os.urandom(64)},
+        "layer.0.weight": {"dtype": "float32", "shape": [8, 8], "data": os.urandom(256)},
+        "layer.0.bias": {"dtype": "float32", "shape": [8], "data": os.urandom(32)},
+        "layer.1.weight": {"dtype": "bfloat16", "shape": [8, 8], "data": os.urandom(128)},
+        "layer.1.mask": {"dtype": "bool", "shape": [0], "data": b""},
+        "head.weight": {"dtype": "int8", "shape": [8, 2], "data": os.urandom(16)}
+    }, {"format": "pt"}))
+
+def cut(raw: bytes, tmp_path, names: list) -> bytes:
+    path = os.path.join(tmp_path, "source.safetensors")
+    with open(path, "wb") as f:
+        f.write(raw)
+    header, data_start = read_safetensors_header(path)
+    head, ranges = build_subset(header, data_start, names)
+    return head + b"".join(raw[start:end + 1] for start, end in ranges)
+
+def parsed(raw: bytes) -> dict:
+    safetensors = pytest.importorskip("safetensors")
+    return {
+        name: (tensor["dtype"], tensor["shape"], bytes(tensor["data"]))
+        for name, tensor in safetensors.deserialize(raw)
+    }
+
+@pytest.mark.parametrize("names", [
+    ["layer.0.weight"],
+    ["layer.0.bias", "layer.0.weight"],
+    ["head.weight", "embed.weight"],
+    ["layer.1.mask"],
+    ["embed.weight", "layer.0.weight", "layer.0.bias", "layer.1.weight", "layer.1.mask", "head.weight"]
+])
+def test_subset_round_trips_through_safetensors(tmp_path, names):
+    raw = serialized_model()
+    original = parsed(raw)
+
+    subset = parsed(cut(raw, tmp_path, names))
+
+    assert subset == {name: original[name] for name in names}
+
+def test_subset_keeps_data_aligned(tmp_path):
+    raw = serialized_model()
+
+    subset = cut(raw, tmp_path, ["layer.0.bias"])
+
+    (header_size,) = struct.unpack("<Q", subset[:8])
+    assert header_size % 8 == 0
+
+def test_adjacent_tensors_are_read_as_one_range(tmp_path):
+    path = write_file(tmp_path, {
+        "a": tensor("U8", [2], [0, 2]),
+        "b": tensor("U8", [2], [2, 4]),
+        "c": tensor("U8", [2], [4, 6])
+    }, b"aabbcc")
+    header, data_start = read_safetensors_header(path)
+
+    _, ranges = build_subset(header, data_start, ["c", "a", "b"])
+
+    assert ranges == [(data_start, data_start + 5)]
+
+def test_subset_metadata_is_strings(tmp_path):
+    raw = encode({
+        "__metadata__": {"epoch": 3, "name": "x"},
+        "a": tensor("U8", [2], [0, 2])
+    }, b"ab")
+
+    subset = cut(raw, tmp_path, ["a"])
+
+    assert parsed(subset) == {"a": ("U8", [2], b"ab")}
+    (header_size,) = struct.unpack("<Q", subset[:8])
+    assert json.loads(subset[8:8 + header_size])["__metadata__"] == {"epoch": "3", "name": "x"}
+
+@pytest.mark.parametrize("filler, layout", [(b"\0", "zstd"), (None, "plain")])
+async def test_subset_download_round_trips(client, auth, upload, blob_row, monkeypatch, filler, layout):
+    safetensors = pytest.importorskip("safetensors")
+    monkeypatch.setattr(settings, "COMPRESSION_ENABLED", True)
+    monkeypatch.setattr(settings, "COMPRESSION_FRAME_SIZE", 65536)
+    data = lambda size: filler * size if filler else os.urandom(size)
+    raw = bytes(safetensors.serialize({
+        "first": {"dtype": "float32", "shape": [256, 256], "data": data(262144)},
+        "second": {"dtype": "float16", "shape": [16], "data": data(32)},
+        "third": {"dtype": "uint8", "shape": [1024], "data": data(1024)}
+    }, None))
+    file = await upload(auth, "model.safetensors", raw)
+    assert (await blob_row(file["sha256"])).layout == layout
+
+    response = await client.get(
+        f"/files/{file['id']}/tensors/download",
+        params=[("name", "third"), ("prefix", "fir")],
+        headers=auth
+    )
+
+    assert response.status_code == 200
+    assert int(response.headers["content-length"]) == len(response.content)
+    original = parsed(raw)
+    assert parsed(response.content) == {name: original[name] for name in ("first", "third")}
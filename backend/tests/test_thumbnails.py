@@ -0,0 +1,106 @@
+import asyncio
+import io
+import os
+import threading
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+from app.config import settings
+from app.services import thumbnail_service
+from app.services.thumbnail_service import ThumbnailService
+
+def png(width: int = 800, height: int = 600) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 40, 90)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(ThumbnailService, "_cache_bytes", None)
+    return ThumbnailService.cache_dir()
+
+async def test_thumbnail_is_rendered_and_cached(client, auth, upload):
+    record = await upload(auth, "photo.png", png())
+
+    response = await client.get(f"/files/{record['id']}/thumbnail?size=100", headers=auth)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/jpeg"
+    with Image.open(io.BytesIO(response.content)) as img:
+        assert max(img.size) == 128
+
+    cached = await client.get(
+        f"/files/{record['id']}/thumbnail?size=100",
+        headers={**auth, "If-None-Match": response.headers["etag"]}
+    )
+    assert cached.status_code == 304
+
+async def test_thumbnail_rejected_when_queue_is_full(client, auth, upload, monkeypatch):
+    record = await upload(auth, "busy.png", png())
+    limit = settings.THUMBNAIL_WORKERS + settings.THUMBNAIL_MAX_PENDING
+    monkeypatch.setitem(thumbnail_service._render_stats, "in_flight", limit)
+    rejected = ThumbnailService.render_stats()["rejected"]
+
+    response = await client.get(f"/files/{record['id']}/thumbnail?size=200", headers=auth)
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert ThumbnailService.render_stats()["rejected"] == rejected + 1
+
+async def test_waiters_beyond_max_pending_are_turned_away(cache_dir, monkeypatch):
+    monkeypatch.setattr(settings, "THUMBNAIL_MAX_PENDING", 1)
+    release = threading.Event()
+    started = []
+
+    def blocked_render(source_path, sha256, size, fmt):
+        started.append(sha256)
+        release.wait(10)
+        return source_path, size
+
+    monkeypatch.setattr(ThumbnailService, "get_or_create", blocked_render)
+    accepted = [
+        asyncio.create_task(ThumbnailService.get_or_create_async("src", f"{n:064x}", 64))
+        for n in range(settings.THUMBNAIL_WORKERS + 1)
+    ]
+    await asyncio.sleep(0.1)
+
+    assert ThumbnailService.render_stats()["queued"] == 1
+    with pytest.raises(HTTPException) as excinfo:
+        await ThumbnailService.get_or_create_async("src", "f" * 64, 64)
+    assert excinfo.value.status_code == 503
+
+    release.set()
+    await asyncio.gather(*accepted)
+    assert len(started) == settings.THUMBNAIL_WORKERS + 1
+    assert ThumbnailService.render_stats()["in_flight"] == 0
+
+def test_cache_total_is_consistent_across_threads(cache_dir):
+    ThumbnailService._account(0)
+
+    def account():
+        for _ in range(20_000):
+            ThumbnailService._account(1)
+
+    threads = [threading.Thread(target=account) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert ThumbnailService._cache_bytes == 8 * 20_000
+
+def test_eviction_drops_least_recently_used(cache_dir, monkeypatch):
+    monkeypatch.setattr(settings, "THUMBNAIL_CACHE_MAX_BYTES", 2500)
+    os.makedirs(os.path.join(cache_dir, "aa"))
+    paths = []
+    for age, name in enumerate(["old", "newer", "newest"]):
+        path = os.path.join(cache_dir, "aa", f"{name}_64.jpg")
+        with open(path, "wb") as f:
+            f.write(b"x" * 1000)
+        os.utime(path, (1_000_000 + age, 1_000_000 + age))
+        paths.append(path)
+
+    ThumbnailService._account(1000)
+
+    assert [os.path.exists(path) for path in paths] == [False, True, True]
+    assert ThumbnailService._cache_bytes == 2000
\ No newline at end of file
@@ -0,0 +1,210 @@
+import hashlib
+import os
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.upload_session import UploadSession
+from app.models.user import STORAGE_LIMITS, User
+from app.services.file_service import FileService
+from app.services.upload_service import UploadService
+from app.utils.file_utils import get_upload_session_dir
+
+# The smallest part the tests' settings allow
+PART_SIZE = settings.UPLOAD_MIN_PART_SIZE
+
+class RepeatingUpload:
+    """An UploadFile stand-in producing ``size`` bytes without holding them."""
+
+    def __init__(self, size: int):
+        self.remaining = size
+        self.block = os.urandom(settings.UPLOAD_CHUNK_SIZE)
+
+    async def read(self, size: int) -> bytes:
+        size = min(size, self.remaining, len(self.block))
+        self.remaining -= size
+        return self.block[:size]
+
+async def user_row(db, auth: dict, client) -> User:
+    me = (await client.get("/auth/me", headers=auth)).json()
+    db.expire_all()
+    return await db.scalar(select(User).where(User.id == me["id"]))
+
+def temp_files() -> list:
+    temp_dir = os.path.join(settings.UPLOAD_DIR, ".tmp")
+    return os.listdir(temp_dir) if os.path.isdir(temp_dir) else []
+
+async def test_stream_to_disk_memory_is_flat(tmp_path):
+    size = 64 * settings.UPLOAD_CHUNK_SIZE
+    temp_path = os.path.join(tmp_path, "upload.part")
+
+    tracemalloc.start()
+    try:
+        digest = await FileService._stream_to_disk(RepeatingUpload(size), temp_path, size)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert digest.size == os.path.getsize(temp_path) == size
+    assert peak < 8 * settings.UPLOAD_CHUNK_SIZE
+
+async def test_upload_is_hashed_and_charged(db, client, auth, upload):
+    content = os.urandom(5000)
+
+    record = await upload(auth, "model.bin", content)
+
+    assert record["sha256"] == hashlib.sha256(content).hexdigest()
+    assert record["size_bytes"] == len(content)
+    assert (await user_row(db, auth, client)).storage_used == len(content)
+
+async def test_upload_over_max_file_size_is_rejected(db, client, auth, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_FILE_SIZE", 4096)
+    before = temp_files()
+
+    response = await client.post("/files/upload", files={"file": ("big.bin", os.urandom(8192))}, headers=auth)
+
+    assert response.status_code == 413
+    assert response.json()["detail"] == "File too large"
+    assert temp_files() == before
+    assert (await user_row(db, auth, client)).storage_used == 0
+
+async def test_upload_over_quota_is_rejected(db, client, auth):
+    user = await user_row(db, auth, client)
+    await db.execute(update(User).where(User.id == user.id).values(storage_used=STORAGE_LIMITS[0] - 1000))
+    await db.commit()
+    before = temp_files()
+
+    response = await client.post("/files/upload", files={"file": ("big.bin", os.urandom(2000))}, headers=auth)
+
+    assert response.status_code == 413
+    assert response.json()["detail"] == "Storage quota exceeded"
+    assert temp_files() == before
+    assert (await user_row(db, auth, client)).storage_used == STORAGE_LIMITS[0] - 1000
+
+async def start_session(client, auth: dict, content: bytes) -> str:
+    response = await client.post(
+        "/uploads/", json={"filename": "model.bin", "size_bytes": len(content), "part_size": PART_SIZE}, headers=auth
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["part_count"] == -(-len(content) // PART_SIZE)
+    return response.json()["upload_id"]
+
+async def send_parts(client, auth: dict, upload_id: str, content: bytes, numbers=None):
+    for index in range(0, len(content), PART_SIZE):
+        number = index // PART_SIZE + 1
+        if numbers is None or number in numbers:
+            response = await client.put(
+                f"/uploads/{upload_id}/parts/{number}", content=content[index:index + PART_SIZE], headers=auth
+            )
+            assert response.status_code == 200, response.text
+
+async def test_resumable_upload_round_trip(db, client, auth):
+    content = os.urandom(2 * PART_SIZE + 500)
+    upload_id = await start_session(client, auth, content)
+    assert (await user_row(db, auth, client)).storage_used == len(content)
+
+    await send_parts(client, auth, upload_id, content)
+    response = await client.post(
+        f"/uploads/{upload_id}/complete", json={"sha256": hashlib.sha256(content).hexdigest()}, headers=auth
+    )
+
+    assert response.status_code == 200, response.text
+    record = response.json()
+    assert (await client.get(f"/files/{record['id']}/download", headers=auth)).content == content
+    assert (await user_row(db, auth, client)).storage_used == len(content)
+    assert (await client.get(f"/uploads/{upload_id}", headers=auth)).json()["status"] == "completed"
+
+async def test_complete_with_missing_parts_is_rejected(client, auth):
+    content = os.urandom(3 * PART_SIZE)
+    upload_id = await start_session(client, auth, content)
+    await send_parts(client, auth, upload_id, content, numbers={1, 3})
+
+    response = await client.post(f"/uploads/{upload_id}/complete", json={}, headers=auth)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Missing parts: [2]"
+
+async def test_part_checksum_mismatch_is_rejected(client, auth):
+    content = os.urandom(PART_SIZE + 10)
+    upload_id = await start_session(client, auth, content)
+
+    response = await client.put(
+        f"/uploads/{upload_id}/parts/1",
+        content=content[:PART_SIZE],
+        headers={**auth, "X-Part-SHA256": hashlib.sha256(b"other").hexdigest()}
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Part checksum mismatch"
+    assert (await client.get(f"/uploads/{upload_id}", headers=auth)).json()["parts"] == []
+
+async def test_concurrent_complete_is_rejected(client, auth, monkeypatch):
+    content = os.urandom(PART_SIZE)
+    upload_id = await start_session(client, auth, content)
+    await send_parts(client, auth, upload_id, content)
+    get_active_session = UploadService._get_active_session
+
+    async def claimed_meanwhile(db, upload_id, user):
+        # Another request claims the session between the check and the claim
+        session = await get_active_session(db, upload_id, user)
+        async with AsyncSessionLocal() as other:
+            await other.execute(
+                update(UploadSession).where(UploadSession.id == upload_id).values(status="completing")
+            )
+            await other.commit()
+        return session
+
+    monkeypatch.setattr(UploadService, "_get_active_session", claimed_meanwhile)
+    response = await client.post(f"/uploads/{upload_id}/complete", json={}, headers=auth)
+
+    assert response.status_code == 409
+    assert (await client.get(f"/uploads/{upload_id}", headers=auth)).json()["status"] == "completing"
+
+async def test_checksum_mismatch_rolls_the_session_back(db, client, auth):
+    content = os.urandom(PART_SIZE + 10)
+    upload_id = await start_session(client, auth, content)
+    await send_parts(client, auth, upload_id, content)
+    before = temp_files()
+
+    response = await client.post(
+        f"/uploads/{upload_id}/complete", json={"sha256": hashlib.sha256(b"other").hexdigest()}, headers=auth
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "File checksum mismatch"
+    assert (await client.get(f"/uploads/{upload_id}", headers=auth)).json()["status"] == "active"
+    assert temp_files() == before
+    retry = await client.post(
+        f"/uploads/{upload_id}/complete", json={"sha256": hashlib.sha256(content).hexdigest()}, headers=auth
+    )
+    assert retry.status_code == 200, retry.text
+    assert (await user_row(db, auth, client)).storage_used == len(content)
+
+async def test_abort_releases_the_reservation(db, client, auth):
+    content = os.urandom(PART_SIZE + 10)
+    upload_id = await start_session(client, auth, content)
+    await send_parts(client, auth, upload_id, content, numbers={1})
+
+    response = await client.delete(f"/uploads/{upload_id}", headers=auth)
+
+    assert response.status_code == 200
+    assert (await user_row(db, auth, client)).storage_used == 0
+    assert not os.path.exists(get_upload_session_dir(upload_id))
+    assert (await client.post(f"/uploads/{upload_id}/complete", json={}, headers=auth)).status_code == 410
+
+async def test_expired_sessions_release_the_reservation(db, client, auth):
+    content = os.urandom(PART_SIZE + 10)
+    upload_id = await start_session(client, auth, content)
+    await db.execute(
+        update(UploadSession)
+        .where(UploadSession.id == upload_id)
+        .values(expires_at=datetime.now(timezone.utc) - timedelta(minutes=1))
+    )
+    await db.commit()
+
+    assert await UploadService.expire_sessions(db) >= 1
+
+    assert (await user_row(db, auth, client)).storage_used == 0
+    assert (await client.get(f"/uploads/{upload_id}", headers=auth)).json()["status"] == "expired"
+    assert not os.path.exists(get_upload_session_dir(upload_id))
\ No newline at end of file
@@ -0,0 +1,68 @@
+import os
+import pytest
+from sqlalchemy import select
+from app.database import AsyncSessionLocal
+from app.models.user import User
+from app.services.user_cache import UserCache, user_cache
+
+@pytest.fixture
+def invalidations(monkeypatch) -> list:
+    """The committed file_count each time a user is invalidated. A cached
+    copy taken before the last invalidation would be stale otherwise."""
+    seen = []
+    invalidate = user_cache.invalidate
+
+    async def recording(user_id: int):
+        async with AsyncSessionLocal() as db:
+            seen.append(await db.scalar(select(User.file_count).where(User.id == user_id)))
+        await invalidate(user_id)
+
+    monkeypatch.setattr(user_cache, "invalidate", recording)
+    return seen
+
+async def cached_user_id(client, auth: dict) -> int:
+    # Any authenticated request leaves the user in the cache
+    me = (await client.get("/auth/me", headers=auth)).json()
+    assert me["id"] in user_cache._entries
+    return me["id"]
+
+async def listing_total(client, auth: dict) -> int:
+    return (await client.get("/files/", headers=auth)).json()["total"]
+
+async def test_upload_and_delete_invalidate_the_cached_user(client, auth, upload, invalidations):
+    user_id = await cached_user_id(client, auth)
+    assert await listing_total(client, auth) == 0
+
+    first = await upload(auth, "a.bin", os.urandom(1000))
+    assert user_id not in user_cache._entries
+    assert invalidations[-1] == 1
+    second = await upload(auth, "b.bin", os.urandom(500))
+    assert invalidations[-1] == 2
+
+    # The listing total is the cached user's file_count
+    assert await listing_total(client, auth) == 2
+    assert (await client.get("/auth/me", headers=auth)).json()["storage_used"] == 1500
+
+    await cached_user_id(client, auth)
+    response = await client.delete(f"/files/{first['id']}", headers=auth)
+    assert response.status_code == 200
+    assert user_id not in user_cache._entries
+    assert invalidations[-1] == 1
+    assert await listing_total(client, auth) == 1
+
+    await cached_user_id(client, auth)
+    response = await client.post("/files/batch/delete", json={"ids": [second["id"]]}, headers=auth)
+    assert response.status_code == 200
+    assert invalidations[-1] == 0
+    assert await listing_total(client, auth) == 0
+    assert (await client.get("/auth/me", headers=auth)).json()["storage_used"] == 0
+
+async def test_cached_users_survive_the_redis_encoding(client, auth):
+    user_id = await cached_user_id(client, auth)
+    user = await user_cache.get(user_id)
+
+    snapshot = UserCache._decode(UserCache._encode(user_cache._entries[user_id][1]))
+
+    assert "password_hash" not in snapshot
+    assert snapshot["created_at"] == user.created_at
+    assert snapshot["storage_used"] == user.storage_used
\ No newline at end of file